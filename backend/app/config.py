@@ -11,8 +11,90 @@ class Settings(BaseSettings):
     # DeepSeek API
     deepseek_api_key: str = ""
     
+    # DeepSeek HTTP 连接池（进程级共享客户端）
+    deepseek_http2: bool = True                 # 安装 h2 时启用 HTTP/2
+    deepseek_max_connections: int = 20          # 最大并发连接数
+    deepseek_max_keepalive_connections: int = 10  # 最大空闲保活连接数
+    deepseek_keepalive_expiry: float = 60.0     # 空闲连接保活时间（秒）
+    
+    # 题库目录索引（随机抽题、分面统计）
+    question_catalog_ttl: float = 300.0         # 其他进程写入的题目最多延迟这么久可见（秒）
+    
+    # 离线词典（ECDICT 格式 CSV，首次查询时建立 SQLite 索引）
+    dictionary_path: str = "./data/ecdict.csv"
+    dictionary_index_path: str = ""             # 为空时使用 <dictionary_path>.sqlite
+    dictionary_cache_size: int = 4096           # 查询结果 LRU 缓存条目数
+    
+    # /api/ui 聚合接口的 Cache-Control（配合 ETag 协商缓存）
+    ui_cache_control: str = "private, no-cache"
+    
+    # 当前用户解析缓存（进程内，按用户 id）
+    user_cache_ttl: float = 60.0                # 快照有效期（秒），跨进程更新最多延迟这么久可见
+    user_cache_size: int = 1024
+    
+    # 学习统计 / 学情汇总 / 技能雷达 / 推荐缓存（进程内，按用户，本进程的写入提交后失效）
+    stats_cache_ttl: float = 60.0               # 跨进程（多 worker）写入最多延迟这么久可见（秒）
+    stats_cache_size: int = 1024
+    
+    # 技能雷达图（按时间衰减加权，缓存同上）
+    skill_half_life_days: float = 30.0          # 半衰期：30 天前的答题权重为一半
+    skill_window_days: int = 180                # 只统计最近 N 天（更早的权重已不足 2%）
+    
+    # 个性化推荐
+    recommend_budget_ms: float = 200.0          # 单次推荐的时间预算，超时返回通用推荐
+    recommend_exclude_days: int = 14            # 排除最近 N 天做过的题目
+    recommend_exclude_limit: int = 2000         # 排除集合最多读取的答题记录数
+    
+    # 相似题池（按原题 + 错误类型复用 AI 生成的练习题）
+    similar_pool_watermark: int = 2             # 用户在池中未看过的题少于此数时后台补充
+    similar_pool_refill_size: int = 3           # 每次补充生成的题目数
+    similar_pool_max_size: int = 30             # 单个池后台补充的上限
+    similar_pool_concurrency: int = 2           # 后台生成的并发数
+    
+    # AI 错误分析后台队列
+    analysis_worker_concurrency: int = 4        # 并发分析任务数
+    analysis_max_attempts: int = 3              # 单个任务最大尝试次数
+    analysis_retry_delay: float = 10.0          # 重试基础退避（秒），按次数指数增长
+    analysis_poll_interval: float = 15.0        # 扫描待处理任务的间隔（秒）
+    analysis_stale_after: float = 120.0         # running 状态超过此时长视为中断，重新入队
+    
+    # 学情报告定时生成（进程内调度，低峰时段分批生成）
+    report_scheduler_enabled: bool = True       # 多 worker 部署时可只在一个进程开启
+    report_types: list[str] = ["daily", "weekly", "monthly"]
+    report_window_start_hour: int = 18          # 低峰时段起止（UTC 小时，18-22 约为北京时间 2:00-6:00）
+    report_window_end_hour: int = 22
+    report_poll_interval: float = 600.0         # 检查是否有待生成报告的间隔（秒）
+    report_batch_size: int = 200                # 每批处理的用户数
+    report_catchup_periods: int = 3             # 补齐最近 N 个已结束但缺失的周期（服务停机期间错过的）
+    report_ai_types: list[str] = ["weekly", "monthly"]  # 生成 AI 建议的报告类型
+    report_ai_concurrency: int = 2              # 生成 AI 建议的并发数
+    
+    # 错误分析结果缓存
+    analysis_cache_ttl: int = 30 * 24 * 3600    # 缓存有效期（秒）
+    analysis_cache_memory_size: int = 2048      # 进程内 LRU 条目数
+    analysis_cache_max_rows: int = 100000       # 持久化缓存表最大行数
+    
     # 数据库
     database_url: str = "sqlite:///./lumiai.db"
+    auto_migrate: bool = True                   # 启动时自动执行未应用的迁移
+    
+    # 连接池（PostgreSQL 等服务端数据库使用，SQLite 忽略）
+    db_pool_size: int = 5                       # 每个进程常驻连接数
+    db_max_overflow: int = 10                   # 高峰时额外允许的连接数
+    db_pool_timeout: float = 30.0               # 获取连接的最长等待（秒）
+    db_pool_recycle: int = 1800                 # 连接最长存活时间（秒），避免被服务端或代理断开
+    db_pool_pre_ping: bool = True               # 取出连接前先探活
+    db_statement_timeout: int = 30000           # 单条语句超时（毫秒），0 表示不限制
+    
+    # SQLite 存储参数：每个新连接建立时通过 PRAGMA 应用
+    # production: WAL + 下列参数；default: 不做任何调整，使用 SQLite 默认值
+    sqlite_profile: str = "production"
+    sqlite_journal_mode: str = "WAL"            # 读写互不阻塞
+    sqlite_synchronous: str = "NORMAL"          # WAL 下可安全使用 NORMAL
+    sqlite_busy_timeout: int = 5000             # 写锁等待时间（毫秒），避免 database is locked
+    sqlite_mmap_size: int = 256 * 1024 * 1024   # 内存映射读取大小（字节）
+    sqlite_cache_size: int = -64000             # 页缓存，负数表示 KiB（约 64MB）
+    sqlite_temp_store: str = "MEMORY"           # 临时表和排序使用内存
     
     # 服务器
     host: str = "0.0.0.0"
@@ -1,29 +1,134 @@
 """
 LumiAI Backend - 数据库配置
+
+路由使用异步引擎（aiosqlite / asyncpg），避免查询阻塞事件循环；
+同步引擎保留给 seed_data、建表等启动期任务和命令行脚本。
+引擎参数按方言生成：SQLite 应用 PRAGMA，PostgreSQL 使用连接池和语句超时。
 """
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, DeclarativeBase
 from app.config import get_settings
 
 settings = get_settings()
 
+# 同步驱动 -> 异步驱动
+ASYNC_DRIVERS = {
+    "sqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+}
+
+
+def normalize_database_url(database_url: str) -> str:
+    """兼容 postgres:// 写法（部分云平台提供的格式）"""
+    if database_url.startswith("postgres://"):
+        return "postgresql://" + database_url[len("postgres://"):]
+    return database_url
+
+
+def get_async_database_url(database_url: str) -> str:
+    """将同步数据库 URL 转换为对应的异步驱动 URL"""
+    url = make_url(normalize_database_url(database_url))
+    backend = url.get_backend_name()
+    if url.drivername == backend and backend in ASYNC_DRIVERS:
+        url = url.set(drivername=ASYNC_DRIVERS[backend])
+    return url.render_as_string(hide_password=False)
+
+
+def _engine_options(database_url: str, is_async: bool) -> dict:
+    """按数据库方言生成引擎参数"""
+    backend = make_url(database_url).get_backend_name()
+    if backend == "sqlite":
+        return {"connect_args": {"check_same_thread": False}}  # SQLite 需要此配置
+
+    options = {
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    if backend == "postgresql" and settings.db_statement_timeout > 0:
+        timeout = str(int(settings.db_statement_timeout))
+        if is_async:
+            options["connect_args"] = {"server_settings": {"statement_timeout": timeout}}
+        else:
+            options["connect_args"] = {"options": f"-c statement_timeout={timeout}"}
+    return options
+
+
+def _sqlite_pragmas() -> list[str]:
+    """当前存储配置对应的 PRAGMA 语句"""
+    if settings.sqlite_profile != "production":
+        return []
+    return [
+        f"PRAGMA journal_mode={settings.sqlite_journal_mode}",
+        f"PRAGMA synchronous={settings.sqlite_synchronous}",
+        f"PRAGMA busy_timeout={int(settings.sqlite_busy_timeout)}",
+        f"PRAGMA mmap_size={int(settings.sqlite_mmap_size)}",
+        f"PRAGMA cache_size={int(settings.sqlite_cache_size)}",
+        f"PRAGMA temp_store={settings.sqlite_temp_store}",
+    ]
+
+
+def _apply_sqlite_pragmas(dbapi_connection, connection_record) -> None:
+    cursor = dbapi_connection.cursor()
+    try:
+        for pragma in _sqlite_pragmas():
+            cursor.execute(pragma)
+    finally:
+        cursor.close()
+
+
+def reset_id_sequence_sql(table_name: str):
+    """显式指定主键插入后同步 PostgreSQL 自增序列，否则后续插入会主键冲突"""
+    return text(
+        f"SELECT setval(pg_get_serial_sequence('{table_name}', 'id'), "
+        f"(SELECT MAX(id) FROM {table_name}))"
+    )
+
+
+DATABASE_URL = normalize_database_url(settings.database_url)
+ASYNC_DATABASE_URL = get_async_database_url(DATABASE_URL)
+
 # 创建数据库引擎
-engine = create_engine(
-    settings.database_url,
-    connect_args={"check_same_thread": False}  # SQLite 需要此配置
+engine = create_engine(DATABASE_URL, **_engine_options(DATABASE_URL, is_async=False))
+
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL, **_engine_options(DATABASE_URL, is_async=True)
 )
 
+# SQLite：同步与异步引擎的每个新连接都应用同一组 PRAGMA
+if engine.dialect.name == "sqlite":
+    for _engine in (engine, async_engine.sync_engine):
+        event.listen(_engine, "connect", _apply_sqlite_pragmas)
+
 # 创建会话工厂
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# 异步会话：提交后不过期对象，避免在响应序列化时触发隐式 IO
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 # 声明基类
 class Base(DeclarativeBase):
     pass
 
 
-def get_db():
-    """获取数据库会话的依赖注入函数"""
+async def get_db():
+    """获取异步数据库会话的依赖注入函数"""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+def get_sync_db():
+    """获取同步数据库会话（脚本和同步代码使用）"""
     db = SessionLocal()
     try:
         yield db
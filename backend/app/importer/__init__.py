@@ -0,0 +1,237 @@
+"""
+LumiAI - 题库批量导入
+
+    python -m app.importer questions.jsonl
+    python -m app.importer "雅思阅读真题还原 （A类）.pdf" --source "雅思阅读真题还原（A类）"
+
+流水线：读取记录（JSONL 逐行 / PDF 文本抽取）-> 校验并规范化 -> 按批 executemany 插入。
+- 去重：按 (source, title, content_hash) 唯一索引 ON CONFLICT DO NOTHING，重复导入是安全的
+- 断点续传：每批提交后把已处理的记录数写入检查点文件，中断后再次执行从该位置继续
+- 直接使用 Core insert，不经过 ORM 事件；运行中的服务会在 question_catalog_ttl 秒内看到新题目
+"""
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from pydantic import ValidationError
+from sqlalchemy.engine import Engine
+
+from app.models.question import Question
+from app.schemas.question import QuestionCreate
+
+DEFAULT_BATCH_SIZE = 1000
+
+# 这些字段在 JSONL 中可以直接写成列表/对象，入库前序列化为 JSON 字符串
+JSON_FIELDS = ("options", "skill_tags")
+
+DEDUP_COLUMNS = ["source", "title", "content_hash"]
+
+
+def content_hash(passage: Optional[str], content: str) -> str:
+    raw = f"{passage or ''}\x1f{content}"
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+def normalize_record(raw: Dict, default_source: str) -> Dict:
+    """校验一条原始记录并转换为 questions 表的列值，无效时抛出 ValueError"""
+    data = dict(raw)
+    for key in JSON_FIELDS:
+        if data.get(key) is not None and not isinstance(data[key], str):
+            data[key] = json.dumps(data[key], ensure_ascii=False)
+    # 已是 JSON 字符串的标签可能带 \uXXXX 转义，统一为原始中文，否则全文索引匹配不到
+    if isinstance(data.get("skill_tags"), str):
+        try:
+            data["skill_tags"] = json.dumps(json.loads(data["skill_tags"]), ensure_ascii=False)
+        except ValueError:
+            pass
+    if not data.get("source"):
+        data["source"] = default_source
+    try:
+        record = QuestionCreate.model_validate(data).model_dump()
+    except ValidationError as e:
+        error = e.errors()[0]
+        field_name = ".".join(str(part) for part in error["loc"])
+        raise ValueError(f"{field_name}: {error['msg']}") from e
+    record["content_hash"] = content_hash(record["passage"], record["content"])
+    return record
+
+
+Record = Tuple[int, Optional[Dict], Optional[str]]
+
+
+def read_jsonl(path: Path, start: int = 0, source: Optional[str] = None) -> Iterator[Record]:
+    """逐行读取 JSONL，产出 (序号, 记录, 错误)；start 之前的行只计数不解析"""
+    with path.open(encoding="utf-8") as f:
+        index = 0
+        for line in f:
+            if not line.strip():
+                continue
+            if index >= start:
+                try:
+                    yield index, json.loads(line), None
+                except json.JSONDecodeError as e:
+                    yield index, None, f"JSON 解析失败: {e}"
+            index += 1
+
+
+def read_pdf(path: Path, start: int = 0, source: Optional[str] = None) -> Iterator[Record]:
+    """PDF 抽取结果是确定的，按序号跳过已处理的记录"""
+    from app.importer.pdf import extract_pdf_questions
+
+    for index, record in enumerate(extract_pdf_questions(path, source=source)):
+        if index >= start:
+            yield index, record, None
+
+
+READERS = {
+    ".jsonl": read_jsonl,
+    ".pdf": read_pdf,
+}
+
+
+# ========== 检查点 ==========
+
+def _fingerprint(path: Path) -> Dict:
+    stat = path.stat()
+    return {"path": str(path.resolve()), "size": stat.st_size, "mtime": stat.st_mtime}
+
+
+def load_checkpoint(checkpoint: Path, source_path: Path) -> Dict:
+    """读取检查点；输入文件已变化时忽略旧检查点"""
+    if not checkpoint.exists():
+        return {}
+    try:
+        state = json.loads(checkpoint.read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError):
+        return {}
+    if state.get("input") != _fingerprint(source_path):
+        return {}
+    return state
+
+
+def save_checkpoint(checkpoint: Path, source_path: Path, stats: "ImportStats") -> None:
+    """先写临时文件再替换，中断时不会留下半个检查点"""
+    state = {"input": _fingerprint(source_path), **stats.as_dict()}
+    tmp = checkpoint.with_name(checkpoint.name + ".tmp")
+    tmp.write_text(json.dumps(state, ensure_ascii=False), encoding="utf-8")
+    os.replace(tmp, checkpoint)
+
+
+# ========== 导入 ==========
+
+@dataclass
+class ImportStats:
+    processed: int = 0
+    inserted: int = 0
+    duplicates: int = 0
+    invalid: int = 0
+    errors: List[str] = field(default_factory=list)
+
+    def as_dict(self) -> Dict:
+        return {
+            "processed": self.processed,
+            "inserted": self.inserted,
+            "duplicates": self.duplicates,
+            "invalid": self.invalid,
+        }
+
+
+def _insert_statement(dialect: str):
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise RuntimeError(f"不支持的数据库: {dialect}")
+    return (
+        insert(Question.__table__)
+        .on_conflict_do_nothing(index_elements=DEDUP_COLUMNS)
+        .returning(Question.__table__.c.id)
+    )
+
+
+def import_questions(
+    engine: Engine,
+    records: Iterable[Record],
+    default_source: str,
+    stats: Optional[ImportStats] = None,
+    batch_size: int = DEFAULT_BATCH_SIZE,
+    on_batch: Optional[Callable[[ImportStats], None]] = None,
+) -> ImportStats:
+    """按批插入记录；每批一个事务，提交后调用 on_batch（写检查点、打印进度）"""
+    stats = stats or ImportStats()
+    statement = _insert_statement(engine.dialect.name)
+    batch: List[Dict] = []
+    batch_end = stats.processed
+
+    def flush() -> None:
+        if batch:
+            with engine.begin() as conn:
+                inserted = len(conn.execute(statement, batch).all())
+            stats.inserted += inserted
+            stats.duplicates += len(batch) - inserted
+            batch.clear()
+        stats.processed = batch_end
+        if on_batch:
+            on_batch(stats)
+
+    now = datetime.utcnow()
+    for index, raw, error in records:
+        batch_end = index + 1
+        if error is None:
+            try:
+                record = normalize_record(raw, default_source)
+                record["created_at"] = now
+                batch.append(record)
+            except ValueError as e:
+                error = str(e)
+        if error is not None:
+            stats.invalid += 1
+            stats.errors.append(f"第 {index + 1} 条: {error}")
+        if batch_end - stats.processed >= batch_size:
+            flush()
+    flush()
+    return stats
+
+
+def run_import(engine: Engine, path: Path, source: Optional[str] = None,
+               batch_size: int = DEFAULT_BATCH_SIZE, checkpoint: Optional[Path] = None,
+               restart: bool = False, log: Callable[[str], None] = print) -> ImportStats:
+    """导入一个文件（.jsonl / .pdf），支持断点续传"""
+    reader = READERS.get(path.suffix.lower())
+    if reader is None:
+        raise ValueError(f"不支持的文件类型: {path.suffix}（可用: {', '.join(READERS)}）")
+
+    checkpoint = checkpoint or path.with_name(path.name + ".checkpoint")
+    state = {} if restart else load_checkpoint(checkpoint, path)
+    stats = ImportStats(**{key: state.get(key, 0) for key in ImportStats().as_dict()})
+    if stats.processed:
+        log(f"从检查点继续：已处理 {stats.processed} 条")
+
+    started = time.perf_counter()
+    resumed_from = stats.processed
+
+    def on_batch(current: ImportStats) -> None:
+        save_checkpoint(checkpoint, path, current)
+        elapsed = time.perf_counter() - started
+        rate = (current.processed - resumed_from) / elapsed if elapsed > 0 else 0.0
+        log(
+            f"已处理 {current.processed} 条：新增 {current.inserted}，"
+            f"重复 {current.duplicates}，无效 {current.invalid}（{rate:.0f} 条/秒）"
+        )
+
+    import_questions(
+        engine,
+        reader(path, start=stats.processed, source=source),
+        default_source=source or path.stem,
+        stats=stats,
+        batch_size=batch_size,
+        on_batch=on_batch,
+    )
+    checkpoint.unlink(missing_ok=True)
+    return stats
@@ -0,0 +1,57 @@
+"""
+LumiAI - 题库导入命令行
+
+    python -m app.importer FILE [--source NAME] [--batch-size N] [--checkpoint PATH] [--restart]
+"""
+import argparse
+import sys
+from pathlib import Path
+
+from app.database import engine, init_db
+from app.importer import DEFAULT_BATCH_SIZE, run_import
+from app.migrations import run_migrations
+
+# 结束时最多列出的无效记录数
+MAX_REPORTED_ERRORS = 20
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m app.importer", description="批量导入题目（.jsonl / .pdf）")
+    parser.add_argument("file", type=Path, help="JSONL 文件（每行一道题）或真题 PDF")
+    parser.add_argument("--source", help="题目来源，记录中未指定时使用（默认取文件名）")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="每批插入的记录数")
+    parser.add_argument("--checkpoint", type=Path, help="检查点文件（默认为 FILE.checkpoint）")
+    parser.add_argument("--restart", action="store_true", help="忽略检查点，从头导入")
+    args = parser.parse_args(argv)
+
+    if not args.file.exists():
+        print(f"文件不存在: {args.file}")
+        return 1
+
+    # 确保 content_hash 列和去重索引已存在
+    init_db()
+    run_migrations(engine)
+
+    try:
+        stats = run_import(
+            engine,
+            args.file,
+            source=args.source,
+            batch_size=max(args.batch_size, 1),
+            checkpoint=args.checkpoint,
+            restart=args.restart,
+        )
+    except (RuntimeError, ValueError) as e:
+        print(f"导入失败: {e}")
+        return 1
+
+    for error in stats.errors[:MAX_REPORTED_ERRORS]:
+        print(f"  无效记录 {error}")
+    if len(stats.errors) > MAX_REPORTED_ERRORS:
+        print(f"  ……另有 {len(stats.errors) - MAX_REPORTED_ERRORS} 条无效记录")
+    print(f"导入完成：新增 {stats.inserted}，重复 {stats.duplicates}，无效 {stats.invalid}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
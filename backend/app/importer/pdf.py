@@ -0,0 +1,149 @@
+"""
+LumiAI - PDF 真题文本抽取
+
+针对《雅思阅读真题还原（A 类）》的版式：每套 PRACTICE TEST 含三篇文章，
+每篇文章后是若干 "Questions a-b" 题组，书末 "参考答案" 按 Test / PASSAGE 列出答案。
+每个题组生成一条阅读题记录：passage 为文章全文，content 为题组说明和题目，
+answer 为该题组题号对应的参考答案。
+
+需要 pypdf（可选依赖）：pip install pypdf
+"""
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+_RUNNING_HEADER_RE = re.compile(r"^\s*\d+\s*\n\s*雅思阅读真题还原（A\s*类）\s*\n")
+_TEST_RE = re.compile(r"^\s*PRACTICE TEST\s+(\d+)\s+1 hour\s*$", re.M)
+_PASSAGE_RE = re.compile(r"^\s*(?:Reading\s+)?Passage\s*(\d)\s*(?:Questions?\s*\d+\s*-\s*\d+)?\s*$", re.I | re.M)
+_GROUP_RE = re.compile(r"^\s*Questions?\s+(\d+)\s*(?:-|–|and)\s*(\d+)\b.*$|^\s*Questions?\s+(\d+)\s*$", re.M)
+_INSTRUCTION_END_RE = re.compile(r"(below|following pages)\.?\s*$", re.I)
+_ANSWER_TEST_RE = re.compile(r"^\s*Test\s+(\d+)\s*$", re.M)
+_ANSWER_PASSAGE_RE = re.compile(r"^\s*READ\w*\s+PASSAGE\s*(\d)\s*$", re.M)
+_ANSWER_NUMBER_RE = re.compile(r"^(\d+)(?:-(\d+))?$")
+
+ANSWER_KEY_HEADING = "参考答案"
+
+# 按题组说明（不区分大小写）判断题型，先匹配的优先
+QUESTION_TYPE_HINTS = [
+    ("true_false_ng", ("not given",)),
+    ("fill_in_blank", ("no more than", "one word", "words from the passage")),
+    ("matching", ("paragraph", "heading", "match", "list of", "correct ending", "from the box")),
+    ("multiple_choice", ("correct letter", "choose two", "choose three", "choose letters", "two letters")),
+]
+
+
+def _read_pages(path: Path) -> List[str]:
+    try:
+        from pypdf import PdfReader
+    except ImportError:
+        raise RuntimeError("导入 PDF 需要安装 pypdf：pip install pypdf")
+    reader = PdfReader(str(path))
+    return [_RUNNING_HEADER_RE.sub("", page.extract_text() or "") for page in reader.pages]
+
+
+def _join_lines(text: str) -> str:
+    """合并 PDF 折行产生的连字符断词"""
+    return re.sub(r"-\n(?=[a-z])", "", text).strip()
+
+
+def _split(pattern: re.Pattern, text: str) -> List[Tuple[re.Match, str]]:
+    """按标题行切分文本，返回 (标题匹配, 该标题之后的正文)"""
+    matches = list(pattern.finditer(text))
+    return [
+        (match, text[match.end(): matches[i + 1].start() if i + 1 < len(matches) else len(text)])
+        for i, match in enumerate(matches)
+    ]
+
+
+def parse_answer_key(text: str) -> Dict[Tuple[int, int], Dict[int, str]]:
+    """解析参考答案：{(套题号, 文章号): {题号: 答案}}"""
+    answers = {}
+    for test_match, test_text in _split(_ANSWER_TEST_RE, text):
+        for passage_match, passage_text in _split(_ANSWER_PASSAGE_RE, test_text):
+            # 第一行是中文标题和题目编号，其余为 "1 TRUE 2 FALSE ..." 形式的答案
+            body = _join_lines(passage_text).split("\n", 1)
+            tokens = body[1].split() if len(body) > 1 else []
+            answers[(int(test_match.group(1)), int(passage_match.group(1)))] = _parse_numbered(tokens)
+    return answers
+
+
+def _parse_numbered(tokens: List[str]) -> Dict[int, str]:
+    """按题号顺序切分答案，答案本身可能包含数字（如 "39 20, 000"）"""
+    result: Dict[int, List[str]] = {}
+    current: List[int] = []
+    for token in tokens:
+        match = _ANSWER_NUMBER_RE.match(token)
+        expected = (current[-1] + 1) if current else None
+        if match and (expected is None or int(match.group(1)) == expected):
+            start = int(match.group(1))
+            current = list(range(start, int(match.group(2) or start) + 1))
+            for number in current:
+                result[number] = []
+            continue
+        for number in current:
+            result[number].append(token)
+    return {number: " ".join(words) for number, words in result.items()}
+
+
+def detect_question_type(instructions: str) -> str:
+    instructions = instructions.lower()
+    for question_type, hints in QUESTION_TYPE_HINTS:
+        if any(hint in instructions for hint in hints):
+            return question_type
+    return "short_answer"
+
+
+def _parse_passage(body: str) -> Optional[Tuple[str, str, List[Tuple[int, int, str]]]]:
+    """拆出文章标题、正文和题组 [(起始题号, 结束题号, 题组文本)]"""
+    groups = _split(_GROUP_RE, body)
+    head = body[: groups[0][0].start()] if groups else body
+    lines = [line.strip() for line in head.strip().split("\n")]
+
+    # 跳过 "You should spend about 20 minutes ... below." 说明
+    for i, line in enumerate(lines[:4]):
+        if _INSTRUCTION_END_RE.search(line):
+            lines = lines[i + 1:]
+            break
+    lines = [line for line in lines if line]
+    if len(lines) < 2:
+        return None
+
+    title = lines[0]
+    passage = _join_lines("\n".join(lines[1:]))
+    parsed_groups = []
+    for match, text in groups:
+        start = int(match.group(1) or match.group(3))
+        end = int(match.group(2) or start)
+        parsed_groups.append((start, end, _join_lines(match.group(0) + "\n" + text)))
+    return title, passage, parsed_groups
+
+
+def extract_pdf_questions(path: Path, source: Optional[str] = None) -> Iterator[Dict]:
+    """从真题 PDF 中抽取题组记录（字段与 Question 一致）"""
+    text = "\n".join(_read_pages(path))
+    body, _, key_text = text.rpartition(ANSWER_KEY_HEADING)
+    answer_key = parse_answer_key(key_text)
+    source = source or path.stem
+
+    for test_match, test_text in _split(_TEST_RE, body):
+        test_no = int(test_match.group(1))
+        for passage_match, passage_text in _split(_PASSAGE_RE, test_text):
+            parsed = _parse_passage(passage_text)
+            if parsed is None:
+                continue
+            title, passage, groups = parsed
+            answers = answer_key.get((test_no, int(passage_match.group(1))), {})
+            for start, end, group_text in groups:
+                group_answers = [
+                    f"{number} {answers[number]}" for number in range(start, end + 1) if number in answers
+                ]
+                yield {
+                    "category": "reading",
+                    "question_type": detect_question_type(group_text[:400]),
+                    "difficulty": "medium",
+                    "title": f"{title} (Questions {start}-{end})"[:200],
+                    "passage": passage,
+                    "content": group_text,
+                    "answer": "\n".join(group_answers),
+                    "source": f"{source} Test {test_no}"[:100],
+                }
@@ -6,19 +6,44 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 
 from app.config import get_settings
-from app.database import init_db
+from app.database import engine, init_db
+from app.migrations import run_migrations
 from app.routers import auth, questions, practice, analysis, vocabulary, chat, ui
-from app.seed_data import seed_database
+from app.routers.auth import user_cache_stats
+from app.routers.ui import build_ui_payloads
+from app.seed_data import ensure_demo_user, seed_database
+from app.services.ai_service import init_http_client, close_http_client
+from app.services.analysis_cache import analysis_cache
+from app.services.analysis_queue import analysis_queue
+from app.services.learning_rollups import summary_cache_stats
+from app.services.learning_stats import stats_cache_stats
+from app.services.question_catalog import question_catalog
+from app.services.recommender import recommender
+from app.services.reports import report_scheduler
+from app.services.similar_pool import similar_pool
+from app.services.skill_radar import skill_cache_stats
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     """应用生命周期管理"""
-    # 启动时：初始化数据库并填充示例数据
+    # 启动时：初始化数据库、补齐迁移并填充示例数据
     init_db()
+    if settings.auto_migrate:
+        run_migrations(engine)
+    ensure_demo_user()
     seed_database()
+    build_ui_payloads()
+    question_catalog.preload()
+    await init_http_client()
+    await analysis_queue.start()
+    await report_scheduler.start()
     yield
-    # 关闭时：清理资源（如需要）
+    # 关闭时：停止分析队列、报告调度和相似题补充（未完成的工作之后会补齐），释放 DeepSeek 连接池
+    await report_scheduler.stop()
+    await analysis_queue.stop()
+    await similar_pool.stop()
+    await close_http_client()
 
 
 # 创建 FastAPI 应用
@@ -55,6 +80,21 @@ async def health_check():
     return {"status": "ok", "message": "LumiAI Backend is running"}
 
 
+@app.get("/api/metrics")
+async def metrics():
+    """运行指标（缓存命中率等，按进程统计）"""
+    return {
+        "analysis_cache": analysis_cache.stats(),
+        "user_cache": user_cache_stats(),
+        "stats_cache": stats_cache_stats(),
+        "rollup_cache": summary_cache_stats(),
+        "skill_cache": skill_cache_stats(),
+        "recommender": recommender.stats(),
+        "report_scheduler": report_scheduler.stats(),
+        "similar_pool": similar_pool.stats(),
+    }
+
+
 @app.get("/")
 async def root():
     """根路径"""
@@ -0,0 +1,151 @@
+"""
+LumiAI - 数据库迁移
+
+init_db 的 create_all 只会创建缺失的表，无法修改已存在的 lumiai.db。
+结构变更（新增索引、列等）以编号迁移的形式放在本包中，
+已执行的版本记录在 schema_migrations 表里，启动时或通过命令行按顺序补齐：
+
+    python -m app.migrations            # 执行全部未应用的迁移
+    python -m app.migrations status     # 查看迁移状态
+
+每个迁移都应当是幂等的（IF NOT EXISTS / 先检查列是否存在），
+这样新库经 create_all 建好完整结构后再执行迁移也不会出错。
+多个 worker 同时启动时，迁移在数据库锁内逐个执行（SQLite 为 BEGIN IMMEDIATE 写锁，
+PostgreSQL 为事务级 advisory lock），取得锁后重新读取已执行的版本，后到的进程会直接跳过。
+"""
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Iterator, List, Set
+
+from sqlalchemy import inspect, text
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.exc import OperationalError
+
+VERSION_TABLE_DDL = (
+    "CREATE TABLE IF NOT EXISTS schema_migrations ("
+    "version INTEGER PRIMARY KEY, "
+    "description VARCHAR(200), "
+    "applied_at TIMESTAMP"
+    ")"
+)
+
+# pg_advisory_xact_lock 的键（任意固定值，仅用于迁移）
+ADVISORY_LOCK_KEY = 720_514_001
+# SQLite 等待其他进程释放写锁的最长时间（秒），每次尝试另有 busy_timeout 的等待
+SQLITE_LOCK_TIMEOUT = 600.0
+
+
+def _ensure_version_table(engine: Engine) -> None:
+    with engine.begin() as conn:
+        conn.execute(text(VERSION_TABLE_DDL))
+
+
+def _versions(conn: Connection) -> Set[int]:
+    return {row[0] for row in conn.execute(text("SELECT version FROM schema_migrations"))}
+
+
+def applied_versions(engine: Engine) -> List[int]:
+    """已执行的迁移版本号"""
+    _ensure_version_table(engine)
+    with engine.connect() as conn:
+        rows = conn.execute(text("SELECT version FROM schema_migrations ORDER BY version"))
+        return [row[0] for row in rows]
+
+
+def _begin_immediate(conn: Connection) -> None:
+    deadline = time.monotonic() + SQLITE_LOCK_TIMEOUT
+    while True:
+        try:
+            conn.exec_driver_sql("BEGIN IMMEDIATE")
+            return
+        except OperationalError as e:
+            if "locked" not in str(e) or time.monotonic() > deadline:
+                raise
+            time.sleep(0.5)
+
+
+@contextmanager
+def _migration_lock(engine: Engine) -> Iterator[Connection]:
+    """在持有迁移锁的事务中执行，正常退出时提交"""
+    if engine.dialect.name == "sqlite":
+        # 驱动层自动提交，事务由这里显式开始，才能使用 BEGIN IMMEDIATE 在开始时就取得写锁
+        with engine.connect().execution_options(isolation_level="AUTOCOMMIT") as conn:
+            _begin_immediate(conn)
+            try:
+                yield conn
+            except BaseException:
+                conn.exec_driver_sql("ROLLBACK")
+                raise
+            conn.exec_driver_sql("COMMIT")
+        return
+
+    with engine.begin() as conn:
+        if engine.dialect.name == "postgresql":
+            # 等锁和较慢的回填不受 db_statement_timeout 限制
+            conn.execute(text("SET LOCAL statement_timeout = 0"))
+            conn.execute(text("SELECT pg_advisory_xact_lock(:key)"), {"key": ADVISORY_LOCK_KEY})
+        yield conn
+
+
+def run_migrations(engine: Engine) -> List[int]:
+    """执行所有未应用的迁移，返回本次执行的版本号"""
+    with _migration_lock(engine) as conn:
+        conn.execute(text(VERSION_TABLE_DDL))
+        done = _versions(conn)
+
+    executed = []
+    for migration in MIGRATIONS:
+        if migration.version in done:
+            continue
+        with _migration_lock(engine) as conn:
+            # 等锁期间其他进程可能已执行完同一迁移
+            if migration.version in _versions(conn):
+                continue
+            migration.upgrade(conn)
+            conn.execute(
+                text(
+                    "INSERT INTO schema_migrations (version, description, applied_at) "
+                    "VALUES (:version, :description, :applied_at)"
+                ),
+                {
+                    "version": migration.version,
+                    "description": migration.description,
+                    "applied_at": datetime.utcnow(),
+                },
+            )
+        print(f"已应用数据库迁移 {migration.version:04d}: {migration.description}")
+        executed.append(migration.version)
+    return executed
+
+
+def column_exists(conn: Connection, table: str, column: str) -> bool:
+    """迁移辅助：判断列是否已存在"""
+    return any(c["name"] == column for c in inspect(conn).get_columns(table))
+
+
+# 迁移模块会引用上面的辅助函数，因此放在末尾导入
+from app.migrations import (  # noqa: E402
+    m0001_hot_query_indexes,
+    m0002_question_fulltext,
+    m0003_question_content_hash,
+    m0004_vocabulary_srs,
+    m0005_learning_rollups,
+    m0006_learning_report_period_index,
+    m0007_question_fulltext_cjk,
+    m0008_vocabulary_unique_word,
+    m0009_learning_report_scores,
+)
+
+# 按版本号顺序排列
+MIGRATIONS = [
+    m0001_hot_query_indexes,
+    m0002_question_fulltext,
+    m0003_question_content_hash,
+    m0004_vocabulary_srs,
+    m0005_learning_rollups,
+    m0006_learning_report_period_index,
+    m0007_question_fulltext_cjk,
+    m0008_vocabulary_unique_word,
+    m0009_learning_report_scores,
+]
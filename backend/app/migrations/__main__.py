@@ -0,0 +1,34 @@
+"""
+LumiAI - 数据库迁移命令行
+
+    python -m app.migrations [upgrade|status]
+"""
+import sys
+
+from app.database import engine, init_db
+from app.migrations import MIGRATIONS, applied_versions, run_migrations
+
+
+def main(argv: list[str]) -> int:
+    command = argv[0] if argv else "upgrade"
+
+    if command == "upgrade":
+        init_db()
+        executed = run_migrations(engine)
+        if not executed:
+            print("数据库已是最新版本")
+        return 0
+
+    if command == "status":
+        done = set(applied_versions(engine))
+        for migration in MIGRATIONS:
+            mark = "x" if migration.version in done else " "
+            print(f"[{mark}] {migration.version:04d} {migration.description}")
+        return 0
+
+    print(f"未知命令: {command}（可用: upgrade, status）")
+    return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
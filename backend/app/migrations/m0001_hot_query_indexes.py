@@ -0,0 +1,28 @@
+"""
+0001 - 高频按用户查询的复合索引
+
+让以下查询直接按索引顺序取前 N 条，不再对用户的全部行排序：
+- /api/analysis/errors        practice_answers (user_id, is_correct, created_at)
+- /api/chat 上下文             chat_history (user_id, created_at)
+- 添加生词查重                  vocabulary (user_id, word)
+- 生词本列表                    vocabulary (user_id, created_at)
+- /api/practice/history       practice_sessions (user_id, started_at)
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 1
+description = "hot per-user composite indexes"
+
+INDEXES = [
+    ("ix_practice_answers_user_correct_created", "practice_answers", "user_id, is_correct, created_at"),
+    ("ix_chat_history_user_created", "chat_history", "user_id, created_at"),
+    ("ix_vocabulary_user_word", "vocabulary", "user_id, word"),
+    ("ix_vocabulary_user_created", "vocabulary", "user_id, created_at"),
+    ("ix_practice_sessions_user_started", "practice_sessions", "user_id, started_at"),
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for name, table, columns in INDEXES:
+        conn.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})"))
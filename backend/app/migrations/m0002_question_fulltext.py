@@ -0,0 +1,52 @@
+"""
+0002 - 题库全文索引
+
+- SQLite：FTS5 外部内容表 questions_fts（porter 词干），由触发器与 questions 同步，
+  迁移时用 rebuild 为已有题目建立索引
+- PostgreSQL：在加权 tsvector 表达式上建立 GIN 索引，
+  查询必须使用与索引完全相同的表达式（QUESTION_TSVECTOR）才能命中
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 2
+description = "question full-text search index"
+
+# 标题权重最高，其次是技能标签和题干，文章原文最低
+QUESTION_TSVECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(skill_tags, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(content, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(passage, '')), 'C')"
+)
+
+SQLITE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS questions_fts USING fts5("
+    "title, passage, content, skill_tags, "
+    "content='questions', content_rowid='id', "
+    "tokenize='porter unicode61 remove_diacritics 2')",
+    "CREATE TRIGGER IF NOT EXISTS questions_fts_ai AFTER INSERT ON questions BEGIN "
+    "INSERT INTO questions_fts(rowid, title, passage, content, skill_tags) "
+    "VALUES (new.id, new.title, new.passage, new.content, new.skill_tags); END",
+    "CREATE TRIGGER IF NOT EXISTS questions_fts_ad AFTER DELETE ON questions BEGIN "
+    "INSERT INTO questions_fts(questions_fts, rowid, title, passage, content, skill_tags) "
+    "VALUES ('delete', old.id, old.title, old.passage, old.content, old.skill_tags); END",
+    "CREATE TRIGGER IF NOT EXISTS questions_fts_au AFTER UPDATE ON questions BEGIN "
+    "INSERT INTO questions_fts(questions_fts, rowid, title, passage, content, skill_tags) "
+    "VALUES ('delete', old.id, old.title, old.passage, old.content, old.skill_tags); "
+    "INSERT INTO questions_fts(rowid, title, passage, content, skill_tags) "
+    "VALUES (new.id, new.title, new.passage, new.content, new.skill_tags); END",
+    "INSERT INTO questions_fts(questions_fts) VALUES ('rebuild')",
+]
+
+
+def upgrade(conn: Connection) -> None:
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        for statement in SQLITE_STATEMENTS:
+            conn.execute(text(statement))
+    elif dialect == "postgresql":
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_questions_fulltext "
+            f"ON questions USING GIN (({QUESTION_TSVECTOR}))"
+        ))
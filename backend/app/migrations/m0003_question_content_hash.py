@@ -0,0 +1,23 @@
+"""
+0003 - 题目导入去重键
+
+questions 新增 content_hash 列，并在 (source, title, content_hash) 上建唯一索引，
+批量导入用 ON CONFLICT DO NOTHING 跳过已导入的题目。
+已有题目的 content_hash 为 NULL，不参与唯一约束。
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.migrations import column_exists
+
+version = 3
+description = "question content hash for import dedup"
+
+
+def upgrade(conn: Connection) -> None:
+    if not column_exists(conn, "questions", "content_hash"):
+        conn.execute(text("ALTER TABLE questions ADD COLUMN content_hash VARCHAR(64)"))
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_questions_source_title_hash "
+        "ON questions (source, title, content_hash)"
+    ))
@@ -0,0 +1,32 @@
+"""
+0004 - 生词本间隔重复调度
+
+vocabulary 新增 ease_factor / interval_days / repetitions / due_at 列，
+已有生词视为从添加时起即到期；(user_id, due_at) 索引支撑到期队列查询。
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.migrations import column_exists
+
+version = 4
+description = "vocabulary spaced-repetition columns and due index"
+
+COLUMNS = [
+    ("ease_factor", "FLOAT DEFAULT 2.5"),
+    ("interval_days", "FLOAT DEFAULT 0"),
+    ("repetitions", "INTEGER DEFAULT 0"),
+    ("due_at", "TIMESTAMP"),
+]
+
+
+def upgrade(conn: Connection) -> None:
+    for name, ddl in COLUMNS:
+        if not column_exists(conn, "vocabulary", name):
+            conn.execute(text(f"ALTER TABLE vocabulary ADD COLUMN {name} {ddl}"))
+    conn.execute(text(
+        "UPDATE vocabulary SET due_at = COALESCE(created_at, CURRENT_TIMESTAMP) WHERE due_at IS NULL"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_vocabulary_user_due ON vocabulary (user_id, due_at)"
+    ))
@@ -0,0 +1,63 @@
+"""
+0005 - 学情汇总表
+
+创建 learning_rollups 表（新库由 create_all 创建，这里 IF NOT EXISTS），并用已有答题记录回填一次；
+表中已有数据时跳过，之后由提交答案和 AI 分析增量维护。
+表结构和回填语句按本迁移编写时的模型固定下来，不引用会继续演进的模型和服务代码。
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 5
+description = "learning rollups backfill"
+
+TABLE_DDL = """
+CREATE TABLE IF NOT EXISTS learning_rollups (
+    id {id_type} PRIMARY KEY,
+    user_id INTEGER NOT NULL REFERENCES users (id),
+    category VARCHAR(20) NOT NULL,
+    question_type VARCHAR(30) NOT NULL,
+    error_type VARCHAR(50) NOT NULL,
+    day DATE NOT NULL,
+    answer_count INTEGER,
+    correct_count INTEGER
+)
+"""
+
+INDEXES = [
+    "CREATE INDEX IF NOT EXISTS ix_learning_rollups_id ON learning_rollups (id)",
+    "CREATE UNIQUE INDEX IF NOT EXISTS uq_learning_rollups_bucket "
+    "ON learning_rollups (user_id, category, question_type, error_type, day)",
+]
+
+# 答对记为 none，未分析的错误答案记为 pending；按输出列别名分组
+BACKFILL = """
+INSERT INTO learning_rollups
+    (user_id, category, question_type, error_type, day, answer_count, correct_count)
+SELECT
+    a.user_id,
+    q.category,
+    q.question_type,
+    CASE WHEN COALESCE(a.is_correct, FALSE) THEN 'none'
+         ELSE COALESCE(a.error_type, 'pending') END AS bucket_error_type,
+    {day} AS bucket_day,
+    COUNT(*),
+    SUM(CASE WHEN COALESCE(a.is_correct, FALSE) THEN 1 ELSE 0 END)
+FROM practice_answers a
+JOIN questions q ON a.question_id = q.id
+GROUP BY a.user_id, q.category, q.question_type, bucket_error_type, bucket_day
+"""
+
+
+def upgrade(conn: Connection) -> None:
+    if conn.dialect.name == "postgresql":
+        id_type, day = "SERIAL", "CAST(a.created_at AS DATE)"
+    else:
+        # SQLite 的 Date 列以 'YYYY-MM-DD' 文本存储，date() 的结果与之一致
+        id_type, day = "INTEGER", "date(a.created_at)"
+
+    conn.execute(text(TABLE_DDL.format(id_type=id_type)))
+    for statement in INDEXES:
+        conn.execute(text(statement))
+    if conn.execute(text("SELECT 1 FROM learning_rollups LIMIT 1")).first() is None:
+        conn.execute(text(BACKFILL.format(day=day)))
@@ -0,0 +1,18 @@
+"""
+0006 - 学情报告周期唯一索引
+
+定时生成报告时按 (user_id, report_type, period_start) 去重（ON CONFLICT DO NOTHING），
+读取最新报告也走这个索引。
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 6
+description = "learning report per-period unique index"
+
+
+def upgrade(conn: Connection) -> None:
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_learning_reports_user_type_period "
+        "ON learning_reports (user_id, report_type, period_start)"
+    ))
@@ -0,0 +1,83 @@
+"""
+0007 - 中文技能标签 / 标题的全文检索
+
+- skill_tags 以前用 json.dumps 的默认 ensure_ascii 写入，中文被转义成 \\uXXXX，
+  全文索引里只有转义序列，搜索"阅读理解"永远匹配不到：改写为原始中文（0002 的同步触发器随之更新索引）
+- 中文没有空格，unicode61 / to_tsvector 会把一整段中文当作一个词，"理解"匹配不到"阅读理解"：
+  - SQLite：为标题和技能标签另建 trigram 分词的 FTS5 表 questions_cjk_fts（需要 SQLite 3.34+），按子串匹配
+  - PostgreSQL：在标题 + 技能标签上建立 pg_trgm 的 GIN 索引，供 ILIKE 子串匹配使用；
+    无权创建扩展时跳过索引，查询结果不变，只是不走索引
+"""
+import json
+
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.exc import DBAPIError
+
+version = 7
+description = "unescaped skill tags and CJK substring search"
+
+# PostgreSQL 中文子串匹配的表达式，查询必须使用完全相同的表达式才能命中索引
+QUESTION_CJK_TEXT = "coalesce(title, '') || ' ' || coalesce(skill_tags, '')"
+
+SQLITE_STATEMENTS = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS questions_cjk_fts USING fts5("
+    "title, skill_tags, content='questions', content_rowid='id', tokenize='trigram')",
+    "CREATE TRIGGER IF NOT EXISTS questions_cjk_fts_ai AFTER INSERT ON questions BEGIN "
+    "INSERT INTO questions_cjk_fts(rowid, title, skill_tags) "
+    "VALUES (new.id, new.title, new.skill_tags); END",
+    "CREATE TRIGGER IF NOT EXISTS questions_cjk_fts_ad AFTER DELETE ON questions BEGIN "
+    "INSERT INTO questions_cjk_fts(questions_cjk_fts, rowid, title, skill_tags) "
+    "VALUES ('delete', old.id, old.title, old.skill_tags); END",
+    "CREATE TRIGGER IF NOT EXISTS questions_cjk_fts_au AFTER UPDATE OF title, skill_tags ON questions BEGIN "
+    "INSERT INTO questions_cjk_fts(questions_cjk_fts, rowid, title, skill_tags) "
+    "VALUES ('delete', old.id, old.title, old.skill_tags); "
+    "INSERT INTO questions_cjk_fts(rowid, title, skill_tags) "
+    "VALUES (new.id, new.title, new.skill_tags); END",
+    "INSERT INTO questions_cjk_fts(questions_cjk_fts) VALUES ('rebuild')",
+]
+
+
+def _unescape_skill_tags(conn: Connection) -> None:
+    rows = conn.execute(
+        text("SELECT id, skill_tags FROM questions WHERE skill_tags LIKE :pattern ESCAPE '!'"),
+        {"pattern": "%\\u%"},
+    ).all()
+    updates = []
+    for question_id, skill_tags in rows:
+        try:
+            decoded = json.dumps(json.loads(skill_tags), ensure_ascii=False)
+        except ValueError:
+            continue
+        if decoded != skill_tags:
+            updates.append({"id": question_id, "skill_tags": decoded})
+    if updates:
+        conn.execute(text("UPDATE questions SET skill_tags = :skill_tags WHERE id = :id"), updates)
+
+
+def _sqlite_supports_trigram(conn: Connection) -> bool:
+    sqlite_version = conn.execute(text("SELECT sqlite_version()")).scalar()
+    return tuple(int(part) for part in sqlite_version.split(".")[:2]) >= (3, 34)
+
+
+def upgrade(conn: Connection) -> None:
+    _unescape_skill_tags(conn)
+
+    dialect = conn.dialect.name
+    if dialect == "sqlite":
+        if not _sqlite_supports_trigram(conn):
+            print("SQLite 版本低于 3.34，不支持 trigram 分词，中文搜索只能匹配完整的词")
+            return
+        for statement in SQLITE_STATEMENTS:
+            conn.execute(text(statement))
+    elif dialect == "postgresql":
+        try:
+            with conn.begin_nested():
+                conn.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+        except DBAPIError as e:
+            print(f"无法启用 pg_trgm，跳过中文子串索引: {e}")
+            return
+        conn.execute(text(
+            f"CREATE INDEX IF NOT EXISTS ix_questions_cjk_trgm "
+            f"ON questions USING GIN (({QUESTION_CJK_TEXT}) gin_trgm_ops)"
+        ))
@@ -0,0 +1,34 @@
+"""
+0008 - 生词本 (user_id, word) 唯一索引
+
+添加生词改为 INSERT ... ON CONFLICT DO NOTHING，由数据库保证同一用户的单词不重复。
+建立唯一索引前先删除已有的重复行：每组保留复习次数最多的一条（相同时保留最早添加的），
+原来的非唯一索引 ix_vocabulary_user_word 被唯一索引取代，一并删除。
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+version = 8
+description = "vocabulary unique (user_id, word)"
+
+DEDUPE = """
+DELETE FROM vocabulary WHERE id IN (
+    SELECT id FROM (
+        SELECT id, ROW_NUMBER() OVER (
+            PARTITION BY user_id, word ORDER BY COALESCE(review_count, 0) DESC, id
+        ) AS position
+        FROM vocabulary
+    ) ranked
+    WHERE position > 1
+)
+"""
+
+
+def upgrade(conn: Connection) -> None:
+    removed = conn.execute(text(DEDUPE)).rowcount
+    if removed:
+        print(f"已删除重复的生词 {removed} 条")
+    conn.execute(text(
+        "CREATE UNIQUE INDEX IF NOT EXISTS uq_vocabulary_user_word ON vocabulary (user_id, word)"
+    ))
+    conn.execute(text("DROP INDEX IF EXISTS ix_vocabulary_user_word"))
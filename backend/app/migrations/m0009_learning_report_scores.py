@@ -0,0 +1,52 @@
+"""
+0009 - 学情报告的写作 / 口语分数与 AI 建议重试
+
+- writing_score / speaking_score 此前写入的是正确率（百分比），与分数含义不同：
+  改为浮点列，按周期内写作 / 口语会话的平均预估分数重新计算，没有评分的会话时为空
+- 新增 ai_status / ai_attempted_at：生成 AI 建议失败的报告保持 pending，由调度器下次检查时重试；
+  已有的尚无建议的周报、月报标记为 pending（只有仍在补齐范围内的周期会被重试）
+"""
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+
+from app.migrations import column_exists
+
+version = 9
+description = "learning report band scores and AI suggestion retry"
+
+COLUMNS = [
+    ("ai_status", "VARCHAR(20)"),
+    ("ai_attempted_at", "TIMESTAMP"),
+]
+
+BAND_SCORE = (
+    "(SELECT ROUND(CAST(AVG(s.score) AS NUMERIC), 1) FROM practice_sessions s "
+    "WHERE s.user_id = learning_reports.user_id AND s.category = '{category}' "
+    "AND s.score IS NOT NULL "
+    "AND s.started_at >= learning_reports.period_start AND s.started_at < learning_reports.period_end)"
+)
+
+
+def upgrade(conn: Connection) -> None:
+    for name, ddl in COLUMNS:
+        if not column_exists(conn, "learning_reports", name):
+            conn.execute(text(f"ALTER TABLE learning_reports ADD COLUMN {name} {ddl}"))
+    if conn.dialect.name == "postgresql":
+        # SQLite 的列类型只是亲和性，INTEGER 列可以直接保存小数
+        conn.execute(text(
+            "ALTER TABLE learning_reports "
+            "ALTER COLUMN writing_score TYPE DOUBLE PRECISION, "
+            "ALTER COLUMN speaking_score TYPE DOUBLE PRECISION"
+        ))
+    conn.execute(text(
+        f"UPDATE learning_reports SET writing_score = {BAND_SCORE.format(category='writing')}, "
+        f"speaking_score = {BAND_SCORE.format(category='speaking')}"
+    ))
+    conn.execute(text(
+        "UPDATE learning_reports SET ai_status = 'pending' "
+        "WHERE ai_status IS NULL AND ai_suggestions IS NULL AND report_type IN ('weekly', 'monthly')"
+    ))
+    conn.execute(text(
+        "CREATE INDEX IF NOT EXISTS ix_learning_reports_ai_status "
+        "ON learning_reports (report_type, period_start, ai_status)"
+    ))
@@ -2,7 +2,7 @@
 LumiAI - 练习记录模型
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, Float
+from sqlalchemy import Column, Integer, String, Text, Date, DateTime, Boolean, ForeignKey, Float, Index
 from sqlalchemy.orm import relationship
 from app.database import Base
 
@@ -29,6 +29,10 @@ class PracticeSession(Base):
     
     # 关联
     answers = relationship("PracticeAnswer", back_populates="session")
+    
+    __table_args__ = (
+        Index("ix_practice_sessions_user_started", "user_id", "started_at"),
+    )
 
 
 class PracticeAnswer(Base):
@@ -53,3 +57,95 @@ class PracticeAnswer(Base):
     
     # 关联
     session = relationship("PracticeSession", back_populates="answers")
+    
+    __table_args__ = (
+        Index("ix_practice_answers_user_correct_created", "user_id", "is_correct", "created_at"),
+    )
+
+
+class AnalysisJob(Base):
+    """AI 错误分析任务表（持久化队列，重启后可恢复）"""
+    __tablename__ = "analysis_jobs"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    answer_id = Column(Integer, ForeignKey("practice_answers.id"), nullable=False, unique=True, index=True)
+    
+    # 任务状态：pending/running/done/failed
+    status = Column(String(20), nullable=False, default="pending", index=True)
+    attempts = Column(Integer, default=0)               # 已尝试次数
+    last_error = Column(Text, nullable=True)            # 最近一次失败原因
+    
+    next_run_at = Column(DateTime, default=datetime.utcnow)  # 下次可执行时间（重试退避）
+    created_at = Column(DateTime, default=datetime.utcnow)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+
+class AnalysisCacheEntry(Base):
+    """错误分析结果缓存表（按题目 + 正确答案 + 归一化学生答案寻址）"""
+    __tablename__ = "analysis_cache"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    cache_key = Column(String(64), nullable=False, unique=True, index=True)  # sha256
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False, index=True)
+    
+    error_type = Column(String(50), nullable=True)
+    ai_analysis = Column(Text, nullable=True)
+    ai_correction = Column(Text, nullable=True)
+    
+    hit_count = Column(Integer, default=0)
+    created_at = Column(DateTime, default=datetime.utcnow)
+    expires_at = Column(DateTime, nullable=False, index=True)
+
+
+class LearningRollup(Base):
+    """学情汇总表：按 (用户, 类别, 题型, 错误类型, 日期) 累计答题数，提交答案时增量更新"""
+    __tablename__ = "learning_rollups"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    
+    category = Column(String(20), nullable=False)
+    question_type = Column(String(30), nullable=False)
+    error_type = Column(String(50), nullable=False)     # none（答对）/ pending（待分析）/ grammar 等
+    day = Column(Date, nullable=False)                  # 答题日期（UTC）
+    
+    answer_count = Column(Integer, default=0)
+    correct_count = Column(Integer, default=0)
+    
+    __table_args__ = (
+        Index(
+            "uq_learning_rollups_bucket",
+            "user_id", "category", "question_type", "error_type", "day",
+            unique=True,
+        ),
+    )
+
+
+class SimilarQuestion(Base):
+    """相似题池：按 (原题, 错误类型) 保存 AI 生成的练习题，供多个用户复用"""
+    __tablename__ = "similar_questions"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    question_id = Column(Integer, ForeignKey("questions.id"), nullable=False)
+    error_type = Column(String(50), nullable=False)
+    
+    content = Column(Text, nullable=False)              # 生成的题目（含提示，不含答案）
+    created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_similar_questions_question_error", "question_id", "error_type", "id"),
+    )
+
+
+class SimilarQuestionSeen(Base):
+    """用户已看过的相似题，避免重复推送"""
+    __tablename__ = "similar_question_seen"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    similar_question_id = Column(Integer, ForeignKey("similar_questions.id"), nullable=False)
+    seen_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("uq_similar_question_seen_user_item", "user_id", "similar_question_id", unique=True),
+    )
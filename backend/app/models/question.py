@@ -2,7 +2,7 @@
 LumiAI - 题目模型
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Enum, Index
 from app.database import Base
 import enum
 
@@ -57,4 +57,11 @@ class Question(Base):
     # 技能标签
     skill_tags = Column(Text, nullable=True)            # 技能标签（JSON 格式）
     
+    # 批量导入去重：sha256(passage + content)，与 source、title 组成唯一键
+    content_hash = Column(String(64), nullable=True)
+    
     created_at = Column(DateTime, default=datetime.utcnow)
+
+    __table_args__ = (
+        Index("uq_questions_source_title_hash", "source", "title", "content_hash", unique=True),
+    )
@@ -2,7 +2,7 @@
 LumiAI - 学情报告模型
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, JSON
+from sqlalchemy import Column, Integer, Float, String, Text, DateTime, ForeignKey, JSON, Index
 from app.database import Base
 
 
@@ -30,13 +30,22 @@ class LearningReport(Base):
     # 正确率统计
     listening_accuracy = Column(Integer, default=0)     # 百分比
     reading_accuracy = Column(Integer, default=0)
-    writing_score = Column(Integer, default=0)
-    speaking_score = Column(Integer, default=0)
+    writing_score = Column(Float, nullable=True)        # 周期内写作 / 口语会话的平均预估分数（0-9），无评分时为空
+    speaking_score = Column(Float, nullable=True)
     
     # AI 建议
     ai_suggestions = Column(Text, nullable=True)
+    ai_status = Column(String(20), nullable=True)       # pending（待生成，失败后重试）/ done；不需要建议时为空
+    ai_attempted_at = Column(DateTime, nullable=True)   # 最近一次开始生成建议的时间
     
     generated_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        # 每个用户每个周期只有一份报告；同时支撑"最新报告"和报告列表查询
+        Index("uq_learning_reports_user_type_period", "user_id", "report_type", "period_start", unique=True),
+        # 调度器按周期查找待重试 AI 建议的报告
+        Index("ix_learning_reports_ai_status", "report_type", "period_start", "ai_status"),
+    )
 
 
 class ChatHistory(Base):
@@ -50,3 +59,7 @@ class ChatHistory(Base):
     content = Column(Text, nullable=False)
     
     created_at = Column(DateTime, default=datetime.utcnow)
+    
+    __table_args__ = (
+        Index("ix_chat_history_user_created", "user_id", "created_at"),
+    )
@@ -2,7 +2,7 @@
 LumiAI - 生词本模型
 """
 from datetime import datetime
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, Text, DateTime, Float, ForeignKey, Index
 from app.database import Base
 
 
@@ -28,5 +28,17 @@ class Vocabulary(Base):
     mastery_level = Column(Integer, default=0)          # 掌握程度 0-5
     review_count = Column(Integer, default=0)           # 复习次数
     
+    # 间隔重复调度（SM-2，见 services/srs.py）
+    ease_factor = Column(Float, default=2.5)            # 难度系数
+    interval_days = Column(Float, default=0.0)          # 当前复习间隔（天）
+    repetitions = Column(Integer, default=0)            # 连续答对次数
+    due_at = Column(DateTime, default=datetime.utcnow)  # 下次复习时间，新词立即到期
+    
     created_at = Column(DateTime, default=datetime.utcnow)
     last_reviewed_at = Column(DateTime, nullable=True)
+    
+    __table_args__ = (
+        Index("uq_vocabulary_user_word", "user_id", "word", unique=True),
+        Index("ix_vocabulary_user_created", "user_id", "created_at"),
+        Index("ix_vocabulary_user_due", "user_id", "due_at"),
+    )
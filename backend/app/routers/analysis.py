@@ -1,28 +1,33 @@
 """
 LumiAI - 分析路由
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from sqlalchemy import func, desc
-from typing import List
-from datetime import datetime, timedelta
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, desc, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import List, Literal, Optional
+from datetime import date, datetime, timedelta
 
 from app.database import get_db
-from app.models.user import User
 from app.models.question import Question
-from app.models.practice import PracticeSession, PracticeAnswer
-from app.routers.auth import get_current_user
+from app.models.practice import PracticeAnswer
+from app.models.report import LearningReport
+from app.routers.auth import CurrentUser, get_current_user
 from app.schemas.analysis import (
     ErrorRecord,
     SkillRadarData,
-    SkillScore,
     LearningStats,
-    TimeStats,
-    AccuracyStats,
+    LearningBreakdown,
+    AccuracyBucket,
+    ErrorTypeCount,
     RecommendationItem,
-    AIImprovement
+    AIImprovement,
+    LearningReportResponse,
+    LearningReportListResponse
 )
-from app.services.ai_service import generate_similar_question
+from app.services import learning_rollups, learning_stats, skill_radar
+from app.services.pagination import after_key, decode_cursor, paginate
+from app.services.recommender import recommender
+from app.services.similar_pool import similar_pool
 
 router = APIRouter()
 
@@ -30,17 +35,19 @@ router = APIRouter()
 @router.get("/errors", response_model=List[ErrorRecord])
 async def get_errors(
     limit: int = 10,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """获取错题列表"""
     # 查询错误答案并关联题目信息
-    errors = db.query(PracticeAnswer, Question).join(
-        Question, PracticeAnswer.question_id == Question.id
-    ).filter(
-        PracticeAnswer.user_id == current_user.id,
-        PracticeAnswer.is_correct == False
-    ).order_by(desc(PracticeAnswer.created_at)).limit(limit).all()
+    errors = (await db.execute(
+        select(PracticeAnswer, Question).join(
+            Question, PracticeAnswer.question_id == Question.id
+        ).where(
+            PracticeAnswer.user_id == current_user.id,
+            PracticeAnswer.is_correct == False
+        ).order_by(desc(PracticeAnswer.created_at)).limit(limit)
+    )).all()
     
     result = []
     for answer, question in errors:
@@ -64,19 +71,19 @@ async def get_errors(
 @router.get("/errors/{error_id}")
 async def get_error_detail(
     error_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """获取错题详情"""
-    answer = db.query(PracticeAnswer).filter(
+    answer = await db.scalar(select(PracticeAnswer).where(
         PracticeAnswer.id == error_id,
         PracticeAnswer.user_id == current_user.id
-    ).first()
+    ))
     
     if not answer:
         raise HTTPException(status_code=404, detail="错题记录不存在")
     
-    question = db.query(Question).filter(Question.id == answer.question_id).first()
+    question = await db.get(Question, answer.question_id)
     
     return {
         "id": answer.id,
@@ -100,146 +107,164 @@ async def get_error_detail(
 @router.post("/errors/{error_id}/generate-similar")
 async def generate_similar(
     error_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """生成相似题目"""
-    answer = db.query(PracticeAnswer).filter(
+    """生成相似题目（优先从相似题池中取当前用户没看过的题）"""
+    answer = await db.scalar(select(PracticeAnswer).where(
         PracticeAnswer.id == error_id,
         PracticeAnswer.user_id == current_user.id
-    ).first()
+    ))
     
     if not answer:
         raise HTTPException(status_code=404, detail="错题记录不存在")
     
-    question = db.query(Question).filter(Question.id == answer.question_id).first()
+    question = await db.get(Question, answer.question_id)
     
     try:
-        similar = await generate_similar_question(
-            original_question=question.content,
-            error_type=answer.error_type or "unknown"
+        similar_id, similar, from_pool = await similar_pool.take(
+            db, current_user.id, question, answer.error_type or "unknown"
         )
-        return {"similar_question": similar}
+        return {"similar_question": similar, "similar_id": similar_id, "from_pool": from_pool}
     except Exception as e:
         return {"similar_question": f"生成失败: {str(e)}"}
 
 
 @router.get("/skills", response_model=SkillRadarData)
 async def get_skill_scores(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取技能雷达图数据"""
-    # 基于答题记录计算各项技能得分
-    # 这里用模拟数据，实际应根据错误类型统计
-    skills = [
-        SkillScore(name="Vocabulary", name_cn="词汇", score=120, full_mark=150),
-        SkillScore(name="Grammar", name_cn="语法", score=98, full_mark=150),
-        SkillScore(name="Logic", name_cn="逻辑", score=86, full_mark=150),
-        SkillScore(name="Pronunciation", name_cn="发音", score=99, full_mark=150),
-        SkillScore(name="Fluency", name_cn="流利度", score=85, full_mark=150),
-        SkillScore(name="Coherence", name_cn="连贯性", score=65, full_mark=150),
-    ]
-    
-    return SkillRadarData(skills=skills)
+    """获取技能雷达图数据（按错误类型分布和练习得分计算，按用户缓存）"""
+    return await skill_radar.get_skill_radar(db, current_user.id)
 
 
 @router.get("/stats", response_model=LearningStats)
 async def get_learning_stats(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    start_date: Optional[date] = Query(None, description="起始日期（含），按 UTC 计算"),
+    end_date: Optional[date] = Query(None, description="结束日期（含），按 UTC 计算"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取学习统计数据"""
-    # 计算各类别学习时长
-    sessions = db.query(PracticeSession).filter(
-        PracticeSession.user_id == current_user.id
-    ).all()
-    
-    time_by_category = {"listening": 0, "reading": 0, "writing": 0, "speaking": 0}
-    correct_by_category = {"listening": 0, "reading": 0, "writing": 0, "speaking": 0}
-    total_by_category = {"listening": 0, "reading": 0, "writing": 0, "speaking": 0}
-    
-    for session in sessions:
-        cat = session.category
-        if cat in time_by_category:
-            time_by_category[cat] += session.time_spent_seconds / 3600  # 转换为小时
-            correct_by_category[cat] += session.correct_count
-            total_by_category[cat] += session.total_questions
+    """获取学习统计数据（数据库聚合，按用户缓存）"""
+    if start_date and end_date and start_date > end_date:
+        raise HTTPException(status_code=400, detail="起始日期不能晚于结束日期")
     
-    time_stats = [
-        TimeStats(category="Listening", hours=round(time_by_category.get("listening", 12.5), 1)),
-        TimeStats(category="Reading", hours=round(time_by_category.get("reading", 15.2), 1)),
-        TimeStats(category="Writing", hours=round(time_by_category.get("writing", 8.4), 1)),
-        TimeStats(category="Speaking", hours=round(time_by_category.get("speaking", 5.1), 1)),
-    ]
+    return await learning_stats.get_learning_stats(db, current_user.id, start_date, end_date)
+
+
+@router.get("/breakdown", response_model=LearningBreakdown)
+async def get_learning_breakdown(
+    days: Optional[int] = Query(None, ge=1, le=365, description="只统计最近 N 天，默认全部"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """按类别、题型、错误类型的正确率明细（读取学情汇总表）"""
+    since = datetime.utcnow().date() - timedelta(days=days - 1) if days else None
+    summary = await learning_rollups.load_summary(db, current_user.id, since=since)
     
-    # 计算正确率
-    def calc_accuracy(correct, total):
-        if total == 0:
-            return 75  # 默认值
-        return int(correct / total * 100)
+    def buckets(totals):
+        return [
+            AccuracyBucket(
+                name=name,
+                answers=answers,
+                correct=correct,
+                accuracy=int(correct * 100 / answers)
+            )
+            for name, (answers, correct) in sorted(totals.items(), key=lambda item: -item[1][0])
+        ]
     
-    accuracy_stats = [
-        AccuracyStats(category="Listening", accuracy=calc_accuracy(correct_by_category["listening"], total_by_category["listening"]) or 85),
-        AccuracyStats(category="Reading", accuracy=calc_accuracy(correct_by_category["reading"], total_by_category["reading"]) or 78),
-        AccuracyStats(category="Writing", accuracy=calc_accuracy(correct_by_category["writing"], total_by_category["writing"]) or 65),
-        AccuracyStats(category="Speaking", accuracy=calc_accuracy(correct_by_category["speaking"], total_by_category["speaking"]) or 72),
-    ]
+    categories = summary.totals_by("category")
+    return LearningBreakdown(
+        categories=buckets(categories),
+        question_types={
+            category: buckets(summary.totals_by("question_type", category=category))
+            for category in categories
+        },
+        error_types=[
+            ErrorTypeCount(error_type=error_type, count=count)
+            for error_type, count in sorted(summary.error_counts().items(), key=lambda item: -item[1])
+        ],
+        pending_count=summary.pending_count
+    )
+
+
+ReportType = Literal["daily", "weekly", "monthly"]
+
+
+@router.get("/reports", response_model=LearningReportListResponse)
+async def get_reports(
+    report_type: ReportType = "weekly",
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """学情报告列表（最新周期在前，由后台定时生成）"""
+    query = select(LearningReport).where(
+        LearningReport.user_id == current_user.id,
+        LearningReport.report_type == report_type
+    )
+    if cursor:
+        period_start, report_id = decode_cursor(cursor, datetime, int)
+        query = query.where(after_key(LearningReport.period_start, LearningReport.id, period_start, report_id))
     
-    total_practice = sum(s.total_questions for s in sessions)
-    total_correct = sum(s.correct_count for s in sessions)
+    rows = (await db.scalars(
+        query.order_by(LearningReport.period_start.desc(), LearningReport.id.desc()).limit(limit + 1)
+    )).all()
     
-    return LearningStats(
-        time_stats=time_stats,
-        accuracy_stats=accuracy_stats,
-        total_practice_count=total_practice or 156,
-        total_correct_count=total_correct or 118,
-        streak_days=7  # 可以基于日期计算
+    reports, next_cursor = paginate(rows, limit, key=lambda r: (r.period_start, r.id))
+    return {"items": reports, "next_cursor": next_cursor}
+
+
+@router.get("/reports/latest", response_model=LearningReportResponse)
+async def get_latest_report(
+    report_type: ReportType = "weekly",
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """最近一期学情报告"""
+    report = await db.scalar(
+        select(LearningReport).where(
+            LearningReport.user_id == current_user.id,
+            LearningReport.report_type == report_type
+        ).order_by(LearningReport.period_start.desc()).limit(1)
     )
+    if not report:
+        raise HTTPException(status_code=404, detail="暂无学情报告")
+    return report
+
+
+@router.get("/reports/{report_id}", response_model=LearningReportResponse)
+async def get_report(
+    report_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取学情报告详情"""
+    report = await db.scalar(select(LearningReport).where(
+        LearningReport.id == report_id,
+        LearningReport.user_id == current_user.id
+    ))
+    if not report:
+        raise HTTPException(status_code=404, detail="学情报告不存在")
+    return report
 
 
 @router.get("/recommendations", response_model=List[RecommendationItem])
 async def get_recommendations(
-    limit: int = 5,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(5, ge=1, le=20),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取个性化推荐"""
-    # 基于错题类型推荐练习
-    # 这里用模拟数据展示
-    recommendations = [
-        RecommendationItem(
-            id="1",
-            title="高级定语从句应用",
-            category="Writing",
-            duration="15 分钟",
-            difficulty="Hard",
-            reason="基于您近期的语法错误"
-        ),
-        RecommendationItem(
-            id="2",
-            title="Part 2 独白模拟",
-            category="Speaking",
-            duration="10 分钟",
-            difficulty="Medium",
-            reason="提升口语流利度"
-        ),
-        RecommendationItem(
-            id="3",
-            title="学术摘要快速定位",
-            category="Reading",
-            duration="20 分钟",
-            difficulty="Hard",
-            reason="强化阅读逻辑推理"
-        ),
-    ]
-    
-    return recommendations[:limit]
+    """获取个性化推荐（按薄弱题型和常见错误类型从题库中挑选，排除最近做过的题）"""
+    summary = await learning_rollups.load_summary(db, current_user.id)
+    return await recommender.recommend(current_user.id, summary, limit)
 
 
 @router.get("/improvements", response_model=List[AIImprovement])
 async def get_ai_improvements(
-    current_user: User = Depends(get_current_user)
+    current_user: CurrentUser = Depends(get_current_user)
 ):
     """获取 AI 改进建议"""
     improvements = [
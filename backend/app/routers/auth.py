@@ -1,55 +1,111 @@
 """
 LumiAI - 认证路由（简化版，无密码）
 """
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional
+
 from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from app.database import get_db
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import object_session
+from app.config import get_settings
+from app.database import get_db, AsyncSessionLocal
 from app.models.user import User
 from app.schemas.user import UserCreate, UserResponse, UserLogin
+from app.services.cache import TTLCache, invalidate_after_commit
 
 router = APIRouter()
+settings = get_settings()
 
 # 模拟当前用户（Demo 用途）
 DEMO_USER_ID = 1
 
 
-def get_current_user(db: Session = Depends(get_db)) -> User:
-    """获取当前用户（简化版：返回 Demo 用户）"""
-    user = db.query(User).filter(User.id == DEMO_USER_ID).first()
-    if not user:
-        # 自动创建 Demo 用户
-        user = User(id=DEMO_USER_ID, username="Sarah", email="sarah@demo.com", target_score="7.5")
-        db.add(user)
-        db.commit()
-        db.refresh(user)
+@dataclass(frozen=True)
+class CurrentUser:
+    """当前用户的只读快照（不绑定数据库会话，可跨请求缓存）"""
+    id: int
+    username: str
+    email: Optional[str]
+    target_score: Optional[str]
+    created_at: datetime
+
+    @classmethod
+    def from_orm_user(cls, user: User) -> "CurrentUser":
+        return cls(
+            id=user.id,
+            username=user.username,
+            email=user.email,
+            target_score=user.target_score,
+            created_at=user.created_at,
+        )
+
+
+_user_cache = TTLCache(maxsize=settings.user_cache_size, ttl=settings.user_cache_ttl)
+
+
+def invalidate_user(user_id: int) -> None:
+    """用户信息变更后清除缓存的快照"""
+    _user_cache.pop(user_id)
+
+
+def user_cache_stats() -> dict:
+    return _user_cache.stats()
+
+
+@event.listens_for(User, "after_update")
+@event.listens_for(User, "after_delete")
+def _invalidate_on_change(mapper, connection, target: User) -> None:
+    # flush 时触发；提交后再清除，回滚的修改不影响缓存
+    user_id = target.id
+    invalidate_after_commit(object_session(target), ("current_user", user_id),
+                            lambda: invalidate_user(user_id))
+
+
+async def get_current_user() -> CurrentUser:
+    """
+    获取当前用户（简化版：返回 Demo 用户）
+
+    命中缓存时不访问数据库；Demo 用户在应用启动时创建。
+    """
+    generation = _user_cache.generation
+    user = _user_cache.get(DEMO_USER_ID)
+    if user is None:
+        async with AsyncSessionLocal() as db:
+            orm_user = await db.get(User, DEMO_USER_ID)
+        if not orm_user:
+            raise HTTPException(status_code=401, detail="用户不存在")
+        user = CurrentUser.from_orm_user(orm_user)
+        _user_cache.set(DEMO_USER_ID, user, generation=generation)
     return user
 
 
 @router.post("/register", response_model=UserResponse)
-async def register(user_data: UserCreate, db: Session = Depends(get_db)):
+async def register(user_data: UserCreate, db: AsyncSession = Depends(get_db)):
     """用户注册（简化版）"""
     # 检查用户名是否已存在
-    existing = db.query(User).filter(User.username == user_data.username).first()
+    existing = await db.scalar(select(User).where(User.username == user_data.username))
     if existing:
         raise HTTPException(status_code=400, detail="用户名已存在")
     
     user = User(**user_data.model_dump())
     db.add(user)
-    db.commit()
-    db.refresh(user)
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 @router.post("/login", response_model=UserResponse)
-async def login(login_data: UserLogin, db: Session = Depends(get_db)):
+async def login(login_data: UserLogin, db: AsyncSession = Depends(get_db)):
     """用户登录（简化版：只验证用户名存在）"""
-    user = db.query(User).filter(User.username == login_data.username).first()
+    user = await db.scalar(select(User).where(User.username == login_data.username))
     if not user:
         raise HTTPException(status_code=404, detail="用户不存在")
     return user
 
 
 @router.get("/me", response_model=UserResponse)
-async def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: CurrentUser = Depends(get_current_user)):
     """获取当前用户信息"""
     return current_user
@@ -1,17 +1,22 @@
 """
 LumiAI - AI 对话路由
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import delete, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from typing import List
+from typing import List, Optional
+import json
 
-from app.database import get_db
-from app.models.user import User
+import anyio
+
+from app.database import get_db, AsyncSessionLocal
 from app.models.report import ChatHistory
-from app.routers.auth import get_current_user
+from app.routers.auth import CurrentUser, get_current_user
 from app.schemas.chat import ChatRequest, ChatResponse, ChatMessage, ChatHistoryResponse
-from app.services.ai_service import chat_with_ai
+from app.services.ai_service import chat_with_ai, stream_chat_with_ai
+from app.services.pagination import after_key, decode_cursor, paginate
 
 router = APIRouter()
 
@@ -19,8 +24,8 @@ router = APIRouter()
 @router.post("", response_model=ChatResponse)
 async def send_message(
     request: ChatRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """发送消息给 AI 导师"""
     # 保存用户消息
@@ -32,9 +37,11 @@ async def send_message(
     db.add(user_message)
     
     # 获取历史消息作为上下文
-    history = db.query(ChatHistory).filter(
-        ChatHistory.user_id == current_user.id
-    ).order_by(ChatHistory.created_at.desc()).limit(10).all()
+    history = (await db.scalars(
+        select(ChatHistory).where(
+            ChatHistory.user_id == current_user.id
+        ).order_by(ChatHistory.created_at.desc()).limit(10)
+    )).all()
     
     # 反转以获得正确的时间顺序
     history = list(reversed(history))
@@ -56,7 +63,7 @@ async def send_message(
         content=response_text
     )
     db.add(ai_message)
-    db.commit()
+    await db.commit()
     
     return ChatResponse(
         response=response_text,
@@ -64,37 +71,121 @@ async def send_message(
     )
 
 
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _save_model_message(user_id: int, content: str) -> None:
+    # 流式响应在依赖的会话关闭后才结束，这里单独开会话写入
+    async with AsyncSessionLocal() as db:
+        db.add(ChatHistory(user_id=user_id, role="model", content=content))
+        await db.commit()
+
+
+@router.post("/stream")
+async def send_message_stream(
+    request: Request,
+    chat_request: ChatRequest,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """
+    发送消息给 AI 导师（SSE 流式响应）
+
+    事件：delta（增量文本）、error（出错时的提示文本）、done（结束）。
+    流结束后完整回复写入对话历史；客户端断开时取消上游请求。
+    """
+    user_id = current_user.id
+    
+    # 保存用户消息
+    db.add(ChatHistory(
+        user_id=user_id,
+        role="user",
+        content=chat_request.message
+    ))
+    
+    # 获取历史消息作为上下文
+    history = (await db.scalars(
+        select(ChatHistory).where(
+            ChatHistory.user_id == user_id
+        ).order_by(ChatHistory.created_at.desc()).limit(10)
+    )).all()
+    history = [{"role": h.role, "content": h.content} for h in reversed(history)]
+    await db.commit()
+    
+    async def event_stream():
+        parts: List[str] = []
+        try:
+            async for delta in stream_chat_with_ai(
+                message=chat_request.message,
+                history=history
+            ):
+                if await request.is_disconnected():
+                    break
+                parts.append(delta)
+                yield _sse("delta", {"delta": delta})
+        except Exception as e:
+            print(f"AI 服务错误: {e}")
+            if not parts:
+                parts.append("很抱歉，我暂时无法连接网络。请检查 API 配置后重试。")
+                yield _sse("error", {"message": parts[0]})
+        finally:
+            # 断开或取消时也保存已生成的部分，保证历史与用户所见一致；
+            # 客户端断开时所在的取消域已被取消，写入需屏蔽取消，否则第一个 await 就会被中断
+            if parts:
+                with anyio.CancelScope(shield=True):
+                    await _save_model_message(user_id, "".join(parts))
+        
+        yield _sse("done", {"timestamp": datetime.utcnow().isoformat()})
+    
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # 关闭 Nginx 代理缓冲
+        }
+    )
+
+
 @router.get("/history", response_model=ChatHistoryResponse)
 async def get_chat_history(
-    limit: int = 50,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor，用于加载更早的消息"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取对话历史"""
-    history = db.query(ChatHistory).filter(
-        ChatHistory.user_id == current_user.id
-    ).order_by(ChatHistory.created_at.asc()).limit(limit).all()
+    """获取对话历史：默认返回最近的 limit 条（按时间正序），next_cursor 指向更早的消息"""
+    query = select(ChatHistory).where(ChatHistory.user_id == current_user.id)
+    if cursor:
+        created_at, message_id = decode_cursor(cursor, datetime, int)
+        query = query.where(after_key(ChatHistory.created_at, ChatHistory.id, created_at, message_id))
+    
+    rows = (await db.scalars(
+        query.order_by(ChatHistory.created_at.desc(), ChatHistory.id.desc()).limit(limit + 1)
+    )).all()
+    history, next_cursor = paginate(rows, limit, key=lambda h: (h.created_at, h.id))
     
     messages = [
         ChatMessage(
             role=h.role,
             content=h.content,
             timestamp=h.created_at
-        ) for h in history
+        ) for h in reversed(history)
     ]
     
-    return ChatHistoryResponse(messages=messages)
+    return ChatHistoryResponse(messages=messages, next_cursor=next_cursor)
 
 
 @router.delete("/history")
 async def clear_chat_history(
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """清空对话历史"""
-    db.query(ChatHistory).filter(
+    await db.execute(delete(ChatHistory).where(
         ChatHistory.user_id == current_user.id
-    ).delete()
-    db.commit()
+    ))
+    await db.commit()
     
     return {"message": "对话历史已清空"}
@@ -1,24 +1,28 @@
 """
 LumiAI - 练习路由
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import datetime
-from typing import List
+from typing import Optional
 
 from app.database import get_db
-from app.models.user import User
 from app.models.question import Question
-from app.models.practice import PracticeSession, PracticeAnswer
-from app.routers.auth import get_current_user
+from app.models.practice import PracticeSession, PracticeAnswer, AnalysisJob
+from app.routers.auth import CurrentUser, get_current_user
 from app.schemas.practice import (
     PracticeSessionCreate, 
     PracticeSessionResponse,
     SubmitAnswerRequest,
     SubmitAnswerResponse,
-    PracticeHistoryItem
+    AnswerAnalysisResponse,
+    PracticeHistoryResponse
 )
-from app.services.ai_service import analyze_error
+from app.services import learning_rollups
+from app.services.analysis_cache import analysis_cache, make_cache_key
+from app.services.analysis_queue import analysis_queue, JOB_PENDING, JOB_DONE
+from app.services.pagination import after_key, decode_cursor, paginate
 
 router = APIRouter()
 
@@ -26,8 +30,8 @@ router = APIRouter()
 @router.post("/sessions", response_model=PracticeSessionResponse)
 async def create_session(
     session_data: PracticeSessionCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """创建新的练习会话"""
     session = PracticeSession(
@@ -36,22 +40,22 @@ async def create_session(
         title=session_data.title or f"{session_data.category.upper()} 练习"
     )
     db.add(session)
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
     return session
 
 
 @router.get("/sessions/{session_id}", response_model=PracticeSessionResponse)
 async def get_session(
     session_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """获取练习会话详情"""
-    session = db.query(PracticeSession).filter(
+    session = await db.scalar(select(PracticeSession).where(
         PracticeSession.id == session_id,
         PracticeSession.user_id == current_user.id
-    ).first()
+    ))
     
     if not session:
         raise HTTPException(status_code=404, detail="练习会话不存在")
@@ -62,57 +66,47 @@ async def get_session(
 async def submit_answer(
     session_id: int,
     answer_data: SubmitAnswerRequest,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """提交答案"""
     # 验证会话存在
-    session = db.query(PracticeSession).filter(
+    session = await db.scalar(select(PracticeSession).where(
         PracticeSession.id == session_id,
         PracticeSession.user_id == current_user.id
-    ).first()
+    ))
     
     if not session:
         raise HTTPException(status_code=404, detail="练习会话不存在")
     
     # 获取题目
-    question = db.query(Question).filter(Question.id == answer_data.question_id).first()
+    question = await db.get(Question, answer_data.question_id)
     if not question:
         raise HTTPException(status_code=404, detail="题目不存在")
     
     # 判断答案是否正确（简单的字符串比较，实际可能需要更复杂的逻辑）
     is_correct = answer_data.user_answer.strip().lower() == question.answer.strip().lower()
     
-    # AI 分析（仅对错误答案）
-    ai_analysis = None
-    ai_correction = None
-    error_type = None
-    
+    # 错误答案先查分析缓存，命中则直接回填，无需排队
+    cached = None
     if not is_correct:
-        try:
-            analysis_result = await analyze_error(
-                question_content=question.content,
-                correct_answer=question.answer,
-                user_answer=answer_data.user_answer
-            )
-            ai_analysis = analysis_result.get("analysis", "")
-            ai_correction = analysis_result.get("correction", "")
-            error_type = analysis_result.get("error_type", "unknown")
-        except Exception as e:
-            print(f"AI 分析失败: {e}")
-            ai_analysis = "暂时无法生成分析"
+        cache_key = make_cache_key(question, answer_data.user_answer)
+        cached = await analysis_cache.get(cache_key) if cache_key else None
     
     # 保存答案记录
+    now = datetime.utcnow()
     practice_answer = PracticeAnswer(
         session_id=session_id,
         question_id=answer_data.question_id,
         user_id=current_user.id,
         user_answer=answer_data.user_answer,
         is_correct=is_correct,
-        error_type=error_type,
-        ai_analysis=ai_analysis,
-        ai_correction=ai_correction
+        created_at=now
     )
+    if cached:
+        practice_answer.error_type = cached["error_type"]
+        practice_answer.ai_analysis = cached["analysis"]
+        practice_answer.ai_correction = cached["correction"]
     db.add(practice_answer)
     
     # 更新会话统计
@@ -120,14 +114,63 @@ async def submit_answer(
     if is_correct:
         session.correct_count += 1
     
-    db.commit()
+    # 学情汇总与答案在同一事务内提交
+    await learning_rollups.record_answer(
+        db, current_user.id, question, is_correct,
+        error_type=practice_answer.error_type,
+        day=now.date()
+    )
+    
+    # AI 分析（仅对错误答案）：写入任务表，由后台队列异步处理
+    job = None
+    if not is_correct:
+        await db.flush()
+        job = AnalysisJob(
+            answer_id=practice_answer.id,
+            status=JOB_DONE if cached else JOB_PENDING
+        )
+        db.add(job)
+    
+    await db.commit()
+    
+    if job and job.status == JOB_PENDING:
+        analysis_queue.enqueue(job.id)
     
     return SubmitAnswerResponse(
+        answer_id=practice_answer.id,
         is_correct=is_correct,
         correct_answer=question.answer,
-        ai_analysis=ai_analysis,
-        ai_correction=ai_correction,
-        error_type=error_type
+        ai_analysis=practice_answer.ai_analysis,
+        ai_correction=practice_answer.ai_correction,
+        error_type=practice_answer.error_type,
+        analysis_status=job.status if job else None
+    )
+
+
+@router.get("/answers/{answer_id}/analysis", response_model=AnswerAnalysisResponse)
+async def get_answer_analysis(
+    answer_id: int,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """查询错误分析进度（前端轮询，status 为 done/failed 时结束）"""
+    answer = await db.scalar(select(PracticeAnswer).where(
+        PracticeAnswer.id == answer_id,
+        PracticeAnswer.user_id == current_user.id
+    ))
+    
+    if not answer:
+        raise HTTPException(status_code=404, detail="答题记录不存在")
+    
+    job = await db.scalar(select(AnalysisJob).where(AnalysisJob.answer_id == answer_id))
+    
+    return AnswerAnalysisResponse(
+        answer_id=answer.id,
+        status=job.status if job else None,
+        attempts=job.attempts if job else 0,
+        error_type=answer.error_type,
+        ai_analysis=answer.ai_analysis,
+        ai_correction=answer.ai_correction
     )
 
 
@@ -135,14 +178,14 @@ async def submit_answer(
 async def complete_session(
     session_id: int,
     time_spent: int = 0,  # 用时（秒）
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """完成练习会话"""
-    session = db.query(PracticeSession).filter(
+    session = await db.scalar(select(PracticeSession).where(
         PracticeSession.id == session_id,
         PracticeSession.user_id == current_user.id
-    ).first()
+    ))
     
     if not session:
         raise HTTPException(status_code=404, detail="练习会话不存在")
@@ -155,20 +198,29 @@ async def complete_session(
         accuracy = session.correct_count / session.total_questions
         session.score = round(accuracy * 9, 1)
     
-    db.commit()
-    db.refresh(session)
+    await db.commit()
+    await db.refresh(session)
     return session
 
 
-@router.get("/history", response_model=List[PracticeHistoryItem])
+@router.get("/history", response_model=PracticeHistoryResponse)
 async def get_practice_history(
-    limit: int = 10,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(10, ge=1, le=100),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取练习历史"""
-    sessions = db.query(PracticeSession).filter(
-        PracticeSession.user_id == current_user.id
-    ).order_by(PracticeSession.started_at.desc()).limit(limit).all()
+    """获取练习历史（最近的在前，游标分页）"""
+    query = select(PracticeSession).where(PracticeSession.user_id == current_user.id)
+    if cursor:
+        started_at, session_id = decode_cursor(cursor, datetime, int)
+        query = query.where(
+            after_key(PracticeSession.started_at, PracticeSession.id, started_at, session_id)
+        )
+    
+    rows = (await db.scalars(
+        query.order_by(PracticeSession.started_at.desc(), PracticeSession.id.desc()).limit(limit + 1)
+    )).all()
     
-    return sessions
+    sessions, next_cursor = paginate(rows, limit, key=lambda s: (s.started_at, s.id))
+    return {"items": sessions, "next_cursor": next_cursor}
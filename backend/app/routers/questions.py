@@ -1,90 +1,164 @@
 """
 LumiAI - 题库路由
 """
-from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
-from sqlalchemy import func
-from typing import Optional, List
-import random
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import distinct, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import load_only
+from typing import Literal, Optional, List, Union
 
 from app.database import get_db
 from app.models.question import Question
-from app.schemas.question import QuestionResponse, QuestionBrief
+from app.models.practice import PracticeAnswer
+from app.routers.auth import CurrentUser, get_current_user
+from app.schemas.question import (
+    QuestionResponse, QuestionBrief, QuestionListResponse, QuestionBriefListResponse,
+    QuestionSearchResponse,
+)
+from app.services.pagination import decode_cursor, paginate
+from app.services.question_catalog import question_catalog
+from app.services.question_search import SearchUnavailable, search_questions
 
 router = APIRouter()
 
 
-@router.get("", response_model=List[QuestionResponse])
+CATEGORIES = ["listening", "reading", "writing", "speaking"]
+
+# view=brief 时只查询这些列（与 QuestionBrief 字段一致）
+BRIEF_COLUMNS = (
+    Question.id,
+    Question.category,
+    Question.question_type,
+    Question.difficulty,
+    Question.title,
+    Question.source,
+)
+
+
+@router.get("", response_model=Union[QuestionListResponse, QuestionBriefListResponse])
 async def get_questions(
     category: Optional[str] = Query(None, description="题目类别: listening/reading/writing/speaking"),
     difficulty: Optional[str] = Query(None, description="难度: easy/medium/hard"),
     question_type: Optional[str] = Query(None, description="题目类型"),
     limit: int = Query(10, ge=1, le=100),
-    offset: int = Query(0, ge=0),
-    db: Session = Depends(get_db)
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    view: Literal["full", "brief"] = Query("full", description="brief 只返回标题等摘要字段，详情通过 /{question_id} 获取"),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取题目列表（包含完整内容）"""
-    query = db.query(Question)
+    """获取题目列表（按 id 游标分页），附带题库分面统计"""
+    query = select(Question).order_by(Question.id)
+    if view == "brief":
+        # 只 SELECT 摘要列；误访问其他列时直接报错，而不是逐行懒加载
+        query = query.options(load_only(*BRIEF_COLUMNS, raiseload=True))
+    if cursor:
+        (last_id,) = decode_cursor(cursor, int)
+        query = query.where(Question.id > last_id)
     
     if category:
-        query = query.filter(Question.category == category)
+        query = query.where(Question.category == category)
     if difficulty:
-        query = query.filter(Question.difficulty == difficulty)
+        query = query.where(Question.difficulty == difficulty)
     if question_type:
-        query = query.filter(Question.question_type == question_type)
+        query = query.where(Question.question_type == question_type)
     
-    questions = query.offset(offset).limit(limit).all()
-    return questions
+    rows = (await db.scalars(query.limit(limit + 1))).all()
+    questions, next_cursor = paginate(rows, limit, key=lambda q: (q.id,))
+    if view == "brief":
+        # 直接序列化为 JSON：返回模型对象会被 FastAPI 转回字典再按 Union 重新校验一遍
+        payload = QuestionBriefListResponse(
+            items=[QuestionBrief.model_validate(q) for q in questions],
+            next_cursor=next_cursor,
+            facets=await question_catalog.facets(),
+        )
+        return Response(content=payload.model_dump_json(), media_type="application/json")
+    return {
+        "items": questions,
+        "next_cursor": next_cursor,
+        "facets": await question_catalog.facets(),
+    }
 
 
 @router.get("/count")
-async def get_question_count(
-    category: Optional[str] = None,
-    db: Session = Depends(get_db)
-):
-    """获取题目数量统计"""
+async def get_question_count(category: Optional[str] = None):
+    """获取题目数量统计（来自缓存的分面统计）"""
+    facets = await question_catalog.facets()
     if category:
-        count = db.query(Question).filter(Question.category == category).count()
-        return {"category": category, "count": count}
+        return {"category": category, "count": facets["category"].get(category, 0)}
     
     # 返回各类别统计
-    stats = {}
-    for cat in ["listening", "reading", "writing", "speaking"]:
-        stats[cat] = db.query(Question).filter(Question.category == cat).count()
+    stats = {cat: facets["category"].get(cat, 0) for cat in CATEGORIES}
     stats["total"] = sum(stats.values())
     return stats
 
 
-@router.get("/random", response_model=QuestionResponse)
+@router.get("/random", response_model=Union[QuestionResponse, List[QuestionResponse]])
 async def get_random_question(
     category: Optional[str] = Query(None),
     difficulty: Optional[str] = Query(None),
-    db: Session = Depends(get_db)
+    n: Optional[int] = Query(None, ge=1, le=50, description="抽取多道不重复的题目，返回列表"),
+    exclude_answered: bool = Query(False, description="排除当前用户已作答的题目"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """随机获取一道题目"""
-    query = db.query(Question)
+    """随机获取题目（不传 n 时返回单道题）"""
+    exclude = None
+    if exclude_answered:
+        exclude = set((await db.scalars(
+            select(distinct(PracticeAnswer.question_id)).where(
+                PracticeAnswer.user_id == current_user.id
+            )
+        )).all())
     
-    if category:
-        query = query.filter(Question.category == category)
-    if difficulty:
-        query = query.filter(Question.difficulty == difficulty)
-    
-    # 获取所有符合条件的题目 ID
-    question_ids = [q.id for q in query.all()]
+    # 从内存索引中抽取 id，只加载被选中的题目
+    question_ids = await question_catalog.sample(
+        n or 1, category=category, difficulty=difficulty, exclude=exclude
+    )
     
     if not question_ids:
         raise HTTPException(status_code=404, detail="没有找到符合条件的题目")
     
-    # 随机选择一个
-    random_id = random.choice(question_ids)
-    question = db.query(Question).filter(Question.id == random_id).first()
-    return question
+    questions = (await db.scalars(
+        select(Question).where(Question.id.in_(question_ids))
+    )).all()
+    by_id = {q.id: q for q in questions}
+    questions = [by_id[qid] for qid in question_ids if qid in by_id]
+    
+    if not questions:
+        # 索引中的题目已被其他进程删除
+        question_catalog.invalidate()
+        raise HTTPException(status_code=404, detail="没有找到符合条件的题目")
+    
+    if n is None:
+        return questions[0]
+    return questions
+
+
+@router.get("/search", response_model=QuestionSearchResponse)
+async def search(
+    q: str = Query(..., min_length=1, max_length=200, description="搜索关键词"),
+    category: Optional[str] = Query(None),
+    difficulty: Optional[str] = Query(None),
+    limit: int = Query(20, ge=1, le=50),
+    offset: int = Query(0, ge=0),
+    db: AsyncSession = Depends(get_db)
+):
+    """全文搜索题目（标题、文章、题干、技能标签），按相关度排序并返回高亮摘要"""
+    try:
+        items = await search_questions(
+            db, q, category=category, difficulty=difficulty, limit=limit, offset=offset
+        )
+    except SearchUnavailable as e:
+        raise HTTPException(
+            status_code=503,
+            detail=f"{e}，请执行 python -m app.migrations",
+        )
+    return {"query": q, "items": items}
 
 
 @router.get("/{question_id}", response_model=QuestionResponse)
-async def get_question(question_id: int, db: Session = Depends(get_db)):
+async def get_question(question_id: int, db: AsyncSession = Depends(get_db)):
     """获取单个题目详情"""
-    question = db.query(Question).filter(Question.id == question_id).first()
+    question = await db.get(Question, question_id)
     if not question:
         raise HTTPException(status_code=404, detail="题目不存在")
     return question
@@ -1,12 +1,18 @@
 """
 LumiAI - UI 聚合数据路由
 """
+import hashlib
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Request, Response
+from pydantic import BaseModel
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.models.user import User
-from app.routers.auth import get_current_user
+from app.config import get_settings
+from app.database import get_db
+from app.routers.auth import CurrentUser, get_current_user
 from app.schemas.analysis import RecommendationItem
 from app.schemas.ui import (
     AIDrill,
@@ -33,8 +39,16 @@ from app.schemas.ui import (
     WeaknessStat,
     WeaknessSuggestion,
 )
+from app.services import learning_rollups
+from app.services.cache import TTLCache
+from app.services.learning_rollups import RollupSummary
+from app.services.recommender import FALLBACK_RECOMMENDATIONS, recommender
 
 router = APIRouter()
+settings = get_settings()
+
+# 示例句库的添加时间：固定日期，各 worker 进程、不同启动日期序列化结果一致（ETag 相同）
+DEMO_ADDED_AT = datetime(2025, 1, 15)
 
 
 LEARNING_PULSE_POINTS = [
@@ -54,33 +68,6 @@ ERROR_METRICS = [
     ErrorMetric(name="格式错误", value=10, color="#e5e5ea"),
 ]
 
-RECOMMENDATIONS = [
-    RecommendationItem(
-        id="1",
-        title="高级定语从句应用",
-        category="Writing",
-        duration="15 分钟",
-        difficulty="Hard",
-        reason="基于您近期的语法错误",
-    ),
-    RecommendationItem(
-        id="2",
-        title="Part 2 独白模拟",
-        category="Speaking",
-        duration="10 分钟",
-        difficulty="Medium",
-        reason="提升口语流利度",
-    ),
-    RecommendationItem(
-        id="3",
-        title="学术摘要快速定位",
-        category="Reading",
-        duration="20 分钟",
-        difficulty="Hard",
-        reason="强化阅读逻辑推理",
-    ),
-]
-
 TIME_DATA = [
     TimeDataPoint(name="Listening", hours=12.5),
     TimeDataPoint(name="Reading", hours=15.2),
@@ -131,7 +118,7 @@ SYNTAX_ENTRIES = [
         sentence="Never before had the concept of interstellar travel seemed so plausible yet so distant.",
         analysis_label="Structure",
         analysis_text="Negative Adverb + Auxiliary + Subject + Main Verb",
-        added_at=datetime.utcnow(),
+        added_at=DEMO_ADDED_AT,
         cta="View Similar Sentences →",
     ),
     SyntaxEntry(
@@ -139,7 +126,7 @@ SYNTAX_ENTRIES = [
         sentence="Facing extreme gravitational forces, the crew had to rely on automated systems.",
         analysis_label="Logic",
         analysis_text="Cause and Effect. (Because they faced...)",
-        added_at=datetime.utcnow() - timedelta(days=1),
+        added_at=DEMO_ADDED_AT - timedelta(days=1),
         cta="View Similar Sentences →",
     ),
 ]
@@ -299,46 +286,131 @@ AI_DRILLS = [
 ]
 
 
-@router.get("/dashboard", response_model=DashboardResponse)
-async def get_dashboard_ui(
-    current_user: User = Depends(get_current_user),
-):
-    """Dashboard 页面聚合数据"""
-    _ = current_user
+# ========== 学情汇总数据（learning_rollups）==========
+# 用户有答题记录时，错误分布、题型正确率和薄弱点明细由汇总表计算，否则展示上面的示例数据
+
+CATEGORY_LABELS = {
+    "listening": "Listening",
+    "reading": "Reading",
+    "writing": "Writing",
+    "speaking": "Speaking",
+}
+
+QUESTION_TYPE_LABELS = {
+    "true_false_ng": "T/F/NG",
+    "multiple_choice": "Multiple Choice",
+    "matching": "Matching",
+    "fill_in_blank": "Fill-in",
+    "short_answer": "Short Answer",
+    "essay": "Essay",
+}
+
+# AI 分析给出的错误类型 -> (展示名称, 颜色)，未列出的归入"其他"
+ERROR_TYPE_LABELS = {
+    "grammar": ("复杂语法", "#0071e3"),
+    "vocabulary": ("词汇缺口", "#5e5ce6"),
+    "logic": ("逻辑陷阱", "#32ade6"),
+}
+OTHER_ERROR_LABEL = ("其他", "#e5e5ea")
+
+
+def _percent(part: int, whole: int) -> int:
+    return int(part * 100 / whole) if whole else 0
+
+
+def _accuracy_color(accuracy: int) -> str:
+    if accuracy < 50:
+        return "#ef4444"
+    if accuracy < 70:
+        return "#f59e0b"
+    return "#22c55e"
+
+
+def _error_metrics(summary: Optional[RollupSummary]) -> ErrorMetricsResponse:
+    if summary is None:
+        return ErrorMetricsResponse(pending_count=12, metrics=ERROR_METRICS)
+
+    counts: Dict[Tuple[str, str], int] = {}
+    for error_type, count in summary.error_counts().items():
+        label = ERROR_TYPE_LABELS.get(error_type, OTHER_ERROR_LABEL)
+        counts[label] = counts.get(label, 0) + count
+    total = sum(counts.values())
+    metrics = [
+        ErrorMetric(name=name, value=_percent(count, total), color=color)
+        for (name, color), count in sorted(counts.items(), key=lambda item: -item[1])
+    ]
+    return ErrorMetricsResponse(pending_count=summary.pending_count, metrics=metrics or ERROR_METRICS)
+
+
+def _question_type_stats(summary: Optional[RollupSummary]) -> List[QuestionTypeStat]:
+    totals = summary.totals_by("question_type") if summary else {}
+    if not totals:
+        return QUESTION_TYPE_DATA
+    return [
+        QuestionTypeStat(
+            name=QUESTION_TYPE_LABELS.get(question_type, question_type),
+            accuracy=_percent(correct, answers),
+        )
+        for question_type, (answers, correct) in sorted(totals.items(), key=lambda item: -item[1][0])
+    ]
+
+
+def _detailed_stats(summary: Optional[RollupSummary]) -> Dict[str, List[WeaknessStat]]:
+    if summary is None:
+        return DETAILED_STATS
+    detailed = {}
+    for category, label in CATEGORY_LABELS.items():
+        totals = summary.totals_by("question_type", category=category)
+        if not totals:
+            detailed[label] = DETAILED_STATS[label]
+            continue
+        stats = []
+        for question_type, (answers, correct) in sorted(totals.items(), key=lambda item: -item[1][0]):
+            accuracy = _percent(correct, answers)
+            stats.append(WeaknessStat(
+                type=QUESTION_TYPE_LABELS.get(question_type, question_type),
+                accuracy=accuracy,
+                color=_accuracy_color(accuracy),
+            ))
+        detailed[label] = stats
+    return detailed
+
+
+@dataclass(frozen=True)
+class _Payload:
+    """预先序列化好的响应体及其 ETag"""
+    body: bytes
+    etag: str
+
+
+def _serialize(model: BaseModel) -> _Payload:
+    body = model.model_dump_json().encode("utf-8")
+    return _Payload(body=body, etag=f'"{hashlib.sha256(body).hexdigest()[:32]}"')
+
+
+def _build_dashboard(summary: Optional[RollupSummary] = None,
+                     recommendations: Optional[List[RecommendationItem]] = None) -> DashboardResponse:
     return DashboardResponse(
         learning_pulse=LearningPulseResponse(
             predicted_score=7.5,
             weekly_delta=0.3,
             points=LEARNING_PULSE_POINTS,
         ),
-        error_metrics=ErrorMetricsResponse(
-            pending_count=12,
-            metrics=ERROR_METRICS,
-        ),
-        recommendations=RECOMMENDATIONS,
+        error_metrics=_error_metrics(summary),
+        recommendations=recommendations or FALLBACK_RECOMMENDATIONS,
     )
 
 
-@router.get("/analysis", response_model=AnalysisOverviewResponse)
-async def get_analysis_ui(
-    current_user: User = Depends(get_current_user),
-):
-    """分析页面聚合数据"""
-    _ = current_user
+def _build_analysis(summary: Optional[RollupSummary] = None) -> AnalysisOverviewResponse:
     return AnalysisOverviewResponse(
         time_data=TIME_DATA,
-        question_type_data=QUESTION_TYPE_DATA,
+        question_type_data=_question_type_stats(summary),
         foundation_stats=FoundationStats(new_words=124, syntax_patterns=18),
         directives=DIRECTIVES,
     )
 
 
-@router.get("/foundation", response_model=FoundationOverviewResponse)
-async def get_foundation_ui(
-    current_user: User = Depends(get_current_user),
-):
-    """核心能力页面聚合数据"""
-    _ = current_user
+def _build_foundation() -> FoundationOverviewResponse:
     return FoundationOverviewResponse(
         review_count=42,
         memory_curve=MEMORY_CURVE,
@@ -347,25 +419,15 @@ async def get_foundation_ui(
     )
 
 
-@router.get("/weakness", response_model=WeaknessOverviewResponse)
-async def get_weakness_ui(
-    current_user: User = Depends(get_current_user),
-):
-    """薄弱点页面聚合数据"""
-    _ = current_user
+def _build_weakness(summary: Optional[RollupSummary] = None) -> WeaknessOverviewResponse:
     return WeaknessOverviewResponse(
         modules=WEAKNESS_MODULES,
-        detailed_stats=DETAILED_STATS,
+        detailed_stats=_detailed_stats(summary),
         suggestions=WEAKNESS_SUGGESTIONS,
     )
 
 
-@router.get("/practice", response_model=PracticeOverviewResponse)
-async def get_practice_ui(
-    current_user: User = Depends(get_current_user),
-):
-    """练习页面聚合数据"""
-    _ = current_user
+def _build_practice() -> PracticeOverviewResponse:
     return PracticeOverviewResponse(
         modules=PRACTICE_MODULES,
         reading_exam=ReadingExamResponse(
@@ -375,3 +437,129 @@ async def get_practice_ui(
         ),
         ai_drills=AI_DRILLS,
     )
+
+
+_BUILDERS: Dict[str, Callable[[], BaseModel]] = {
+    "dashboard": _build_dashboard,
+    "analysis": _build_analysis,
+    "foundation": _build_foundation,
+    "weakness": _build_weakness,
+    "practice": _build_practice,
+}
+
+
+async def _user_dashboard(user_id: int, summary: RollupSummary) -> DashboardResponse:
+    recommendations = await recommender.recommend(user_id, summary, len(FALLBACK_RECOMMENDATIONS))
+    return _build_dashboard(summary, recommendations)
+
+
+async def _user_analysis(user_id: int, summary: RollupSummary) -> AnalysisOverviewResponse:
+    return _build_analysis(summary)
+
+
+async def _user_weakness(user_id: int, summary: RollupSummary) -> WeaknessOverviewResponse:
+    return _build_weakness(summary)
+
+
+# 含学情汇总数据的页面，按用户单独序列化
+_USER_BUILDERS: Dict[str, Callable[[int, RollupSummary], Awaitable[BaseModel]]] = {
+    "dashboard": _user_dashboard,
+    "analysis": _user_analysis,
+    "weakness": _user_weakness,
+}
+
+_payloads: Dict[str, _Payload] = {}
+
+# (页面, 用户 id) -> (生成时使用的汇总, 响应体)；汇总缓存失效后重新序列化
+_user_payloads = TTLCache(maxsize=settings.stats_cache_size, ttl=settings.stats_cache_ttl)
+
+
+def build_ui_payloads() -> None:
+    """序列化全部聚合数据（应用启动时及数据变更后调用）"""
+    _payloads.update({name: _serialize(build()) for name, build in _BUILDERS.items()})
+
+
+def _shared_payload(name: str) -> _Payload:
+    payload = _payloads.get(name)
+    if payload is None:
+        payload = _payloads[name] = _serialize(_BUILDERS[name]())
+    return payload
+
+
+async def _user_payload(db: AsyncSession, user_id: int, name: str) -> _Payload:
+    """按用户的汇总数据（及推荐）生成响应体；没有答题记录的用户共用示例数据"""
+    summary = await learning_rollups.load_summary(db, user_id)
+    if summary.empty:
+        return _shared_payload(name)
+    cached = _user_payloads.get((name, user_id))
+    if cached is not None and cached[0] is summary:
+        return cached[1]
+    payload = _serialize(await _USER_BUILDERS[name](user_id, summary))
+    _user_payloads.set((name, user_id), (summary, payload))
+    return payload
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    candidates = (tag.strip() for tag in if_none_match.split(","))
+    return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+
+def _payload_response(request: Request, payload: _Payload) -> Response:
+    """返回缓存的响应体；If-None-Match 命中时返回 304"""
+    headers = {"ETag": payload.etag, "Cache-Control": settings.ui_cache_control}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, payload.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=payload.body, media_type="application/json", headers=headers)
+
+
+@router.get("/dashboard", response_model=DashboardResponse)
+async def get_dashboard_ui(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Dashboard 页面聚合数据"""
+    return _payload_response(request, await _user_payload(db, current_user.id, "dashboard"))
+
+
+@router.get("/analysis", response_model=AnalysisOverviewResponse)
+async def get_analysis_ui(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """分析页面聚合数据"""
+    return _payload_response(request, await _user_payload(db, current_user.id, "analysis"))
+
+
+@router.get("/foundation", response_model=FoundationOverviewResponse)
+async def get_foundation_ui(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """核心能力页面聚合数据"""
+    _ = current_user
+    return _payload_response(request, _shared_payload("foundation"))
+
+
+@router.get("/weakness", response_model=WeaknessOverviewResponse)
+async def get_weakness_ui(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """薄弱点页面聚合数据"""
+    return _payload_response(request, await _user_payload(db, current_user.id, "weakness"))
+
+
+@router.get("/practice", response_model=PracticeOverviewResponse)
+async def get_practice_ui(
+    request: Request,
+    current_user: CurrentUser = Depends(get_current_user),
+):
+    """练习页面聚合数据"""
+    _ = current_user
+    return _payload_response(request, _shared_payload("practice"))
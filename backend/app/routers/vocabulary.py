@@ -1,72 +1,278 @@
 """
 LumiAI - 生词本路由
 """
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
-from typing import List
-from datetime import datetime
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy import func, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from dataclasses import asdict
+import asyncio
 
 from app.database import get_db
-from app.models.user import User
 from app.models.vocabulary import Vocabulary
-from app.routers.auth import get_current_user
-from app.schemas.vocabulary import VocabularyCreate, VocabularyResponse, VocabularyUpdate
+from app.routers.auth import CurrentUser, get_current_user
+from app.schemas.vocabulary import (
+    DictionaryEntryResponse, VocabularyBulkCreate, VocabularyBulkResponse, VocabularyCreate,
+    VocabularyDueResponse, VocabularyListResponse, VocabularyResponse,
+    VocabularyReviewBatchRequest, VocabularyReviewBatchResponse, VocabularyReviewRequest,
+    VocabularyUpdate,
+)
+from app.services.dictionary import DictionaryUnavailable, dictionary, enrich_vocabulary
+from app.services.pagination import after_key, decode_cursor, paginate
+from app.services.srs import CardState, schedule
 
 router = APIRouter()
 
 
-@router.get("", response_model=List[VocabularyResponse])
+def _insert_new_words(dialect: str):
+    """插入生词，同一用户已有的单词跳过（唯一索引 uq_vocabulary_user_word），返回新建的行"""
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise RuntimeError(f"不支持的数据库: {dialect}")
+    return (
+        insert(Vocabulary)
+        .on_conflict_do_nothing(index_elements=["user_id", "word"])
+        .returning(Vocabulary)
+    )
+
+
+@router.get("", response_model=VocabularyListResponse)
 async def get_vocabulary(
-    limit: int = 50,
-    offset: int = 0,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = Query(None, description="上一页返回的 next_cursor"),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """获取生词本"""
-    words = db.query(Vocabulary).filter(
-        Vocabulary.user_id == current_user.id
-    ).order_by(Vocabulary.created_at.desc()).offset(offset).limit(limit).all()
+    """获取生词本（最新添加的在前，游标分页）"""
+    query = select(Vocabulary).where(Vocabulary.user_id == current_user.id)
+    if cursor:
+        created_at, word_id = decode_cursor(cursor, datetime, int)
+        query = query.where(after_key(Vocabulary.created_at, Vocabulary.id, created_at, word_id))
+    
+    rows = (await db.scalars(
+        query.order_by(Vocabulary.created_at.desc(), Vocabulary.id.desc()).limit(limit + 1)
+    )).all()
     
-    return words
+    words, next_cursor = paginate(rows, limit, key=lambda w: (w.created_at, w.id))
+    return {"items": words, "next_cursor": next_cursor}
+
+
+@router.get("/due", response_model=VocabularyDueResponse)
+async def get_due_words(
+    limit: int = Query(20, ge=1, le=100),
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """获取到期待复习的生词（最早到期的在前）"""
+    now = datetime.utcnow()
+    # 两个查询都是 (user_id, due_at) 索引上的范围扫描，与生词总量无关
+    words = (await db.scalars(
+        select(Vocabulary).where(
+            Vocabulary.user_id == current_user.id,
+            Vocabulary.due_at <= now
+        ).order_by(Vocabulary.due_at).limit(limit)
+    )).all()
+    
+    next_due_at = await db.scalar(
+        select(func.min(Vocabulary.due_at)).where(
+            Vocabulary.user_id == current_user.id,
+            Vocabulary.due_at > now
+        )
+    )
+    return {"items": words, "next_due_at": next_due_at}
+
+
+@router.get("/lookup", response_model=DictionaryEntryResponse)
+async def lookup_word(
+    word: str = Query(..., min_length=1, max_length=100),
+):
+    """查询离线词典（支持词形变化，如 studies -> study）"""
+    try:
+        await dictionary.ensure_open()
+    except DictionaryUnavailable as e:
+        raise HTTPException(status_code=503, detail=str(e))
+    
+    # 未命中缓存时是一次同步 SQLite 查询，放到线程中执行，不阻塞其他请求
+    entry = await asyncio.to_thread(dictionary.lookup, word)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="词典中未收录该单词")
+    return {"query": word, **asdict(entry)}
 
 
 @router.post("", response_model=VocabularyResponse)
 async def add_vocabulary(
     word_data: VocabularyCreate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """添加生词"""
-    # 检查是否已存在
-    existing = db.query(Vocabulary).filter(
-        Vocabulary.user_id == current_user.id,
-        Vocabulary.word == word_data.word
-    ).first()
-    
-    if existing:
-        raise HTTPException(status_code=400, detail="该单词已在生词本中")
-    
-    word = Vocabulary(
-        user_id=current_user.id,
-        **word_data.model_dump()
+    values = word_data.model_dump()
+    await enrich_vocabulary([values])
+    word = await db.scalar(
+        _insert_new_words(db.bind.dialect.name).values(user_id=current_user.id, **values)
     )
-    db.add(word)
-    db.commit()
-    db.refresh(word)
+    if word is None:
+        raise HTTPException(status_code=400, detail="该单词已在生词本中")
+    await db.commit()
     return word
 
 
+@router.post(":bulk", response_model=VocabularyBulkResponse)
+async def bulk_add_vocabulary(
+    payload: VocabularyBulkCreate,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """批量添加生词：一次批量插入（已存在的跳过）+ 一次查询已存在的单词，逐条返回结果"""
+    results: List[Dict] = []
+    pending: List[int] = []
+    rows: List[Dict] = []
+    seen = set()
+    for index, item in enumerate(payload.items):
+        result = {"index": index, "word": item.word}
+        if item.word in seen:
+            result.update(status="duplicate")
+        else:
+            seen.add(item.word)
+            pending.append(index)
+            rows.append({"user_id": current_user.id, **item.model_dump()})
+        results.append(result)
+    
+    await enrich_vocabulary(rows)
+    # render_nulls：空字段也显式写入 NULL，所有行才能合并为同一条批量 INSERT；
+    # 不要求 RETURNING 按参数顺序返回（SQLite 上会退化为逐行插入），按单词回填结果
+    created = (await db.scalars(
+        _insert_new_words(db.bind.dialect.name),
+        rows,
+        execution_options={"render_nulls": True}
+    )).all()
+    created_by_word = {word.word: word for word in created}
+    existing_by_word = {}
+    if len(created) < len(rows):
+        existing_by_word = {word.word: word for word in (await db.scalars(select(Vocabulary).where(
+            Vocabulary.user_id == current_user.id,
+            Vocabulary.word.in_(seen - created_by_word.keys())
+        ))).all()}
+    await db.commit()
+    
+    for index in pending:
+        word = results[index]["word"]
+        if word in created_by_word:
+            results[index].update(status="created", item=created_by_word[word])
+        else:
+            results[index].update(status="exists", item=existing_by_word.get(word))
+    
+    return {"created": len(created), "results": results}
+
+
+@router.post("/reviews:batch", response_model=VocabularyReviewBatchResponse)
+async def batch_review(
+    payload: VocabularyReviewBatchRequest,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
+):
+    """批量提交复习结果（离线同步）：按提交顺序调度，一个事务内批量更新"""
+    word_ids = {review.word_id for review in payload.reviews}
+    states = {
+        row.id: dict(row._mapping) for row in (await db.execute(
+            select(
+                Vocabulary.id,
+                Vocabulary.ease_factor,
+                Vocabulary.interval_days,
+                Vocabulary.repetitions,
+                Vocabulary.mastery_level,
+                Vocabulary.review_count,
+                Vocabulary.due_at,
+                Vocabulary.last_reviewed_at,
+            ).where(
+                Vocabulary.user_id == current_user.id,
+                Vocabulary.id.in_(word_ids)
+            )
+        )).all()
+    }
+    
+    now = datetime.utcnow()
+    results = []
+    for index, review in enumerate(payload.reviews):
+        state = states.get(review.word_id)
+        if state is None:
+            results.append({"index": index, "word_id": review.word_id, "status": "not_found"})
+            continue
+        
+        reviewed_at = review.reviewed_at or now
+        if reviewed_at.tzinfo is not None:
+            reviewed_at = reviewed_at.astimezone(timezone.utc).replace(tzinfo=None)
+        reviewed_at = min(reviewed_at, now)
+        
+        # 客户端重传时，已应用过的（不晚于最近一次复习的）记录直接跳过
+        if review.reviewed_at and state["last_reviewed_at"] and reviewed_at <= state["last_reviewed_at"]:
+            results.append({
+                "index": index,
+                "word_id": review.word_id,
+                "status": "skipped",
+                "mastery_level": state["mastery_level"],
+                "interval_days": state["interval_days"],
+                "due_at": state["due_at"],
+            })
+            continue
+        
+        result = schedule(
+            CardState(
+                ease_factor=state["ease_factor"],
+                interval_days=state["interval_days"],
+                repetitions=state["repetitions"],
+                mastery_level=state["mastery_level"],
+            ),
+            review.grade.value,
+            reviewed_at,
+        )
+        state.update(
+            ease_factor=result.ease_factor,
+            interval_days=result.interval_days,
+            repetitions=result.repetitions,
+            mastery_level=result.mastery_level,
+            due_at=result.due_at,
+            review_count=(state["review_count"] or 0) + 1,
+            last_reviewed_at=reviewed_at,
+            changed=True,
+        )
+        results.append({
+            "index": index,
+            "word_id": review.word_id,
+            "status": "applied",
+            "mastery_level": result.mastery_level,
+            "interval_days": result.interval_days,
+            "due_at": result.due_at,
+        })
+    
+    # 同一生词多次复习只写入最终状态，按主键 executemany
+    changed = [
+        {key: value for key, value in state.items() if key != "changed"}
+        for state in states.values() if state.get("changed")
+    ]
+    if changed:
+        await db.execute(update(Vocabulary), changed)
+        await db.commit()
+    
+    applied = sum(1 for result in results if result["status"] == "applied")
+    return {"applied": applied, "results": results}
+
+
 @router.get("/{word_id}", response_model=VocabularyResponse)
 async def get_word(
     word_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """获取单个生词详情"""
-    word = db.query(Vocabulary).filter(
+    word = await db.scalar(select(Vocabulary).where(
         Vocabulary.id == word_id,
         Vocabulary.user_id == current_user.id
-    ).first()
+    ))
     
     if not word:
         raise HTTPException(status_code=404, detail="生词不存在")
@@ -77,14 +283,14 @@ async def get_word(
 async def update_word(
     word_id: int,
     update_data: VocabularyUpdate,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """更新生词"""
-    word = db.query(Vocabulary).filter(
+    word = await db.scalar(select(Vocabulary).where(
         Vocabulary.id == word_id,
         Vocabulary.user_id == current_user.id
-    ).first()
+    ))
     
     if not word:
         raise HTTPException(status_code=404, detail="生词不存在")
@@ -93,53 +299,68 @@ async def update_word(
     for key, value in update_dict.items():
         setattr(word, key, value)
     
-    db.commit()
-    db.refresh(word)
+    await db.commit()
+    await db.refresh(word)
     return word
 
 
 @router.post("/{word_id}/review", response_model=VocabularyResponse)
 async def review_word(
     word_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    review: Optional[VocabularyReviewRequest] = None,
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
-    """标记已复习"""
-    word = db.query(Vocabulary).filter(
+    """提交复习结果（again/hard/good/easy，不传时按 good 处理），更新下次复习时间"""
+    word = await db.scalar(select(Vocabulary).where(
         Vocabulary.id == word_id,
         Vocabulary.user_id == current_user.id
-    ).first()
+    ))
     
     if not word:
         raise HTTPException(status_code=404, detail="生词不存在")
     
-    word.review_count += 1
-    word.last_reviewed_at = datetime.utcnow()
+    now = datetime.utcnow()
+    grade = (review or VocabularyReviewRequest()).grade.value
+    result = schedule(
+        CardState(
+            ease_factor=word.ease_factor,
+            interval_days=word.interval_days,
+            repetitions=word.repetitions,
+            mastery_level=word.mastery_level,
+        ),
+        grade,
+        now,
+    )
     
-    # 提升掌握程度
-    if word.mastery_level < 5:
-        word.mastery_level += 1
+    word.ease_factor = result.ease_factor
+    word.interval_days = result.interval_days
+    word.repetitions = result.repetitions
+    word.mastery_level = result.mastery_level
+    word.due_at = result.due_at
+    word.review_count += 1
+    word.last_reviewed_at = now
     
-    db.commit()
-    db.refresh(word)
+    await db.commit()
+    await db.refresh(word)
     return word
 
 
 @router.delete("/{word_id}")
 async def delete_word(
     word_id: int,
-    current_user: User = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: CurrentUser = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db)
 ):
     """删除生词"""
-    word = db.query(Vocabulary).filter(
+    word = await db.scalar(select(Vocabulary).where(
         Vocabulary.id == word_id,
         Vocabulary.user_id == current_user.id
-    ).first()
+    ))
     
     if not word:
         raise HTTPException(status_code=404, detail="生词不存在")
     
-    db.delete(word)
-    db.commit()
+    await db.delete(word)
+    await db.commit()
     return {"message": "删除成功"}
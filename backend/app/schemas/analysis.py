@@ -1,9 +1,10 @@
 """
 LumiAI - 分析相关 Schema
 """
-from pydantic import BaseModel
+import json
+from pydantic import BaseModel, field_validator
 from datetime import datetime
-from typing import Optional, List
+from typing import Any, Dict, Optional, List
 
 
 class ErrorRecord(BaseModel):
@@ -55,6 +56,28 @@ class LearningStats(BaseModel):
     streak_days: int  # 连续学习天数
 
 
+class AccuracyBucket(BaseModel):
+    """按类别或题型汇总的正确率"""
+    name: str
+    answers: int
+    correct: int
+    accuracy: int  # 百分比
+
+
+class ErrorTypeCount(BaseModel):
+    """错误类型计数"""
+    error_type: str
+    count: int
+
+
+class LearningBreakdown(BaseModel):
+    """学情明细（来自学情汇总表）"""
+    categories: List[AccuracyBucket]
+    question_types: Dict[str, List[AccuracyBucket]]  # 类别 -> 各题型
+    error_types: List[ErrorTypeCount]
+    pending_count: int  # 尚未完成 AI 分析的错题数
+
+
 class RecommendationItem(BaseModel):
     """推荐项目"""
     id: str
@@ -71,3 +94,37 @@ class AIImprovement(BaseModel):
     title: str
     description: str
     priority: str  # high/medium/low
+
+
+class LearningReportResponse(BaseModel):
+    """学情报告"""
+    id: int
+    report_type: str
+    period_start: datetime
+    period_end: datetime
+    listening_minutes: int
+    reading_minutes: int
+    writing_minutes: int
+    speaking_minutes: int
+    listening_accuracy: int
+    reading_accuracy: int
+    writing_score: Optional[float] = None
+    speaking_score: Optional[float] = None
+    report_data: Optional[Dict[str, Any]] = None
+    ai_suggestions: Optional[str] = None
+    generated_at: datetime
+    
+    @field_validator("report_data", mode="before")
+    @classmethod
+    def parse_report_data(cls, value):
+        # 数据库中以 JSON 字符串存储
+        return json.loads(value) if isinstance(value, str) else value
+    
+    class Config:
+        from_attributes = True
+
+
+class LearningReportListResponse(BaseModel):
+    """学情报告列表（游标分页）"""
+    items: List[LearningReportResponse]
+    next_cursor: Optional[str] = None
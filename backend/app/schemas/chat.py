@@ -27,3 +27,4 @@ class ChatResponse(BaseModel):
 class ChatHistoryResponse(BaseModel):
     """聊天历史响应"""
     messages: List[ChatMessage]
+    next_cursor: Optional[str] = None
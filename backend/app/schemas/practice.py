@@ -1,7 +1,7 @@
 """
 LumiAI - 练习相关 Schema
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional, List
 
@@ -14,8 +14,8 @@ class AnswerSubmit(BaseModel):
 
 class PracticeSessionCreate(BaseModel):
     """创建练习会话请求"""
-    category: str
-    title: Optional[str] = None
+    category: str = Field(..., max_length=20)
+    title: Optional[str] = Field(None, max_length=200)
 
 
 class PracticeSessionResponse(BaseModel):
@@ -58,11 +58,23 @@ class SubmitAnswerRequest(BaseModel):
 
 class SubmitAnswerResponse(BaseModel):
     """提交答案响应"""
+    answer_id: int
     is_correct: bool
     correct_answer: str
     ai_analysis: Optional[str] = None
     ai_correction: Optional[str] = None
     error_type: Optional[str] = None
+    analysis_status: Optional[str] = None  # 错误分析状态：pending/running/done/failed（答对时为空）
+
+
+class AnswerAnalysisResponse(BaseModel):
+    """错误分析结果（轮询用）"""
+    answer_id: int
+    status: Optional[str] = None  # pending/running/done/failed
+    attempts: int = 0
+    error_type: Optional[str] = None
+    ai_analysis: Optional[str] = None
+    ai_correction: Optional[str] = None
 
 
 class PracticeHistoryItem(BaseModel):
@@ -78,3 +90,9 @@ class PracticeHistoryItem(BaseModel):
     
     class Config:
         from_attributes = True
+
+
+class PracticeHistoryResponse(BaseModel):
+    """练习历史（游标分页）"""
+    items: List[PracticeHistoryItem]
+    next_cursor: Optional[str] = None
@@ -1,9 +1,9 @@
 """
 LumiAI - 题目相关 Schema
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 from enum import Enum
 
 
@@ -22,16 +22,16 @@ class QuestionDifficulty(str, Enum):
 
 class QuestionBase(BaseModel):
     """题目基础信息"""
-    category: str
-    question_type: str
-    difficulty: str = "medium"
-    title: str
+    category: str = Field(..., max_length=20)
+    question_type: str = Field(..., max_length=30)
+    difficulty: str = Field("medium", max_length=10)
+    title: str = Field(..., max_length=200)
     passage: Optional[str] = None
     content: str
     options: Optional[str] = None  # JSON 字符串
     answer: str
     explanation: Optional[str] = None
-    source: Optional[str] = None
+    source: Optional[str] = Field(None, max_length=100)
     skill_tags: Optional[str] = None
 
 
@@ -69,3 +69,53 @@ class QuestionFilter(BaseModel):
     question_type: Optional[str] = None
     limit: int = 10
     offset: int = 0
+
+
+class FacetBucket(BaseModel):
+    """单个 类别 × 难度 × 题型 组合的题目数"""
+    category: str
+    difficulty: Optional[str] = None
+    question_type: str
+    count: int
+
+
+class QuestionFacets(BaseModel):
+    """题库分面统计（用于渲染筛选项数量）"""
+    version: int
+    total: int
+    category: Dict[str, int]
+    difficulty: Dict[str, int]
+    question_type: Dict[str, int]
+    buckets: List[FacetBucket]
+
+
+class QuestionListResponse(BaseModel):
+    """题目列表响应"""
+    items: List[QuestionResponse]
+    next_cursor: Optional[str] = None
+    facets: QuestionFacets
+
+
+class QuestionBriefListResponse(BaseModel):
+    """题目列表响应（view=brief，不含文章、答案等大字段）"""
+    items: List[QuestionBrief]
+    next_cursor: Optional[str] = None
+    facets: QuestionFacets
+
+
+class QuestionSearchHit(BaseModel):
+    """全文搜索结果"""
+    id: int
+    category: str
+    question_type: str
+    difficulty: Optional[str] = None
+    title: str
+    source: Optional[str] = None
+    snippet: str
+    score: float
+
+
+class QuestionSearchResponse(BaseModel):
+    """全文搜索响应"""
+    query: str
+    items: List[QuestionSearchHit]
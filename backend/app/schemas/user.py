@@ -1,16 +1,16 @@
 """
 LumiAI - 用户相关 Schema
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
 from typing import Optional
 
 
 class UserBase(BaseModel):
     """用户基础信息"""
-    username: str
-    email: Optional[str] = None
-    target_score: Optional[str] = "7.0"
+    username: str = Field(..., max_length=50)
+    email: Optional[str] = Field(None, max_length=100)
+    target_score: Optional[str] = Field("7.0", max_length=10)
 
 
 class UserCreate(UserBase):
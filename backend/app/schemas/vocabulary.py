@@ -1,17 +1,18 @@
 """
 LumiAI - 生词本相关 Schema
 """
-from pydantic import BaseModel
+from pydantic import BaseModel, Field
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
+from enum import Enum
 
 
 class VocabularyBase(BaseModel):
     """生词基础信息"""
-    word: str
+    word: str = Field(..., max_length=100)
     definition: Optional[str] = None
-    part_of_speech: Optional[str] = None
-    phonetic: Optional[str] = None
+    part_of_speech: Optional[str] = Field(None, max_length=20)
+    phonetic: Optional[str] = Field(None, max_length=100)
     example_sentence: Optional[str] = None
     source_context: Optional[str] = None
 
@@ -27,6 +28,10 @@ class VocabularyResponse(VocabularyBase):
     user_id: int
     mastery_level: int
     review_count: int
+    ease_factor: Optional[float] = None
+    interval_days: Optional[float] = None
+    repetitions: Optional[int] = None
+    due_at: Optional[datetime] = None
     created_at: datetime
     last_reviewed_at: Optional[datetime] = None
     
@@ -38,3 +43,85 @@ class VocabularyUpdate(BaseModel):
     """更新生词请求"""
     definition: Optional[str] = None
     mastery_level: Optional[int] = None
+
+
+class VocabularyListResponse(BaseModel):
+    """生词本列表（游标分页）"""
+    items: List[VocabularyResponse]
+    next_cursor: Optional[str] = None
+
+
+class ReviewGrade(str, Enum):
+    """复习评分"""
+    AGAIN = "again"
+    HARD = "hard"
+    GOOD = "good"
+    EASY = "easy"
+
+
+class VocabularyReviewRequest(BaseModel):
+    """复习结果"""
+    grade: ReviewGrade = ReviewGrade.GOOD
+
+
+class VocabularyDueResponse(BaseModel):
+    """到期待复习的生词"""
+    items: List[VocabularyResponse]
+    next_due_at: Optional[datetime] = None  # 尚未到期的生词中最早的到期时间
+
+
+class VocabularyBulkCreate(BaseModel):
+    """批量添加生词"""
+    items: List[VocabularyCreate] = Field(..., min_length=1, max_length=500)
+
+
+class VocabularyBulkItemResult(BaseModel):
+    """批量添加的单条结果"""
+    index: int
+    word: str
+    status: str  # created / exists（生词本中已有）/ duplicate（本次请求中重复）
+    item: Optional[VocabularyResponse] = None
+
+
+class VocabularyBulkResponse(BaseModel):
+    """批量添加结果"""
+    created: int
+    results: List[VocabularyBulkItemResult]
+
+
+class VocabularyReviewItem(BaseModel):
+    """批量复习中的一条"""
+    word_id: int
+    grade: ReviewGrade = ReviewGrade.GOOD
+    reviewed_at: Optional[datetime] = None  # 离线复习的实际时间，重复上传时据此跳过
+
+
+class VocabularyReviewBatchRequest(BaseModel):
+    """批量提交复习结果"""
+    reviews: List[VocabularyReviewItem] = Field(..., min_length=1, max_length=500)
+
+
+class VocabularyReviewItemResult(BaseModel):
+    """批量复习的单条结果"""
+    index: int
+    word_id: int
+    status: str  # applied / not_found / skipped（已有更晚的复习记录）
+    mastery_level: Optional[int] = None
+    interval_days: Optional[float] = None
+    due_at: Optional[datetime] = None
+
+
+class VocabularyReviewBatchResponse(BaseModel):
+    """批量复习结果"""
+    applied: int
+    results: List[VocabularyReviewItemResult]
+
+
+class DictionaryEntryResponse(BaseModel):
+    """离线词典查询结果"""
+    query: str
+    word: str
+    lemma: str  # 原形（查询词为变形时与 word 一致）
+    phonetic: Optional[str] = None
+    definition: Optional[str] = None
+    part_of_speech: Optional[str] = None
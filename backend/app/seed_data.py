@@ -2,13 +2,31 @@
 LumiAI - 示例数据填充
 预置一些雅思阅读题目用于 Demo 演示
 """
-from app.database import SessionLocal
+from app.database import SessionLocal, reset_id_sequence_sql
 from app.models.user import User
 from app.models.question import Question
 from app.models.practice import PracticeSession, PracticeAnswer
 import json
 
 
+def ensure_demo_user():
+    """确保 Demo 用户存在（应用启动时调用）"""
+    db = SessionLocal()
+    
+    try:
+        if db.get(User, 1):
+            return
+        db.add(User(id=1, username="Sarah", email="sarah@demo.com", target_score="7.5"))
+        db.commit()
+        
+        # 显式指定了主键，PostgreSQL 需要同步自增序列
+        if db.bind.dialect.name == "postgresql":
+            db.execute(reset_id_sequence_sql("users"))
+            db.commit()
+    finally:
+        db.close()
+
+
 def seed_database():
     """填充示例数据"""
     db = SessionLocal()
@@ -137,7 +155,7 @@ Several organizations have proposed ambitious interstellar missions. The Breakth
                 answer=q["answer"],
                 explanation=q.get("explanation"),
                 source=q.get("source"),
-                skill_tags=json.dumps(["阅读理解", "细节定位"])
+                skill_tags=json.dumps(["阅读理解", "细节定位"], ensure_ascii=False)
             )
             db.add(question)
         
@@ -172,7 +190,7 @@ Several organizations have proposed ambitious interstellar missions. The Breakth
                 answer=q["answer"],
                 explanation=q.get("explanation"),
                 source=q.get("source"),
-                skill_tags=json.dumps(["听力理解", "细节捕捉"])
+                skill_tags=json.dumps(["听力理解", "细节捕捉"], ensure_ascii=False)
             )
             db.add(question)
         
@@ -189,7 +207,7 @@ Discuss both views and give your own opinion.
 Write at least 250 words.""",
             answer="This is an open-ended essay question.",
             source="Cambridge 18 - Writing Task 2",
-            skill_tags=json.dumps(["论证能力", "语法运用", "词汇多样性"])
+            skill_tags=json.dumps(["论证能力", "语法运用", "词汇多样性"], ensure_ascii=False)
         )
         db.add(writing_question)
         
@@ -209,7 +227,7 @@ You should say:
 And explain how it has changed people's lives.""",
             answer="Open-ended speaking task",
             source="Speaking Part 2 - Current Topics",
-            skill_tags=json.dumps(["流利度", "发音", "词汇"])
+            skill_tags=json.dumps(["流利度", "发音", "词汇"], ensure_ascii=False)
         )
         db.add(speaking_question)
         
@@ -237,6 +255,11 @@ And explain how it has changed people's lives.""",
         db.add(session2)
         
         db.commit()
+        
+        # Demo 用户使用了显式主键，PostgreSQL 需要同步自增序列
+        if db.bind.dialect.name == "postgresql":
+            db.execute(reset_id_sequence_sql("users"))
+            db.commit()
         print("示例数据填充完成！")
         
     except Exception as e:
@@ -1,7 +1,9 @@
 """
 LumiAI - AI 服务（封装 DeepSeek API）
 """
-from typing import List, Dict, Optional
+import importlib.util
+import json
+from typing import AsyncIterator, List, Dict, Optional
 
 import httpx
 
@@ -13,6 +15,48 @@ DEEPSEEK_BASE_URL = "https://api.deepseek.com"
 DEEPSEEK_MODEL = "deepseek-chat"
 REQUEST_TIMEOUT = 30.0
 
+# 进程级共享的 HTTP 客户端，由 main.lifespan 创建和关闭
+_http_client: Optional[httpx.AsyncClient] = None
+
+
+def _build_http_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.deepseek_max_connections,
+        max_keepalive_connections=settings.deepseek_max_keepalive_connections,
+        keepalive_expiry=settings.deepseek_keepalive_expiry,
+    )
+    # HTTP/2 依赖可选的 h2 包，未安装时回退到 HTTP/1.1 keep-alive
+    http2 = settings.deepseek_http2 and importlib.util.find_spec("h2") is not None
+    return httpx.AsyncClient(
+        base_url=DEEPSEEK_BASE_URL,
+        timeout=REQUEST_TIMEOUT,
+        limits=limits,
+        http2=http2,
+    )
+
+
+async def init_http_client() -> None:
+    """创建共享的 DeepSeek 客户端（应用启动时调用）"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+
+
+async def close_http_client() -> None:
+    """关闭共享客户端并释放连接池（应用关闭时调用）"""
+    global _http_client
+    if _http_client is not None:
+        await _http_client.aclose()
+        _http_client = None
+
+
+def get_http_client() -> httpx.AsyncClient:
+    """获取共享客户端；未经 lifespan 启动时（如脚本中）惰性创建"""
+    global _http_client
+    if _http_client is None or _http_client.is_closed:
+        _http_client = _build_http_client()
+    return _http_client
+
 
 def _require_api_key() -> None:
     if not settings.deepseek_api_key:
@@ -45,12 +89,10 @@ async def _chat_completion(
         "Content-Type": "application/json",
     }
 
-    async with httpx.AsyncClient(
-        base_url=DEEPSEEK_BASE_URL, timeout=REQUEST_TIMEOUT
-    ) as client:
-        response = await client.post("/chat/completions", json=payload, headers=headers)
-        response.raise_for_status()
-        data = response.json()
+    client = get_http_client()
+    response = await client.post("/chat/completions", json=payload, headers=headers)
+    response.raise_for_status()
+    data = response.json()
 
     choices = data.get("choices", [])
     if not choices:
@@ -72,6 +114,21 @@ TUTOR_SYSTEM_PROMPT = """你叫 Lumina，是一位雅思(IELTS)备考专家 AI 
 回答要简洁明了，不要长篇大论，除非学生要求详细解释。"""
 
 
+def _build_tutor_messages(message: str, history: Optional[List[Dict]]) -> List[Dict[str, str]]:
+    messages: List[Dict[str, str]] = [
+        {"role": "system", "content": TUTOR_SYSTEM_PROMPT}
+    ]
+
+    if history:
+        for h in history[-8:]:
+            messages.append(
+                {"role": _map_role(h.get("role", "")), "content": h.get("content", "")}
+            )
+
+    messages.append({"role": "user", "content": message})
+    return messages
+
+
 async def chat_with_ai(message: str, history: Optional[List[Dict]] = None) -> str:
     """
     与 AI 导师对话
@@ -84,20 +141,8 @@ async def chat_with_ai(message: str, history: Optional[List[Dict]] = None) -> st
         AI 响应文本
     """
     try:
-        messages: List[Dict[str, str]] = [
-            {"role": "system", "content": TUTOR_SYSTEM_PROMPT}
-        ]
-
-        if history:
-            for h in history[-8:]:
-                messages.append(
-                    {"role": _map_role(h.get("role", "")), "content": h.get("content", "")}
-                )
-
-        messages.append({"role": "user", "content": message})
-
         return await _chat_completion(
-            messages=messages,
+            messages=_build_tutor_messages(message, history),
             temperature=0.7,
             max_tokens=1024,
         )
@@ -106,9 +151,52 @@ async def chat_with_ai(message: str, history: Optional[List[Dict]] = None) -> st
         return f"很抱歉，处理您的请求时出现了错误: {str(e)}"
 
 
-async def analyze_error(question_content: str, correct_answer: str, user_answer: str) -> Dict:
+async def stream_chat_with_ai(
+    message: str, history: Optional[List[Dict]] = None
+) -> AsyncIterator[str]:
+    """
+    与 AI 导师对话（流式），逐段产出增量文本
+
+    调用方停止迭代或任务被取消时，上游连接随 client.stream 上下文一起关闭，
+    DeepSeek 不再继续生成。失败时抛出异常，由调用方决定如何提示。
+    """
+    _require_api_key()
+
+    payload = {
+        "model": DEEPSEEK_MODEL,
+        "messages": _build_tutor_messages(message, history),
+        "temperature": 0.7,
+        "max_tokens": 1024,
+        "stream": True,
+    }
+    headers = {
+        "Authorization": f"Bearer {settings.deepseek_api_key}",
+        "Content-Type": "application/json",
+        "Accept": "text/event-stream",
+    }
+
+    client = get_http_client()
+    async with client.stream(
+        "POST", "/chat/completions", json=payload, headers=headers
+    ) as response:
+        response.raise_for_status()
+        async for line in response.aiter_lines():
+            if not line.startswith("data:"):
+                continue
+            data = line[len("data:"):].strip()
+            if data == "[DONE]":
+                break
+            choices = json.loads(data).get("choices", [])
+            if not choices:
+                continue
+            delta = choices[0].get("delta", {}).get("content")
+            if delta:
+                yield delta
+
+
+async def request_error_analysis(question_content: str, correct_answer: str, user_answer: str) -> Dict:
     """
-    分析用户的错误答案
+    调用 DeepSeek 分析错误答案，失败时抛出异常（供后台队列重试）
 
     Returns:
         {
@@ -117,8 +205,7 @@ async def analyze_error(question_content: str, correct_answer: str, user_answer:
             "correction": "纠正建议"
         }
     """
-    try:
-        prompt = f"""分析以下雅思题目的错误答案，并提供专业的诊断：
+    prompt = f"""分析以下雅思题目的错误答案，并提供专业的诊断：
 
 题目内容：
 {question_content}
@@ -133,24 +220,38 @@ async def analyze_error(question_content: str, correct_answer: str, user_answer:
     "correction": "用中文给出纠正建议（1-2句话）"
 }}"""
 
-        text = await _chat_completion(
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.3,
-            max_tokens=512,
-        )
+    text = await _chat_completion(
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.3,
+        max_tokens=512,
+    )
 
-        import json
+    # 移除可能的 markdown 代码块标记
+    if text.startswith("```"):
+        text = text.split("\n", 1)[1]
+    if text.endswith("```"):
+        text = text.rsplit("```", 1)[0]
+    text = text.strip()
 
-        # 移除可能的 markdown 代码块标记
-        if text.startswith("```"):
-            text = text.split("\n", 1)[1]
-        if text.endswith("```"):
-            text = text.rsplit("```", 1)[0]
-        text = text.strip()
+    result = json.loads(text)
+    if not isinstance(result, dict):
+        raise ValueError("DeepSeek 返回的分析格式不正确")
+    return result
 
-        result = json.loads(text)
-        return result
 
+async def analyze_error(question_content: str, correct_answer: str, user_answer: str) -> Dict:
+    """
+    分析用户的错误答案（失败时返回兜底结果）
+
+    Returns:
+        {
+            "error_type": "grammar/logic/vocabulary",
+            "analysis": "错误分析",
+            "correction": "纠正建议"
+        }
+    """
+    try:
+        return await request_error_analysis(question_content, correct_answer, user_answer)
     except Exception as e:
         print(f"错误分析失败: {e}")
         return {
@@ -160,12 +261,36 @@ async def analyze_error(question_content: str, correct_answer: str, user_answer:
         }
 
 
-async def generate_similar_question(original_question: str, error_type: str) -> str:
+REPORT_TYPE_NAMES = {"daily": "今日", "weekly": "本周", "monthly": "本月"}
+
+
+async def request_report_suggestions(report_type: str, report_data: Dict) -> str:
     """
-    根据错题生成相似的练习题
+    根据学情报告数据生成学习建议，失败时抛出异常（由报告调度器计数并跳过）
     """
-    try:
-        prompt = f"""作为雅思考试专家，请根据以下原题和错误类型，生成一道相似的练习题：
+    period = REPORT_TYPE_NAMES.get(report_type, "本期")
+    prompt = f"""以下是一位雅思考生{period}的学习统计（JSON）：
+
+{json.dumps(report_data, ensure_ascii=False)}
+
+minutes 为各科练习分钟数，accuracy 为各科正确率（百分比），
+question_types 为各题型的答题数和正确率，error_types 为错题的错误类型分布。
+
+请用中文给出 3 条具体的学习建议，每条一行，以 "- " 开头，不要其他内容。"""
+
+    text = await _chat_completion(
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.5,
+        max_tokens=512,
+    )
+    return text.strip()
+
+
+async def request_similar_question(original_question: str, error_type: str) -> str:
+    """
+    根据错题生成相似的练习题，失败时抛出异常（失败结果不能进入相似题池）
+    """
+    prompt = f"""作为雅思考试专家，请根据以下原题和错误类型，生成一道相似的练习题：
 
 原题：
 {original_question}
@@ -178,12 +303,19 @@ async def generate_similar_question(original_question: str, error_type: str) ->
 2. 然后在括号中给出简短提示
 3. 不要给出答案"""
 
-        return await _chat_completion(
-            messages=[{"role": "user", "content": prompt}],
-            temperature=0.8,
-            max_tokens=512,
-        )
+    return await _chat_completion(
+        messages=[{"role": "user", "content": prompt}],
+        temperature=0.8,
+        max_tokens=512,
+    )
 
+
+async def generate_similar_question(original_question: str, error_type: str) -> str:
+    """
+    根据错题生成相似的练习题
+    """
+    try:
+        return await request_similar_question(original_question, error_type)
     except Exception as e:
         print(f"生成相似题失败: {e}")
         return f"生成失败: {str(e)}"
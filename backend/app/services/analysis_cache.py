@@ -0,0 +1,166 @@
+"""
+LumiAI - 错误分析结果缓存
+
+同一道题的同一种错误答案（如 NOT GIVEN 题答成 TRUE）分析结果相同，
+按 (题目 id、题目内容、正确答案、归一化学生答案) 的哈希寻址，
+先查进程内 LRU，再查持久化的 analysis_cache 表，都未命中才调用 DeepSeek。
+持久化缓存的命中次数（hit_count）先在内存中累计，随定期清理一起批量写回，命中时不写数据库。
+"""
+import hashlib
+import re
+from datetime import datetime, timedelta
+from collections import Counter
+from typing import Dict, Optional
+
+from sqlalchemy import bindparam, delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.practice import AnalysisCacheEntry
+from app.models.question import Question
+from app.services.cache import TTLCache
+
+settings = get_settings()
+
+# 超过此长度的答案（作文、长段口语稿）几乎不会重复，不做缓存
+MAX_CACHEABLE_ANSWER_LENGTH = 200
+
+# 每写入多少条执行一次过期清理和容量裁剪
+_PRUNE_EVERY = 100
+
+_WHITESPACE_RE = re.compile(r"\s+")
+_TRIM_PUNCTUATION = " \t\r\n.,;:!?。，；：！？\"'()（）"
+
+
+def normalize_answer(answer: str) -> str:
+    """归一化答案：忽略大小写、首尾标点和多余空白"""
+    return _WHITESPACE_RE.sub(" ", answer.casefold()).strip(_TRIM_PUNCTUATION)
+
+
+def make_cache_key(question: Question, user_answer: str) -> Optional[str]:
+    """生成缓存键；不适合缓存的答案返回 None"""
+    normalized = normalize_answer(user_answer)
+    if not normalized or len(normalized) > MAX_CACHEABLE_ANSWER_LENGTH:
+        return None
+    content_hash = hashlib.sha256(question.content.encode("utf-8")).hexdigest()
+    raw = "\x1f".join([
+        str(question.id),
+        content_hash,
+        normalize_answer(question.answer),
+        normalized,
+    ])
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class AnalysisCache:
+    """两级缓存：进程内 LRU + 数据库表"""
+
+    def __init__(self, ttl: int, memory_size: int, max_rows: int):
+        self.ttl = ttl
+        self.max_rows = max_rows
+        self._memory = TTLCache(maxsize=memory_size, ttl=ttl)
+        # 尚未写回的持久化缓存命中次数 {cache_key: 次数}；进程退出时未写回的部分丢失，只影响统计
+        self._pending_hits: Counter = Counter()
+        self.db_hits = 0
+        self.db_misses = 0
+        self.stores = 0
+
+    async def get(self, key: str) -> Optional[Dict]:
+        result = self._memory.get(key)
+        if result is not None:
+            return result
+
+        async with AsyncSessionLocal() as db:
+            entry = await db.scalar(
+                select(AnalysisCacheEntry).where(
+                    AnalysisCacheEntry.cache_key == key,
+                    AnalysisCacheEntry.expires_at > datetime.utcnow(),
+                )
+            )
+            if entry is None:
+                self.db_misses += 1
+                return None
+            result = {
+                "error_type": entry.error_type,
+                "analysis": entry.ai_analysis,
+                "correction": entry.ai_correction,
+            }
+            remaining = (entry.expires_at - datetime.utcnow()).total_seconds()
+
+        self.db_hits += 1
+        self._pending_hits[key] += 1
+        self._memory.set(key, result, ttl=max(remaining, 0))
+        return result
+
+    async def put(self, key: str, question_id: int, result: Dict) -> None:
+        result = {
+            "error_type": str(result.get("error_type") or "unknown")[:50],
+            "analysis": result.get("analysis", ""),
+            "correction": result.get("correction", ""),
+        }
+        self._memory.set(key, result)
+
+        async with AsyncSessionLocal() as db:
+            db.add(AnalysisCacheEntry(
+                cache_key=key,
+                question_id=question_id,
+                error_type=result["error_type"],
+                ai_analysis=result["analysis"],
+                ai_correction=result["correction"],
+                expires_at=datetime.utcnow() + timedelta(seconds=self.ttl),
+            ))
+            try:
+                await db.commit()
+                self.stores += 1
+            except IntegrityError:
+                # 其他 worker 已写入同一键
+                await db.rollback()
+
+        if self.stores and self.stores % _PRUNE_EVERY == 0:
+            await self.prune()
+
+    async def prune(self) -> None:
+        """写回累计的命中次数，删除过期条目，并按最早写入顺序裁剪到 max_rows 以内"""
+        hits, self._pending_hits = self._pending_hits, Counter()
+        async with AsyncSessionLocal() as db:
+            if hits:
+                table = AnalysisCacheEntry.__table__
+                await db.execute(
+                    update(table)
+                    .where(table.c.cache_key == bindparam("key"))
+                    .values(hit_count=func.coalesce(table.c.hit_count, 0) + bindparam("hits")),
+                    [{"key": key, "hits": count} for key, count in hits.items()],
+                )
+            await db.execute(delete(AnalysisCacheEntry).where(
+                AnalysisCacheEntry.expires_at <= datetime.utcnow()
+            ))
+            cutoff = await db.scalar(
+                select(AnalysisCacheEntry.id).order_by(
+                    AnalysisCacheEntry.id.desc()
+                ).offset(self.max_rows).limit(1)
+            )
+            if cutoff is not None:
+                await db.execute(delete(AnalysisCacheEntry).where(
+                    AnalysisCacheEntry.id <= cutoff
+                ))
+            await db.commit()
+
+    def stats(self) -> Dict:
+        memory = self._memory.stats()
+        lookups = memory["hits"] + memory["misses"]
+        hits = memory["hits"] + self.db_hits
+        return {
+            "memory": memory,
+            "db_hits": self.db_hits,
+            "db_misses": self.db_misses,
+            "stores": self.stores,
+            "hit_rate": round(hits / lookups, 4) if lookups else 0.0,
+        }
+
+
+analysis_cache = AnalysisCache(
+    ttl=settings.analysis_cache_ttl,
+    memory_size=settings.analysis_cache_memory_size,
+    max_rows=settings.analysis_cache_max_rows,
+)
@@ -0,0 +1,239 @@
+"""
+LumiAI - AI 错误分析后台队列
+
+提交答案时只写入 AnalysisJob，由本进程内的有限个 worker 异步调用 DeepSeek，
+完成后回填 PracticeAnswer 的 error_type / ai_analysis / ai_correction。
+任务持久化在数据库中：进程重启或多个 gunicorn worker 并存时，
+定时扫描会重新拾取 pending 任务和中断的 running 任务，
+通过条件 UPDATE 抢占保证同一任务只被一个 worker 执行。
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import List, Optional, Set, Tuple
+
+from sqlalchemy import or_, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.practice import AnalysisJob, PracticeAnswer
+from app.models.question import Question
+from app.services import learning_rollups
+from app.services.ai_service import request_error_analysis
+from app.services.analysis_cache import analysis_cache, make_cache_key
+
+settings = get_settings()
+
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+FALLBACK_ANALYSIS = "暂时无法生成分析"
+FALLBACK_CORRECTION = "请稍后重试"
+
+
+class AnalysisQueue:
+    """进程内的分析任务队列，任务状态以数据库为准"""
+
+    def __init__(self, concurrency: int, max_attempts: int, retry_delay: float,
+                 poll_interval: float, stale_after: float):
+        self.concurrency = concurrency
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.poll_interval = poll_interval
+        self.stale_after = stale_after
+
+        self._queue: Optional[asyncio.Queue] = None
+        self._queued: Set[int] = set()
+        self._tasks: List[asyncio.Task] = []
+
+    async def start(self) -> None:
+        """启动 worker 和定时扫描（应用启动时调用）"""
+        if self._tasks:
+            return
+        self._queue = asyncio.Queue()
+        self._tasks = [
+            asyncio.create_task(self._worker()) for _ in range(self.concurrency)
+        ]
+        self._tasks.append(asyncio.create_task(self._sweeper()))
+
+    async def stop(self) -> None:
+        """停止所有后台任务；未完成的任务保留在数据库中，下次启动时恢复"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queued.clear()
+        self._queue = None
+
+    def enqueue(self, job_id: int) -> None:
+        """将已提交到数据库的任务放入本进程队列"""
+        if self._queue is None or job_id in self._queued:
+            return
+        self._queued.add(job_id)
+        self._queue.put_nowait(job_id)
+
+    async def _sweeper(self) -> None:
+        while True:
+            try:
+                for job_id in await self._due_job_ids():
+                    self.enqueue(job_id)
+            except Exception as e:
+                print(f"扫描分析任务失败: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def _due_job_ids(self) -> List[int]:
+        """到期的 pending 任务，以及 running 超时（worker 中断）的任务"""
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=self.stale_after)
+        async with AsyncSessionLocal() as db:
+            rows = await db.scalars(
+                select(AnalysisJob.id).where(
+                    or_(
+                        (AnalysisJob.status == JOB_PENDING) & (AnalysisJob.next_run_at <= now),
+                        (AnalysisJob.status == JOB_RUNNING) & (AnalysisJob.updated_at < stale_before),
+                    )
+                ).order_by(AnalysisJob.id).limit(500)
+            )
+            return list(rows)
+
+    async def _worker(self) -> None:
+        while True:
+            job_id = await self._queue.get()
+            self._queued.discard(job_id)
+            try:
+                await self._run_job(job_id)
+            except Exception as e:
+                print(f"分析任务 {job_id} 执行异常: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _claim(self, job_id: int) -> bool:
+        """原子地将任务标记为 running，抢占失败说明已被其他 worker 处理"""
+        now = datetime.utcnow()
+        stale_before = now - timedelta(seconds=self.stale_after)
+        async with AsyncSessionLocal() as db:
+            result = await db.execute(
+                update(AnalysisJob)
+                .where(
+                    AnalysisJob.id == job_id,
+                    or_(
+                        AnalysisJob.status == JOB_PENDING,
+                        (AnalysisJob.status == JOB_RUNNING) & (AnalysisJob.updated_at < stale_before),
+                    ),
+                )
+                .values(status=JOB_RUNNING, attempts=AnalysisJob.attempts + 1, updated_at=now)
+            )
+            await db.commit()
+            return result.rowcount == 1
+
+    async def _run_job(self, job_id: int) -> None:
+        if not await self._claim(job_id):
+            return
+
+        async with AsyncSessionLocal() as db:
+            job, answer = await self._load(db, job_id)
+            if answer is None:
+                return
+            question = await db.get(Question, answer.question_id)
+            if not question:
+                await self._mark_missing(db, job)
+                return
+            question_id = question.id
+            question_content = question.content
+            correct_answer = question.answer
+            user_answer = answer.user_answer
+            cache_key = make_cache_key(question, user_answer)
+
+        # 同题同错答案可能已被其他任务分析过
+        result = await analysis_cache.get(cache_key) if cache_key else None
+        if result is None:
+            try:
+                result = await request_error_analysis(
+                    question_content=question_content,
+                    correct_answer=correct_answer,
+                    user_answer=user_answer,
+                )
+            except Exception as e:
+                await self._record_failure(job_id, str(e))
+                return
+            if cache_key:
+                await analysis_cache.put(cache_key, question_id, result)
+
+        await self._record_success(job_id, result)
+
+    async def _mark_missing(self, db: AsyncSession, job: AnalysisJob) -> None:
+        job.status = JOB_FAILED
+        job.last_error = "答案或题目已不存在"
+        await db.commit()
+
+    async def _load(self, db: AsyncSession,
+                    job_id: int) -> Tuple[Optional[AnalysisJob], Optional[PracticeAnswer]]:
+        """读取任务及其答案；任务不存在时返回 (None, None)，答案已删除时将任务标记为失败"""
+        job = await db.get(AnalysisJob, job_id)
+        if job is None:
+            return None, None
+        answer = await db.get(PracticeAnswer, job.answer_id)
+        if answer is None:
+            await self._mark_missing(db, job)
+        return job, answer
+
+    async def _classify(self, db: AsyncSession, answer: PracticeAnswer, error_type: str) -> bool:
+        """回填错误类型，并在同一事务内把学情汇总从 pending 桶移到该类型，返回是否由本任务回填
+
+        用条件 UPDATE 回填：超时被重新领取的任务可能与原任务同时完成，
+        只有真正把 error_type 从 NULL 改掉的一方移动汇总桶、写入分析内容，避免重复计数和前后矛盾
+        """
+        classified = await db.execute(
+            update(PracticeAnswer)
+            .where(PracticeAnswer.id == answer.id, PracticeAnswer.error_type.is_(None))
+            .values(error_type=error_type)
+        )
+        if classified.rowcount != 1:
+            return False
+        question = await db.get(Question, answer.question_id)
+        await learning_rollups.reclassify_answer(
+            db, answer.user_id, question, error_type, answer.created_at.date()
+        )
+        return True
+
+    async def _record_success(self, job_id: int, result: dict) -> None:
+        async with AsyncSessionLocal() as db:
+            job, answer = await self._load(db, job_id)
+            if answer is None:
+                return
+            if await self._classify(db, answer, str(result.get("error_type") or "unknown")[:50]):
+                answer.ai_analysis = result.get("analysis", "")
+                answer.ai_correction = result.get("correction", "")
+            job.status = JOB_DONE
+            job.last_error = None
+            await db.commit()
+
+    async def _record_failure(self, job_id: int, error: str) -> None:
+        async with AsyncSessionLocal() as db:
+            job, answer = await self._load(db, job_id)
+            if answer is None:
+                return
+            job.last_error = error[:500]
+            if job.attempts < self.max_attempts:
+                # 指数退避后由定时扫描重新入队
+                delay = self.retry_delay * (2 ** (job.attempts - 1))
+                job.status = JOB_PENDING
+                job.next_run_at = datetime.utcnow() + timedelta(seconds=delay)
+            else:
+                print(f"分析任务 {job_id} 重试 {job.attempts} 次后仍失败: {error}")
+                if await self._classify(db, answer, "unknown"):
+                    answer.ai_analysis = FALLBACK_ANALYSIS
+                    answer.ai_correction = FALLBACK_CORRECTION
+                job.status = JOB_FAILED
+            await db.commit()
+
+
+analysis_queue = AnalysisQueue(
+    concurrency=settings.analysis_worker_concurrency,
+    max_attempts=settings.analysis_max_attempts,
+    retry_delay=settings.analysis_retry_delay,
+    poll_interval=settings.analysis_poll_interval,
+    stale_after=settings.analysis_stale_after,
+)
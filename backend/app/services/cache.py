@@ -0,0 +1,101 @@
+"""
+LumiAI - 进程内缓存工具
+"""
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, Optional
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session, SessionTransaction
+
+_MISSING = object()
+_PENDING_INVALIDATIONS = "pending_cache_invalidations"
+
+
+class TTLCache:
+    """带过期时间的 LRU 缓存（线程安全），并记录命中率"""
+
+    def __init__(self, maxsize: int, ttl: float):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        # 失效计数：读数据前记下，写入缓存时传给 set，期间发生过失效则不写入（避免缓存失效前读到的旧数据）
+        self.generation = 0
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        now = time.monotonic()
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING or item[0] < now:
+                if item is not _MISSING:
+                    del self._data[key]
+                self.misses += 1
+                return default
+            self._data.move_to_end(key)
+            self.hits += 1
+            return item[1]
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None,
+            generation: Optional[int] = None) -> None:
+        expires_at = time.monotonic() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (expires_at, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self.generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
+
+
+def invalidate_after_commit(session: Optional[Session], key: Hashable,
+                            callback: Callable[[], None]) -> None:
+    """
+    在 session 的事务提交后执行缓存失效，事务回滚时丢弃；同一 key 只执行一次
+
+    在 ORM 事件（flush 时触发）中直接失效的话，提交前并发读取仍会把旧数据放回缓存；
+    对象不属于任何 session 时立即执行。
+    """
+    if session is None:
+        callback()
+        return
+    session.info.setdefault(_PENDING_INVALIDATIONS, {})[key] = callback
+
+
+@event.listens_for(Session, "after_commit")
+def _run_invalidations(session: Session) -> None:
+    for callback in session.info.pop(_PENDING_INVALIDATIONS, {}).values():
+        callback()
+
+
+@event.listens_for(Session, "after_transaction_end")
+def _discard_invalidations(session: Session, transaction: SessionTransaction) -> None:
+    # 提交时已在 after_commit 中执行并移除；走到这里说明最外层事务被回滚或关闭
+    if transaction.parent is None:
+        session.info.pop(_PENDING_INVALIDATIONS, None)
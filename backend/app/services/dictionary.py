@@ -0,0 +1,351 @@
+"""
+LumiAI - 离线词典查询
+
+词典数据来自本地 ECDICT 格式的 CSV（word, phonetic, definition, translation, pos, ..., exchange, ...），
+首次查询时转换为 SQLite 索引文件（与 CSV 同目录的 *.sqlite），之后只打开索引，不再解析 CSV；
+CSV 更新（大小或修改时间变化）后自动重建并重新打开。服务启动时不加载词典。
+多 worker 部署时应在部署阶段用 python -m app.services.dictionary 预先建立索引，
+否则每个 worker 首次查询时都会各自构建一次（各写各的临时文件，最后原子替换，互不破坏）。
+
+查询顺序：原词 -> exchange 字段中的词形变化（went -> go）-> 规则还原（studies -> study），
+结果按小写单词做 LRU 缓存。单次未命中缓存的查询是一次主键查找，不访问网络。
+"""
+import asyncio
+import csv
+import os
+import re
+import sqlite3
+import tempfile
+import threading
+from dataclasses import dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app.config import get_settings
+
+settings = get_settings()
+
+INDEX_VERSION = "1"  # 索引结构变化时递增，旧索引自动重建
+
+# 写入索引的批量大小
+BUILD_BATCH_SIZE = 10000
+
+# exchange 字段：p 过去式、d 过去分词、i 现在分词、3 第三人称单数、s 复数、r 比较级、t 最高级、0 原形
+INFLECTION_KEYS = ("p", "d", "i", "3", "s", "r", "t")
+
+# ECDICT 释义中的词性缩写 -> 生词本使用的写法
+POS_ALIASES = {
+    "a": "adj",
+    "adj": "adj",
+    "ad": "adv",
+    "adv": "adv",
+    "n": "n",
+    "v": "v",
+    "vt": "vt",
+    "vi": "vi",
+    "prep": "prep",
+    "conj": "conj",
+    "pron": "pron",
+    "num": "num",
+    "art": "art",
+    "int": "int",
+    "interj": "int",
+    "abbr": "abbr",
+    "aux": "aux",
+}
+
+_POS_RE = re.compile(r"^\s*([a-z]+)\.")
+
+# 规则词形还原：(后缀, 替换)，按顺序尝试，候选词须在词典中存在
+SUFFIX_RULES = [
+    ("ies", "y"), ("ied", "y"), ("ier", "y"), ("iest", "y"),
+    ("ves", "f"), ("ves", "fe"),
+    ("es", ""), ("s", ""),
+    ("ed", ""), ("ed", "e"), ("ing", ""), ("ing", "e"),
+    ("er", ""), ("er", "e"), ("est", ""), ("est", "e"),
+]
+
+
+class DictionaryUnavailable(Exception):
+    """词典文件不存在或无法读取"""
+
+
+@dataclass(frozen=True)
+class DictionaryEntry:
+    word: str
+    lemma: str
+    phonetic: Optional[str]
+    definition: Optional[str]
+    part_of_speech: Optional[str]
+
+
+def normalize_word(word: str) -> str:
+    return word.strip().lower()
+
+
+def parse_exchange(exchange: str) -> Dict[str, str]:
+    """解析 "p:went/d:gone/i:going/3:goes" 形式的词形变化"""
+    forms = {}
+    for part in (exchange or "").split("/"):
+        key, sep, value = part.partition(":")
+        if sep and value:
+            forms[key] = value
+    return forms
+
+
+def parse_part_of_speech(translation: str) -> Optional[str]:
+    """取释义第一行的词性缩写（如 "vt. 研究" -> vt）"""
+    match = _POS_RE.match(translation or "")
+    if not match:
+        return None
+    return POS_ALIASES.get(match.group(1))
+
+
+def _clean(text: Optional[str]) -> Optional[str]:
+    # ECDICT 的多行释义以字面 "\n" 存储
+    text = (text or "").replace("\\n", "\n").strip()
+    return text or None
+
+
+def _rule_candidates(word: str) -> Iterator[str]:
+    for suffix, replacement in SUFFIX_RULES:
+        if word.endswith(suffix) and len(word) > len(suffix) + 1:
+            stem = word[: -len(suffix)]
+            yield stem + replacement
+            # 双写辅音：stopped -> stop, bigger -> big
+            if not replacement and len(stem) > 2 and stem[-1] == stem[-2]:
+                yield stem[:-1]
+
+
+def _read_csv(path: Path) -> Iterator[Tuple[Tuple, List[Tuple[str, str]]]]:
+    """逐行产出 (词条行, [(变形, 原形)])"""
+    csv.field_size_limit(1 << 24)
+    with path.open(encoding="utf-8", newline="") as f:
+        for row in csv.DictReader(f):
+            word = (row.get("word") or "").strip()
+            if not word:
+                continue
+            translation = _clean(row.get("translation"))
+            exchange = parse_exchange(row.get("exchange"))
+            key = word.lower()
+            lemma = exchange.get("0", key).lower()
+            entry = (
+                key,
+                word,
+                lemma,
+                _clean(row.get("phonetic")),
+                translation or _clean(row.get("definition")),
+                parse_part_of_speech(translation or ""),
+            )
+            forms = [(exchange[k].lower(), key) for k in INFLECTION_KEYS if k in exchange]
+            if lemma != key:
+                forms.append((key, lemma))
+            yield entry, forms
+
+
+class Dictionary:
+    """ECDICT 词典的 SQLite 索引，首次查询时打开（必要时构建）"""
+
+    def __init__(self, csv_path: str, index_path: str = "", cache_size: int = 4096):
+        self.csv_path = Path(csv_path)
+        self.index_path = Path(index_path) if index_path else self.csv_path.with_name(
+            self.csv_path.name + ".sqlite"
+        )
+        self._conn: Optional[sqlite3.Connection] = None
+        self._opened_source: Optional[str] = None   # 打开索引时 CSV 的指纹
+        self._lock = threading.Lock()
+        self._cached_lookup = lru_cache(maxsize=cache_size)(self._lookup)
+
+    @property
+    def loaded(self) -> bool:
+        return self._conn is not None
+
+    def _source_fingerprint(self) -> Optional[str]:
+        if not self.csv_path.exists():
+            return None
+        stat = self.csv_path.stat()
+        return f"{INDEX_VERSION}:{stat.st_size}:{int(stat.st_mtime)}"
+
+    def _index_fingerprint(self) -> Optional[str]:
+        if not self.index_path.exists():
+            return None
+        try:
+            conn = sqlite3.connect(f"file:{self.index_path}?mode=ro", uri=True)
+            try:
+                row = conn.execute("SELECT value FROM meta WHERE key = 'source'").fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None
+        return row[0] if row else None
+
+    def build_index(self) -> int:
+        """从 CSV 构建索引文件，返回词条数；先写临时文件再替换，中断时不会留下半个索引"""
+        fingerprint = self._source_fingerprint()
+        if fingerprint is None:
+            raise DictionaryUnavailable(f"词典文件不存在: {self.csv_path}")
+
+        # 每次构建使用独立的临时文件：多个进程同时构建时不会删除或写坏彼此的文件
+        fd, tmp_name = tempfile.mkstemp(
+            dir=self.index_path.parent, prefix=self.index_path.name + ".", suffix=".tmp"
+        )
+        os.close(fd)
+        tmp = Path(tmp_name)
+        conn = sqlite3.connect(tmp)
+        count = 0
+        try:
+            conn.executescript("""
+                PRAGMA journal_mode = OFF;
+                PRAGMA synchronous = OFF;
+                CREATE TABLE entries (
+                    key TEXT PRIMARY KEY, word TEXT NOT NULL, lemma TEXT NOT NULL,
+                    phonetic TEXT, definition TEXT, part_of_speech TEXT
+                ) WITHOUT ROWID;
+                CREATE TABLE forms (form TEXT PRIMARY KEY, lemma TEXT NOT NULL) WITHOUT ROWID;
+                CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT NOT NULL);
+            """)
+            entries: List[Tuple] = []
+            forms: List[Tuple[str, str]] = []
+
+            def flush() -> None:
+                # 大小写不同的同形词（US / us）只保留一条，优先小写形式
+                conn.executemany(
+                    "INSERT INTO entries VALUES (?, ?, ?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET"
+                    " word = excluded.word, lemma = excluded.lemma, phonetic = excluded.phonetic,"
+                    " definition = excluded.definition, part_of_speech = excluded.part_of_speech"
+                    " WHERE excluded.word = excluded.key AND entries.word != entries.key",
+                    entries,
+                )
+                conn.executemany("INSERT OR IGNORE INTO forms VALUES (?, ?)", forms)
+                entries.clear()
+                forms.clear()
+
+            for entry, entry_forms in _read_csv(self.csv_path):
+                entries.append(entry)
+                forms.extend(entry_forms)
+                count += 1
+                if len(entries) >= BUILD_BATCH_SIZE:
+                    flush()
+            flush()
+            conn.execute("INSERT INTO meta VALUES ('source', ?)", (fingerprint,))
+            conn.commit()
+        except BaseException:
+            conn.close()
+            tmp.unlink(missing_ok=True)
+            raise
+        conn.close()
+        os.replace(tmp, self.index_path)
+        return count
+
+    def _is_current(self) -> bool:
+        return self._conn is not None and self._opened_source == self._source_fingerprint()
+
+    def open(self) -> None:
+        """打开索引；CSV 比索引新时先重建（可能耗时数秒，异步代码中应放到线程里执行）
+
+        已打开的索引在 CSV 更新后重新打开（必要时重建）
+        """
+        if self._is_current():
+            return
+        with self._lock:
+            if self._is_current():
+                return
+            fingerprint = self._source_fingerprint()
+            index_fingerprint = self._index_fingerprint()
+            if fingerprint is None and index_fingerprint is None:
+                raise DictionaryUnavailable(f"词典文件不存在: {self.csv_path}")
+            if fingerprint is not None and fingerprint != index_fingerprint:
+                self.build_index()
+            conn = sqlite3.connect(
+                f"file:{self.index_path}?mode=ro", uri=True, check_same_thread=False
+            )
+            conn.execute("PRAGMA query_only = ON")
+            # 旧连接不显式关闭：其他线程可能正在用它查询，失去引用后自动关闭
+            self._conn = conn
+            self._opened_source = fingerprint
+            self._cached_lookup.cache_clear()
+
+    async def ensure_open(self) -> None:
+        """首次使用或 CSV 更新后在线程中打开索引（只 stat 一次 CSV，不阻塞事件循环）"""
+        if not self._is_current():
+            await asyncio.to_thread(self.open)
+
+    def _entry(self, key: str) -> Optional[DictionaryEntry]:
+        row = self._conn.execute(
+            "SELECT word, lemma, phonetic, definition, part_of_speech FROM entries WHERE key = ?",
+            (key,),
+        ).fetchone()
+        return DictionaryEntry(*row) if row else None
+
+    def _lookup(self, key: str) -> Optional[DictionaryEntry]:
+        entry = self._entry(key)
+        if entry is not None:
+            return entry
+        row = self._conn.execute("SELECT lemma FROM forms WHERE form = ?", (key,)).fetchone()
+        if row:
+            entry = self._entry(row[0])
+            if entry is not None:
+                return entry
+        for candidate in _rule_candidates(key):
+            entry = self._entry(candidate)
+            if entry is not None:
+                return entry
+        return None
+
+    def lookup(self, word: str) -> Optional[DictionaryEntry]:
+        """查询单词（含词形还原），未收录时返回 None；索引未打开时先打开
+
+        未命中缓存时是同步的 SQLite 查询，异步代码中应通过 asyncio.to_thread 调用
+        """
+        key = normalize_word(word)
+        if not key:
+            return None
+        if self._conn is None:
+            self.open()
+        return self._cached_lookup(key)
+
+    def cache_info(self):
+        return self._cached_lookup.cache_info()
+
+
+dictionary = Dictionary(
+    csv_path=settings.dictionary_path,
+    index_path=settings.dictionary_index_path,
+    cache_size=settings.dictionary_cache_size,
+)
+
+
+# 生词本字段长度限制（见 models/vocabulary.py）
+ENRICH_FIELDS = {
+    "definition": None,
+    "phonetic": 100,
+    "part_of_speech": 20,
+}
+
+
+async def enrich_vocabulary(items: List[Dict]) -> None:
+    """用词典补全生词的释义、音标和词性，只填充客户端未提供的字段；词典不可用时保持原样"""
+    if not any(item.get(name) is None for item in items for name in ENRICH_FIELDS):
+        return
+    try:
+        await dictionary.ensure_open()
+    except DictionaryUnavailable:
+        return
+    await asyncio.to_thread(_fill_from_dictionary, items)
+
+
+def _fill_from_dictionary(items: List[Dict]) -> None:
+    for item in items:
+        entry = dictionary.lookup(item["word"])
+        if entry is None:
+            continue
+        for name, max_length in ENRICH_FIELDS.items():
+            value = getattr(entry, name)
+            if item.get(name) is None and value is not None:
+                item[name] = value[:max_length] if max_length else value
+
+
+if __name__ == "__main__":
+    # 部署时预先建立索引：python -m app.services.dictionary
+    print(f"已建立词典索引：{dictionary.build_index()} 个词条 -> {dictionary.index_path}")
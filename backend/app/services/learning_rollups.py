@@ -0,0 +1,260 @@
+"""
+LumiAI - 学情汇总（增量维护）
+
+learning_rollups 按 (用户, 类别, 题型, 错误类型, 日期) 保存答题数和答对数：
+- 提交答案时在同一事务内 upsert 对应的桶（+1）
+- 错误答案先记在 pending 桶，AI 分析完成后移到实际的错误类型桶
+- 页面按用户读取全部桶（数量与答题总数无关），不再联表扫描答题记录
+- 读取结果按用户缓存，写入汇总的事务提交后清除；其他 worker 进程的缓存只能等 stats_cache_ttl 过期
+
+历史数据由迁移 0005 首次回填，也可以手动重建：
+
+    python -m app.services.learning_rollups [--user ID]
+"""
+import argparse
+import sys
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import Date, Integer, case, cast, delete, func, literal_column, select, update
+from sqlalchemy.engine import Connection
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.models.practice import LearningRollup, PracticeAnswer
+from app.models.question import Question
+from app.services.cache import TTLCache, invalidate_after_commit
+
+settings = get_settings()
+
+# 答对的答案和尚未完成 AI 分析的错误答案使用的 error_type
+ERROR_NONE = "none"
+ERROR_PENDING = "pending"
+
+BUCKET_COLUMNS = ["user_id", "category", "question_type", "error_type", "day"]
+
+_summary_cache = TTLCache(maxsize=settings.stats_cache_size, ttl=settings.stats_cache_ttl)
+
+
+@dataclass(frozen=True)
+class Bucket:
+    category: str
+    question_type: str
+    error_type: str
+    answers: int
+    correct: int
+
+
+@dataclass(frozen=True)
+class RollupSummary:
+    """一个用户的汇总桶（已按日期合并）"""
+    buckets: Tuple[Bucket, ...]
+
+    @property
+    def empty(self) -> bool:
+        return not any(bucket.answers for bucket in self.buckets)
+
+    @property
+    def pending_count(self) -> int:
+        return sum(b.answers for b in self.buckets if b.error_type == ERROR_PENDING)
+
+    def totals_by(self, field: str, category: Optional[str] = None) -> Dict[str, Tuple[int, int]]:
+        """按 category 或 question_type 合并，返回 {值: (答题数, 答对数)}"""
+        totals: Dict[str, List[int]] = {}
+        for bucket in self.buckets:
+            if category is not None and bucket.category != category:
+                continue
+            total = totals.setdefault(getattr(bucket, field), [0, 0])
+            total[0] += bucket.answers
+            total[1] += bucket.correct
+        return {key: (answers, correct) for key, (answers, correct) in totals.items() if answers}
+
+    def error_counts(self, category: Optional[str] = None) -> Dict[str, int]:
+        """已完成分析的错误答案按错误类型计数"""
+        counts: Dict[str, int] = {}
+        for bucket in self.buckets:
+            if bucket.error_type in (ERROR_NONE, ERROR_PENDING) or not bucket.answers:
+                continue
+            if category is not None and bucket.category != category:
+                continue
+            counts[bucket.error_type] = counts.get(bucket.error_type, 0) + bucket.answers
+        return counts
+
+
+def invalidate_summary(user_id: int) -> None:
+    _summary_cache.pop(user_id)
+
+
+def _invalidate_after_commit(db: AsyncSession, user_id: int) -> None:
+    # 提交前清除的话，并发的 load_summary 仍可能读到旧的桶并缓存到过期
+    invalidate_after_commit(db.sync_session, ("learning_summary", user_id),
+                            lambda: invalidate_summary(user_id))
+
+
+def summary_cache_stats() -> dict:
+    return _summary_cache.stats()
+
+
+def _upsert(dialect: str, values: Dict):
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise RuntimeError(f"不支持的数据库: {dialect}")
+    table = LearningRollup.__table__
+    statement = insert(table).values(**values)
+    return statement.on_conflict_do_update(
+        index_elements=BUCKET_COLUMNS,
+        set_={
+            "answer_count": table.c.answer_count + statement.excluded.answer_count,
+            "correct_count": table.c.correct_count + statement.excluded.correct_count,
+        },
+    )
+
+
+async def record_answer(db: AsyncSession, user_id: int, question: Question, is_correct: bool,
+                        error_type: Optional[str], day: date) -> None:
+    """累计一次答题（在提交答案的事务内调用，随答案一起提交）"""
+    if is_correct:
+        error_type = ERROR_NONE
+    await db.execute(_upsert(db.bind.dialect.name, {
+        "user_id": user_id,
+        "category": question.category,
+        "question_type": question.question_type,
+        "error_type": error_type or ERROR_PENDING,
+        "day": day,
+        "answer_count": 1,
+        "correct_count": 1 if is_correct else 0,
+    }))
+    _invalidate_after_commit(db, user_id)
+
+
+async def reclassify_answer(db: AsyncSession, user_id: int, question: Question,
+                            error_type: str, day: date) -> None:
+    """错误答案分析完成：从 pending 桶移到实际错误类型的桶"""
+    table = LearningRollup.__table__
+    moved = await db.execute(
+        update(table).where(
+            table.c.user_id == user_id,
+            table.c.category == question.category,
+            table.c.question_type == question.question_type,
+            table.c.error_type == ERROR_PENDING,
+            table.c.day == day,
+            table.c.answer_count > 0,
+        ).values(answer_count=table.c.answer_count - 1)
+    )
+    # pending 桶不存在说明这条答案未被汇总过（例如早于汇总表的数据尚未回填），不单独补记
+    if moved.rowcount:
+        await db.execute(_upsert(db.bind.dialect.name, {
+            "user_id": user_id,
+            "category": question.category,
+            "question_type": question.question_type,
+            "error_type": error_type,
+            "day": day,
+            "answer_count": 1,
+            "correct_count": 0,
+        }))
+    _invalidate_after_commit(db, user_id)
+
+
+async def load_summary(db: AsyncSession, user_id: int, since: Optional[date] = None) -> RollupSummary:
+    """读取用户的汇总桶（不限日期时按用户缓存）"""
+    generation = _summary_cache.generation
+    if since is None:
+        cached = _summary_cache.get(user_id)
+        if cached is not None:
+            return cached
+
+    table = LearningRollup.__table__
+    query = select(
+        table.c.category,
+        table.c.question_type,
+        table.c.error_type,
+        func.sum(table.c.answer_count),
+        func.sum(table.c.correct_count),
+    ).where(table.c.user_id == user_id)
+    if since is not None:
+        query = query.where(table.c.day >= since)
+    rows = (await db.execute(
+        query.group_by(table.c.category, table.c.question_type, table.c.error_type)
+    )).all()
+
+    summary = RollupSummary(buckets=tuple(Bucket(*row) for row in rows))
+    if since is None:
+        _summary_cache.set(user_id, summary, generation=generation)
+    return summary
+
+
+# ========== 回填 ==========
+
+def _answer_day(dialect: str):
+    # SQLite 的 Date 列以 'YYYY-MM-DD' 文本存储，date() 的结果与之一致
+    if dialect == "sqlite":
+        return func.date(PracticeAnswer.created_at)
+    return cast(PracticeAnswer.created_at, Date)
+
+
+def rebuild_rollups(conn: Connection, user_id: Optional[int] = None) -> int:
+    """根据答题记录重建汇总表（全部用户或单个用户），返回写入的桶数"""
+    table = LearningRollup.__table__
+    is_correct = func.coalesce(PracticeAnswer.is_correct, False)
+    # 按输出列别名分组：PostgreSQL 不把两处带绑定参数的表达式视为相同
+    error_type = case(
+        (is_correct, ERROR_NONE),
+        else_=func.coalesce(PracticeAnswer.error_type, ERROR_PENDING),
+    ).label("bucket_error_type")
+    day = _answer_day(conn.dialect.name).label("bucket_day")
+    source = select(
+        PracticeAnswer.user_id,
+        Question.category,
+        Question.question_type,
+        error_type,
+        day,
+        func.count(),
+        func.sum(cast(case((is_correct, 1), else_=0), Integer)),
+    ).join(Question, PracticeAnswer.question_id == Question.id)
+
+    clear = delete(table)
+    if user_id is not None:
+        source = source.where(PracticeAnswer.user_id == user_id)
+        clear = clear.where(table.c.user_id == user_id)
+    source = source.group_by(
+        PracticeAnswer.user_id, Question.category, Question.question_type,
+        literal_column(error_type.name), literal_column(day.name),
+    )
+
+    conn.execute(clear)
+    result = conn.execute(table.insert().from_select(
+        ["user_id", "category", "question_type", "error_type", "day", "answer_count", "correct_count"],
+        source,
+    ))
+    if user_id is None:
+        _summary_cache.clear()
+    else:
+        invalidate_summary(user_id)
+    return result.rowcount
+
+
+def main(argv: list[str]) -> int:
+    from app.database import engine, init_db
+    from app.migrations import run_migrations
+
+    parser = argparse.ArgumentParser(
+        prog="python -m app.services.learning_rollups", description="根据答题记录重建学情汇总表"
+    )
+    parser.add_argument("--user", type=int, help="只重建指定用户（默认全部用户）")
+    args = parser.parse_args(argv)
+
+    init_db()
+    run_migrations(engine)
+    # 先删除再插入，在同一个事务内完成，读取方不会看到空表
+    with engine.begin() as conn:
+        count = rebuild_rollups(conn, user_id=args.user)
+    print(f"学情汇总已重建：{count} 个桶")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
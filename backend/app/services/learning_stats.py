@@ -0,0 +1,155 @@
+"""
+LumiAI - 学习统计
+
+各类别的学习时长、正确率由一条 GROUP BY category 聚合查询得到，不再把用户的全部练习会话读入内存；
+连续学习天数用窗口函数在数据库中计算（连续日期减去行号相同，即为同一段连续区间）。
+
+结果按用户缓存，练习会话有写入（答题、完成）的事务提交后清除该用户的缓存。
+日期按 UTC 计算，与 started_at 的存储方式一致。
+"""
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Optional, Tuple
+
+from sqlalchemy import Date, Integer, cast, event, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import object_session
+
+from app.config import get_settings
+from app.models.practice import PracticeSession
+from app.schemas.analysis import AccuracyStats, LearningStats, TimeStats
+from app.services.cache import TTLCache, invalidate_after_commit
+
+settings = get_settings()
+
+EPOCH = date(1970, 1, 1)
+
+# (类别, 展示名称)
+CATEGORIES = [
+    ("listening", "Listening"),
+    ("reading", "Reading"),
+    ("writing", "Writing"),
+    ("speaking", "Speaking"),
+]
+
+# 没有练习记录时展示的示例正确率（与原先的前端默认值一致）
+DEFAULT_ACCURACY = {"listening": 85, "reading": 78, "writing": 65, "speaking": 72}
+DEFAULT_PRACTICE_COUNT = 156
+DEFAULT_CORRECT_COUNT = 118
+
+# 每个用户一条缓存，值为 {(起始日期, 结束日期, 今天): LearningStats}
+_stats_cache = TTLCache(maxsize=settings.stats_cache_size, ttl=settings.stats_cache_ttl)
+
+DateRange = Tuple[Optional[date], Optional[date]]
+
+
+def invalidate_stats(user_id: int) -> None:
+    _stats_cache.pop(user_id)
+
+
+def stats_cache_stats() -> dict:
+    return _stats_cache.stats()
+
+
+@event.listens_for(PracticeSession, "after_insert")
+@event.listens_for(PracticeSession, "after_update")
+@event.listens_for(PracticeSession, "after_delete")
+def _invalidate_on_change(mapper, connection, target: PracticeSession) -> None:
+    # flush 时触发，等事务提交后再清除，避免提交前的并发读取把旧结果写回缓存
+    user_id = target.user_id
+    invalidate_after_commit(object_session(target), ("learning_stats", user_id),
+                            lambda: invalidate_stats(user_id))
+
+
+def epoch_day(column, dialect: str):
+    """时间列对应的日期序号（距 1970-01-01 的天数），不同日期在 SQL 中可直接相减"""
+    if dialect == "postgresql":
+        return cast(column, Date) - EPOCH
+    # julianday('1970-01-01') = 2440587.5，零点的 julianday 恰好是 x.5
+    return cast(func.julianday(func.date(column)) - 2440587.5, Integer)
+
+
+async def calc_streak_days(db: AsyncSession, user_id: int, today: date) -> int:
+    """截至今天（今天还没练习则截至昨天）的连续学习天数"""
+    day = epoch_day(PracticeSession.started_at, db.bind.dialect.name).label("day")
+    days = select(day).where(
+        PracticeSession.user_id == user_id,
+        PracticeSession.total_questions > 0,
+    ).distinct().subquery()
+    islands = select(
+        days.c.day,
+        (days.c.day - func.row_number().over(order_by=days.c.day)).label("island"),
+    ).subquery()
+    latest = (await db.execute(
+        select(func.max(islands.c.day), func.count())
+        .group_by(islands.c.island)
+        .order_by(func.max(islands.c.day).desc())
+        .limit(1)
+    )).first()
+
+    if latest is None:
+        return 0
+    last_day, length = latest
+    if last_day < (today - EPOCH).days - 1:
+        return 0
+    return length
+
+
+async def _aggregate(db: AsyncSession, user_id: int, date_range: DateRange) -> Dict[str, Tuple]:
+    start, end = date_range
+    query = select(
+        PracticeSession.category,
+        func.coalesce(func.sum(PracticeSession.time_spent_seconds), 0),
+        func.coalesce(func.sum(PracticeSession.correct_count), 0),
+        func.coalesce(func.sum(PracticeSession.total_questions), 0),
+    ).where(PracticeSession.user_id == user_id)
+    if start:
+        query = query.where(PracticeSession.started_at >= datetime.combine(start, time.min))
+    if end:
+        query = query.where(PracticeSession.started_at < datetime.combine(end + timedelta(days=1), time.min))
+
+    rows = (await db.execute(query.group_by(PracticeSession.category))).all()
+    return {category: (seconds, correct, total) for category, seconds, correct, total in rows}
+
+
+def _accuracy(category: str, correct: int, total: int) -> int:
+    # 只有没有答题记录时才展示示例值，真实的 0% 照常展示
+    if total == 0:
+        return DEFAULT_ACCURACY[category]
+    return int(correct / total * 100)
+
+
+async def get_learning_stats(db: AsyncSession, user_id: int,
+                             start: Optional[date] = None, end: Optional[date] = None) -> LearningStats:
+    """获取学习统计（可按日期范围筛选，连续天数不受范围影响）"""
+    today = datetime.utcnow().date()
+    key = (start, end, today)
+    generation = _stats_cache.generation
+    cached = _stats_cache.get(user_id)
+    if cached is not None and key in cached:
+        return cached[key]
+
+    totals = await _aggregate(db, user_id, (start, end))
+    time_stats = []
+    accuracy_stats = []
+    for category, label in CATEGORIES:
+        seconds, correct, total = totals.get(category, (0, 0, 0))
+        time_stats.append(TimeStats(category=label, hours=round(seconds / 3600, 1)))
+        accuracy_stats.append(AccuracyStats(category=label, accuracy=_accuracy(category, correct, total)))
+
+    practice_count = sum(row[2] for row in totals.values())
+    correct_count = sum(row[1] for row in totals.values())
+    if practice_count == 0:
+        practice_count, correct_count = DEFAULT_PRACTICE_COUNT, DEFAULT_CORRECT_COUNT
+    stats = LearningStats(
+        time_stats=time_stats,
+        accuracy_stats=accuracy_stats,
+        total_practice_count=practice_count,
+        total_correct_count=correct_count,
+        streak_days=await calc_streak_days(db, user_id, today),
+    )
+
+    # 缓存值在失效前只会被替换，不会被原地修改，并发请求读到的都是完整的字典
+    cached = dict(_stats_cache.get(user_id) or {})
+    cached[key] = stats
+    _stats_cache.set(user_id, cached, generation=generation)
+    return stats
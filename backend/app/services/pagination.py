@@ -0,0 +1,62 @@
+"""
+LumiAI - 游标分页（keyset）
+
+按 (排序列, id) 记住上一页最后一行，下一页用 WHERE 条件从索引中的该位置继续扫描，
+无论翻到多深都只读取 limit + 1 行；OFFSET 则需要先逐行跳过前面的全部数据。
+游标对客户端不透明，内容是最后一行排序键的 base64 编码 JSON。
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Any, Callable, List, Optional, Sequence, Tuple
+
+from fastapi import HTTPException
+from sqlalchemy import and_, or_
+
+
+def encode_cursor(*values: Any) -> str:
+    payload = [v.isoformat() if isinstance(v, datetime) else v for v in values]
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    return base64.urlsafe_b64encode(raw).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, *types: type) -> Tuple:
+    """解析游标，types 为各排序键的类型（int / datetime）"""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        payload = json.loads(raw)
+        if not isinstance(payload, list) or len(payload) != len(types):
+            raise ValueError(cursor)
+        return tuple(
+            datetime.fromisoformat(value) if kind is datetime else kind(value)
+            for kind, value in zip(types, payload)
+        )
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="无效的分页游标")
+
+
+def after_key(sort_column, id_column, sort_value, id_value, descending: bool = True):
+    """位于游标之后的行：(sort, id) 按字典序严格小于（降序）或大于（升序）游标
+
+    外层冗余的 sort <= value 让优化器把索引扫描的起点定位到游标处；
+    只有 OR 条件时 SQLite 会从索引一端扫起，翻页越深越慢。
+    """
+    if descending:
+        return and_(
+            sort_column <= sort_value,
+            or_(sort_column < sort_value, and_(sort_column == sort_value, id_column < id_value)),
+        )
+    return and_(
+        sort_column >= sort_value,
+        or_(sort_column > sort_value, and_(sort_column == sort_value, id_column > id_value)),
+    )
+
+
+def paginate(rows: Sequence, limit: int,
+             key: Callable[[Any], Tuple]) -> Tuple[List, Optional[str]]:
+    """rows 为按 limit + 1 查询的结果，返回本页数据和下一页游标（没有更多时为 None）"""
+    items = list(rows[:limit])
+    if len(rows) <= limit:
+        return items, None
+    return items, encode_cursor(*key(items[-1]))
@@ -0,0 +1,199 @@
+"""
+LumiAI - 题库目录（进程内索引）
+
+随机抽题只需要题目 id：按 (category, difficulty) 维护 id 列表，
+抽取为 O(1)，不再为每次请求把整张题目表读进内存。
+同一次加载还按 (category, question_type, difficulty) 建立候选池（id + 标题），供个性化推荐使用。
+分面统计（类别 × 难度 × 题型的题目数）由一条 GROUP BY 查询得到并缓存。
+本进程写入题目的事务提交后递增版本号使两者失效（回滚的写入不会触发）；
+其他进程（或批量导入脚本）写入的题目在 question_catalog_ttl 秒内被重新加载。
+"""
+import asyncio
+import random
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, Sequence, Set, Tuple
+
+from sqlalchemy import event, func, select
+from sqlalchemy.orm import object_session
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.question import Question
+from app.services.cache import invalidate_after_commit
+
+settings = get_settings()
+
+FacetKey = Tuple[Optional[str], Optional[str]]
+PoolKey = Tuple[str, str, str]          # (category, question_type, difficulty)
+PoolItem = Tuple[int, str]              # (题目 id, 标题)
+
+
+class QuestionCatalog:
+    """题目 id 索引，按需惰性加载"""
+
+    def __init__(self, ttl: float):
+        self.ttl = ttl
+        self.version = 0
+        self._loaded_version = -1
+        self._loaded_at = 0.0
+        self._ids: Dict[FacetKey, List[int]] = {}
+        self._pools: Dict[PoolKey, List[PoolItem]] = {}
+        self._lock = asyncio.Lock()
+        self._refresh: Optional[asyncio.Task] = None
+        self._facets_version = -1
+        self._facets_at = 0.0
+        self._facets: Dict[str, Any] = {}
+        self._facets_lock = asyncio.Lock()
+
+    def invalidate(self) -> None:
+        """题目有写入时调用，下次访问重新加载"""
+        self.version += 1
+
+    def _is_fresh(self) -> bool:
+        return (
+            self._loaded_version == self.version
+            and time.monotonic() - self._loaded_at < self.ttl
+        )
+
+    async def _ensure_loaded(self) -> None:
+        if self._is_fresh():
+            return
+        async with self._lock:
+            if self._is_fresh():
+                return
+            version = self.version
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(
+                        Question.id,
+                        Question.category,
+                        Question.difficulty,
+                        Question.question_type,
+                        Question.title,
+                    ).order_by(Question.id)
+                )).all()
+
+            # 同时建立单维度和无筛选的索引，任意筛选组合都是一次字典查找
+            ids: Dict[FacetKey, List[int]] = defaultdict(list)
+            pools: Dict[PoolKey, List[PoolItem]] = defaultdict(list)
+            for question_id, category, difficulty, question_type, title in rows:
+                for key in ((category, difficulty), (category, None), (None, difficulty), (None, None)):
+                    ids[key].append(question_id)
+                pools[(category, question_type, difficulty or "medium")].append((question_id, title))
+
+            self._ids = dict(ids)
+            self._pools = dict(pools)
+            self._loaded_version = version
+            self._loaded_at = time.monotonic()
+
+    def _facets_fresh(self) -> bool:
+        return (
+            self._facets_version == self.version
+            and time.monotonic() - self._facets_at < self.ttl
+        )
+
+    async def facets(self) -> Dict[str, Any]:
+        """按类别、难度、题型统计的题目数量（带版本号）"""
+        if self._facets_fresh():
+            return self._facets
+        async with self._facets_lock:
+            if self._facets_fresh():
+                return self._facets
+            version = self.version
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(
+                    select(
+                        Question.category,
+                        Question.difficulty,
+                        Question.question_type,
+                        func.count(),
+                    ).group_by(Question.category, Question.difficulty, Question.question_type)
+                )).all()
+
+            totals: Dict[str, Dict[str, int]] = {
+                "category": defaultdict(int),
+                "difficulty": defaultdict(int),
+                "question_type": defaultdict(int),
+            }
+            buckets = []
+            for category, difficulty, question_type, count in rows:
+                totals["category"][category] += count
+                if difficulty is not None:
+                    totals["difficulty"][difficulty] += count
+                totals["question_type"][question_type] += count
+                buckets.append({
+                    "category": category,
+                    "difficulty": difficulty,
+                    "question_type": question_type,
+                    "count": count,
+                })
+
+            self._facets = {
+                "version": version,
+                "total": sum(bucket["count"] for bucket in buckets),
+                **{name: dict(values) for name, values in totals.items()},
+                "buckets": buckets,
+            }
+            self._facets_version = version
+            self._facets_at = time.monotonic()
+            return self._facets
+
+    async def ids_for(self, category: Optional[str] = None,
+                      difficulty: Optional[str] = None) -> Sequence[int]:
+        """符合筛选条件的全部题目 id"""
+        await self._ensure_loaded()
+        return self._ids.get((category, difficulty), [])
+
+    def preload(self) -> None:
+        """在后台加载（应用启动时调用），首个请求不必等待"""
+        if self._refresh is None or self._refresh.done():
+            self._refresh = asyncio.create_task(self._ensure_loaded())
+
+    async def pools(self, allow_stale: bool = False) -> Dict[PoolKey, List[PoolItem]]:
+        """按 (类别, 题型, 难度) 分组的候选题目
+
+        allow_stale 时，已加载过的目录过期后先返回旧数据并在后台重新加载（推荐有时间预算，不等待加载）
+        """
+        if allow_stale and self._loaded_version >= 0 and not self._is_fresh():
+            self.preload()
+            return self._pools
+        await self._ensure_loaded()
+        return self._pools
+
+    async def sample(self, n: int, category: Optional[str] = None,
+                     difficulty: Optional[str] = None,
+                     exclude: Optional[Set[int]] = None) -> List[int]:
+        """无放回地随机抽取至多 n 个题目 id，可排除指定 id"""
+        ids = await self.ids_for(category, difficulty)
+        if not exclude:
+            return random.sample(ids, min(n, len(ids)))
+
+        # 排除集合相对题库较小时拒绝采样，避免复制整个列表
+        if len(exclude) * 2 < len(ids):
+            picked: List[int] = []
+            seen: Set[int] = set()
+            attempts = 0
+            while len(picked) < n and attempts < n * 20:
+                attempts += 1
+                question_id = ids[random.randrange(len(ids))]
+                if question_id in exclude or question_id in seen:
+                    continue
+                seen.add(question_id)
+                picked.append(question_id)
+            if len(picked) == n:
+                return picked
+
+        candidates = [question_id for question_id in ids if question_id not in exclude]
+        return random.sample(candidates, min(n, len(candidates)))
+
+
+question_catalog = QuestionCatalog(ttl=settings.question_catalog_ttl)
+
+
+@event.listens_for(Question, "after_insert")
+@event.listens_for(Question, "after_update")
+@event.listens_for(Question, "after_delete")
+def _invalidate_catalog(mapper, connection, target: Question) -> None:
+    # flush 时触发，等事务提交后再失效，避免提交前的并发加载把旧数据当作新版本缓存
+    invalidate_after_commit(object_session(target), "question_catalog", question_catalog.invalidate)
@@ -0,0 +1,224 @@
+"""
+LumiAI - 题库全文搜索
+
+全文索引由迁移 0002 创建：
+- SQLite 查询 FTS5 虚拟表 questions_fts，BM25 排序，snippet() 生成高亮摘要
+- PostgreSQL 查询 GIN 索引覆盖的 tsvector 表达式，ts_rank_cd 排序，ts_headline 生成摘要
+两者都先在索引中完成匹配和排序，只为当前页的结果生成摘要。
+
+包含中文的查询按子串匹配标题和技能标签（迁移 0007）：中文没有空格分词，
+上面两种索引只能整段匹配。SQLite 查询 trigram 分词的 questions_cjk_fts，
+少于 3 个字的词（如"发音"）trigram 无法建立索引项，改用 LIKE；PostgreSQL 使用 pg_trgm 索引上的 ILIKE。
+摘要为高亮后的技能标签（没有命中的标签时为标题）。
+"""
+import json
+import re
+from typing import Dict, List, Optional
+
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.migrations.m0002_question_fulltext import QUESTION_TSVECTOR
+from app.migrations.m0007_question_fulltext_cjk import QUESTION_CJK_TEXT
+
+HIGHLIGHT_START = "<mark>"
+HIGHLIGHT_END = "</mark>"
+
+# 摘要长度（词数）
+SNIPPET_WORDS = 16
+
+# bm25 列权重，顺序与 questions_fts 的列一致：title, passage, content, skill_tags
+BM25_WEIGHTS = (10.0, 1.0, 4.0, 6.0)
+
+# questions_cjk_fts 的列权重：title, skill_tags
+CJK_BM25_WEIGHTS = (10.0, 6.0)
+
+# trigram 分词能匹配的最短子串
+TRIGRAM_MIN_CHARS = 3
+
+# 查询词数上限，防止超长输入拖慢匹配
+MAX_TERMS = 16
+
+_TOKEN_RE = re.compile(r"\w+")
+# 中日韩文字（含假名、谚文）
+_CJK_RE = re.compile(r"[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af\uf900-\ufaff]")
+
+
+class SearchUnavailable(Exception):
+    """全文索引未建立或当前数据库不支持全文搜索"""
+
+
+def build_fts5_query(query: str) -> Optional[str]:
+    """将用户输入转换为 FTS5 查询：每个词都需出现，最后一个词按前缀匹配
+
+    只保留词字符并逐个加引号，用户输入中的 FTS5 语法字符不会生效。
+    """
+    tokens = _TOKEN_RE.findall(query)[:MAX_TERMS]
+    if not tokens:
+        return None
+    terms = [f'"{token}"' for token in tokens]
+    terms[-1] += "*"
+    return " ".join(terms)
+
+
+def _like_pattern(term: str) -> str:
+    escaped = term.replace("!", "!!").replace("%", "!%").replace("_", "!_")
+    return f"%{escaped}%"
+
+
+def _highlight(value: str, terms: List[str]) -> str:
+    pattern = re.compile(
+        "|".join(re.escape(term) for term in sorted(terms, key=len, reverse=True)), re.IGNORECASE
+    )
+    return pattern.sub(lambda m: f"{HIGHLIGHT_START}{m.group(0)}{HIGHLIGHT_END}", value)
+
+
+def _tag_snippet(title: str, skill_tags: Optional[str], terms: List[str]) -> str:
+    """命中的技能标签（高亮），没有命中的标签时为高亮后的标题"""
+    try:
+        tags = json.loads(skill_tags) if skill_tags else []
+    except ValueError:
+        tags = [skill_tags]
+    if not isinstance(tags, list):
+        tags = [str(tags)]
+    lowered = [term.lower() for term in terms]
+    if any(term in str(tag).lower() for tag in tags for term in lowered):
+        return _highlight("、".join(str(tag) for tag in tags), terms)
+    return _highlight(title, terms)
+
+
+def _filters(category: Optional[str], difficulty: Optional[str]) -> str:
+    clauses = []
+    if category:
+        clauses.append(" AND q.category = :category")
+    if difficulty:
+        clauses.append(" AND q.difficulty = :difficulty")
+    return "".join(clauses)
+
+
+async def _search_sqlite(db: AsyncSession, query: str, params: Dict, filters: str) -> List[Dict]:
+    match = build_fts5_query(query)
+    if match is None:
+        return []
+    weights = ", ".join(str(w) for w in BM25_WEIGHTS)
+    statement = text(
+        "SELECT q.id, q.category, q.question_type, q.difficulty, q.title, q.source, "
+        f"snippet(questions_fts, -1, :hl_start, :hl_end, '…', {SNIPPET_WORDS}) AS snippet, "
+        f"bm25(questions_fts, {weights}) AS rank "
+        "FROM questions_fts JOIN questions q ON q.id = questions_fts.rowid "
+        f"WHERE questions_fts MATCH :match{filters} "
+        "ORDER BY rank LIMIT :limit OFFSET :offset"
+    )
+    try:
+        rows = (await db.execute(statement, {**params, "match": match})).mappings().all()
+    except OperationalError as e:
+        if "no such table" in str(e):
+            raise SearchUnavailable("全文索引尚未建立") from e
+        raise
+    # bm25 越小越相关，对外统一为越大越相关
+    return [{**row, "score": -row["rank"]} for row in rows]
+
+
+async def _search_like(db: AsyncSession, terms: List[str], params: Dict, filters: str,
+                       operator: str) -> List[Dict]:
+    """标题 + 技能标签的子串匹配（PostgreSQL 的 ILIKE 命中 pg_trgm 索引），命中标题的词越多越靠前"""
+    values = {f"like{i}": _like_pattern(term) for i, term in enumerate(terms)}
+    conditions = "".join(
+        f" AND ({QUESTION_CJK_TEXT}) {operator} :{name} ESCAPE '!'" for name in values
+    )
+    score = " + ".join(
+        f"CASE WHEN coalesce(q.title, '') {operator} :{name} ESCAPE '!' THEN 1 ELSE 0 END"
+        for name in values
+    )
+    statement = text(
+        "SELECT q.id, q.category, q.question_type, q.difficulty, q.title, q.source, q.skill_tags, "
+        f"{score} AS score "
+        f"FROM questions q WHERE 1 = 1{conditions}{filters} "
+        "ORDER BY score DESC, q.id LIMIT :limit OFFSET :offset"
+    )
+    rows = (await db.execute(statement, {**params, **values})).mappings().all()
+    return [
+        {**row, "snippet": _tag_snippet(row["title"], row["skill_tags"], terms), "score": float(row["score"])}
+        for row in rows
+    ]
+
+
+async def _search_sqlite_cjk(db: AsyncSession, terms: List[str], params: Dict, filters: str) -> List[Dict]:
+    match_terms = [term for term in terms if len(term) >= TRIGRAM_MIN_CHARS]
+    like_terms = {f"like{i}": _like_pattern(term)
+                  for i, term in enumerate(t for t in terms if len(t) < TRIGRAM_MIN_CHARS)}
+    conditions = "".join(
+        f" AND (questions_cjk_fts.title LIKE :{name} ESCAPE '!' "
+        f"OR questions_cjk_fts.skill_tags LIKE :{name} ESCAPE '!')"
+        for name in like_terms
+    )
+    values = dict(like_terms)
+    if match_terms:
+        # bm25() 只能用于带 MATCH 的查询
+        values["match"] = " ".join(f'"{term}"' for term in match_terms)
+        weights = ", ".join(str(w) for w in CJK_BM25_WEIGHTS)
+        where, rank = "questions_cjk_fts MATCH :match", f"bm25(questions_cjk_fts, {weights})"
+    else:
+        where, rank = "1 = 1", "0.0"
+    statement = text(
+        "SELECT q.id, q.category, q.question_type, q.difficulty, q.title, q.source, q.skill_tags, "
+        f"{rank} AS rank "
+        "FROM questions_cjk_fts JOIN questions q ON q.id = questions_cjk_fts.rowid "
+        f"WHERE {where}{conditions}{filters} "
+        "ORDER BY rank, q.id LIMIT :limit OFFSET :offset"
+    )
+    try:
+        rows = (await db.execute(statement, {**params, **values})).mappings().all()
+    except OperationalError as e:
+        if "no such table" not in str(e):
+            raise
+        # SQLite 低于 3.34 时迁移 0007 不建 trigram 表，直接在 questions 上做子串匹配
+        return await _search_like(db, terms, params, filters, "LIKE")
+    return [
+        {**row, "snippet": _tag_snippet(row["title"], row["skill_tags"], terms),
+         "score": -row["rank"] if match_terms else 0.0}
+        for row in rows
+    ]
+
+
+async def _search_postgresql(db: AsyncSession, query: str, params: Dict, filters: str) -> List[Dict]:
+    statement = text(
+        "SELECT q.id, q.category, q.question_type, q.difficulty, q.title, q.source, "
+        "ts_headline('english', coalesce(q.content, '') || ' ' || coalesce(q.passage, ''), tsq, "
+        "'StartSel=' || :hl_start || ', StopSel=' || :hl_end || "
+        f"', MaxWords={SNIPPET_WORDS}, MinWords=5, MaxFragments=1') AS snippet, "
+        f"ts_rank_cd({QUESTION_TSVECTOR}, tsq) AS score "
+        "FROM questions q, websearch_to_tsquery('english', :query) AS tsq "
+        f"WHERE ({QUESTION_TSVECTOR}) @@ tsq{filters} "
+        "ORDER BY score DESC, q.id LIMIT :limit OFFSET :offset"
+    )
+    rows = (await db.execute(statement, {**params, "query": query})).mappings().all()
+    return [dict(row) for row in rows]
+
+
+async def search_questions(db: AsyncSession, query: str, category: Optional[str] = None,
+                           difficulty: Optional[str] = None, limit: int = 20,
+                           offset: int = 0) -> List[Dict]:
+    """全文搜索题目标题、文章、题干和技能标签，按相关度排序"""
+    params = {
+        "category": category,
+        "difficulty": difficulty,
+        "limit": limit,
+        "offset": offset,
+        "hl_start": HIGHLIGHT_START,
+        "hl_end": HIGHLIGHT_END,
+    }
+    filters = _filters(category, difficulty)
+    dialect = db.bind.dialect.name
+    if _CJK_RE.search(query):
+        terms = _TOKEN_RE.findall(query)[:MAX_TERMS]
+        if dialect == "sqlite":
+            return await _search_sqlite_cjk(db, terms, params, filters)
+        if dialect == "postgresql":
+            return await _search_like(db, terms, params, filters, "ILIKE")
+    if dialect == "sqlite":
+        return await _search_sqlite(db, query, params, filters)
+    if dialect == "postgresql":
+        return await _search_postgresql(db, query, params, filters)
+    raise SearchUnavailable(f"{dialect} 不支持全文搜索")
@@ -0,0 +1,396 @@
+"""
+LumiAI - 个性化推荐
+
+按用户的薄弱点为题库中的题目打分，返回 top-k 推荐：
+- 候选池：题库目录按 (类别, 题型, 难度) 预先分组（进程内，题目写入时失效），打分只针对候选池，
+  与题目总数无关
+- 薄弱点：学情汇总中各 (类别, 题型) 的正确率，加上用户最常见的错误类型在该题型中的错误率
+- 难度平衡：按该题型的正确率确定目标难度，相邻难度降权
+- 每轮从得分最高的若干个池各取一道题，推荐不会集中在同一个题型；最近做过的题目不会被推荐
+
+一次推荐有时间预算（recommend_budget_ms），超时返回通用推荐；结果按用户缓存，学情汇总变化（答题）后重新计算。
+
+离线评估（留出最近 N 天的答题，看推荐是否命中之后真正出错的题型，与随机推荐对比）：
+
+    python -m app.services.recommender --evaluate [--days 7] [--k 5]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Set, Tuple
+
+from sqlalchemy import Integer, case, cast, func, literal_column, select
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.practice import PracticeAnswer
+from app.models.question import Question
+from app.schemas.analysis import RecommendationItem
+from app.services.cache import TTLCache
+from app.services.learning_rollups import ERROR_NONE, ERROR_PENDING, Bucket, RollupSummary
+from app.services.learning_stats import CATEGORIES
+from app.services.question_catalog import PoolItem, PoolKey, question_catalog
+
+settings = get_settings()
+
+Area = Tuple[str, str]                  # (category, question_type)
+
+DIFFICULTIES = ["easy", "medium", "hard"]
+# 与目标难度相差 0/1/2 级时的权重
+DIFFICULTY_FIT = [1.0, 0.5, 0.2]
+
+# 没做过的题型按 70% 的正确率估计，PRIOR_ANSWERS 为先验相当的答题数
+BASE_ACCURACY = 0.7
+PRIOR_ANSWERS = 5.0
+ERROR_WEIGHT = 0.5
+
+# 每次计算并缓存的推荐数（请求的 limit 更大时按需重新计算）
+CACHED_ITEMS = 10
+
+CATEGORY_LABELS = dict(CATEGORIES)
+DURATION_MINUTES = {"listening": 10, "reading": 20, "writing": 30, "speaking": 15}
+ERROR_LABELS = {"grammar": "语法", "vocabulary": "词汇", "logic": "逻辑"}
+QUESTION_TYPE_NAMES = {
+    "fill_in_blank": "填空题",
+    "multiple_choice": "选择题",
+    "true_false_ng": "判断题",
+    "matching": "匹配题",
+    "short_answer": "简答题",
+    "essay": "作文",
+}
+
+# 题库为空或超出时间预算时的通用推荐
+FALLBACK_RECOMMENDATIONS = [
+    RecommendationItem(
+        id="1",
+        title="高级定语从句应用",
+        category="Writing",
+        duration="15 分钟",
+        difficulty="Hard",
+        reason="基于您近期的语法错误",
+    ),
+    RecommendationItem(
+        id="2",
+        title="Part 2 独白模拟",
+        category="Speaking",
+        duration="10 分钟",
+        difficulty="Medium",
+        reason="提升口语流利度",
+    ),
+    RecommendationItem(
+        id="3",
+        title="学术摘要快速定位",
+        category="Reading",
+        duration="20 分钟",
+        difficulty="Hard",
+        reason="强化阅读逻辑推理",
+    ),
+]
+
+
+@dataclass(frozen=True)
+class AreaScore:
+    weakness: float                     # 0-1，越大越需要练习
+    accuracy: float                     # 平滑后的正确率
+    answers: int
+    error_rate: float                   # 主要错误类型在该题型中的错误率
+
+
+@dataclass(frozen=True)
+class Pick:
+    pool: PoolKey
+    question_id: int
+    title: str
+    reason: str
+
+
+# ========== 打分 ==========
+
+def top_error_type(summary: RollupSummary) -> Optional[str]:
+    counts = {key: count for key, count in summary.error_counts().items() if key in ERROR_LABELS}
+    return max(counts, key=counts.get) if counts else None
+
+
+def area_scores(summary: RollupSummary, top_error: Optional[str]) -> Dict[Area, AreaScore]:
+    """各 (类别, 题型) 的薄弱程度；没有出现的题型按先验估计"""
+    totals: Dict[Area, List[int]] = {}
+    for bucket in summary.buckets:
+        if bucket.error_type == ERROR_PENDING:
+            continue
+        total = totals.setdefault((bucket.category, bucket.question_type), [0, 0, 0])
+        total[0] += bucket.answers
+        total[1] += bucket.correct
+        if bucket.error_type == top_error:
+            total[2] += bucket.answers
+
+    scores = {}
+    for area, (answers, correct, errors) in totals.items():
+        accuracy = (correct + PRIOR_ANSWERS * BASE_ACCURACY) / (answers + PRIOR_ANSWERS)
+        error_rate = errors / (answers + PRIOR_ANSWERS)
+        scores[area] = AreaScore(
+            weakness=1 - accuracy + ERROR_WEIGHT * error_rate,
+            accuracy=accuracy,
+            answers=answers,
+            error_rate=error_rate,
+        )
+    return scores
+
+
+UNSEEN_AREA = AreaScore(weakness=1 - BASE_ACCURACY, accuracy=BASE_ACCURACY, answers=0, error_rate=0.0)
+
+
+def target_difficulty(accuracy: float) -> int:
+    if accuracy < 0.5:
+        return 0
+    if accuracy < 0.75:
+        return 1
+    return 2
+
+
+def _reason(area: Area, score: AreaScore, top_error: Optional[str]) -> str:
+    question_type = QUESTION_TYPE_NAMES.get(area[1], area[1])
+    if top_error and score.error_rate >= 0.15:
+        return f"基于您近期的{ERROR_LABELS[top_error]}错误"
+    if score.answers:
+        return f"{question_type}正确率 {int(score.accuracy * 100)}%"
+    return f"尚未练习过{question_type}"
+
+
+def rank_questions(pools: Dict[PoolKey, List[PoolItem]], summary: RollupSummary,
+                   exclude: Set[int], limit: int, rng: Optional[random.Random] = None) -> List[Pick]:
+    """为候选池打分，轮流从得分最高的池中各取一道未做过的题"""
+    rng = rng or random.Random()
+    top_error = top_error_type(summary)
+    scores = area_scores(summary, top_error)
+
+    ranked = []
+    for pool, items in pools.items():
+        if not items:
+            continue
+        category, question_type, difficulty = pool
+        score = scores.get((category, question_type), UNSEEN_AREA)
+        level = DIFFICULTIES.index(difficulty) if difficulty in DIFFICULTIES else 1
+        fit = DIFFICULTY_FIT[abs(level - target_difficulty(score.accuracy))]
+        ranked.append((score.weakness * fit, pool, score))
+    # 不截断候选池：得分高的池没有未做过的题时，由后面的池补足 limit 道
+    ranked.sort(key=lambda entry: -entry[0])
+
+    picks: List[Pick] = []
+    taken = set(exclude)
+    while ranked and len(picks) < limit:
+        remaining = []
+        for entry in ranked:
+            if len(picks) == limit:
+                break
+            _, pool, score = entry
+            item = _pick_unseen(pools[pool], taken, rng)
+            if item is None:
+                continue
+            taken.add(item[0])
+            picks.append(Pick(pool, item[0], item[1], _reason(pool[:2], score, top_error)))
+            remaining.append(entry)
+        ranked = remaining
+    return picks
+
+
+def _pick_unseen(items: List[PoolItem], taken: Set[int], rng: random.Random) -> Optional[PoolItem]:
+    """随机取一道不在 taken 中的题；池中大多已做过时退化为线性扫描"""
+    for _ in range(8):
+        item = items[rng.randrange(len(items))]
+        if item[0] not in taken:
+            return item
+    candidates = [item for item in items if item[0] not in taken]
+    return rng.choice(candidates) if candidates else None
+
+
+def _to_item(pick: Pick) -> RecommendationItem:
+    category, _, difficulty = pick.pool
+    return RecommendationItem(
+        id=str(pick.question_id),
+        title=pick.title,
+        category=CATEGORY_LABELS.get(category, category),
+        duration=f"{DURATION_MINUTES.get(category, 15)} 分钟",
+        difficulty=difficulty.capitalize(),
+        reason=pick.reason,
+    )
+
+
+# ========== 推荐服务 ==========
+
+class Recommender:
+    """带时间预算和按用户缓存的推荐"""
+
+    def __init__(self, budget_ms: float, exclude_days: int, exclude_limit: int):
+        self.budget = budget_ms / 1000
+        self.exclude_days = exclude_days
+        self.exclude_limit = exclude_limit
+        # 用户 id -> (计算时使用的汇总, 推荐列表)
+        self._cache = TTLCache(maxsize=settings.stats_cache_size, ttl=settings.stats_cache_ttl)
+
+        self.requests = 0
+        self.computed = 0
+        self.timeouts = 0
+        self.last_ms = 0.0
+
+    async def _recent_question_ids(self, user_id: int) -> Set[int]:
+        since = datetime.utcnow() - timedelta(days=self.exclude_days)
+        async with AsyncSessionLocal() as db:
+            return set(await db.scalars(
+                select(PracticeAnswer.question_id).where(
+                    PracticeAnswer.user_id == user_id,
+                    PracticeAnswer.created_at >= since,
+                ).order_by(PracticeAnswer.created_at.desc()).limit(self.exclude_limit)
+            ))
+
+    async def _compute(self, user_id: int, summary: RollupSummary, limit: int) -> List[RecommendationItem]:
+        # 目录首次加载不随超时取消，之后的请求可以直接使用；过期后在后台刷新
+        pools = await asyncio.shield(question_catalog.pools(allow_stale=True))
+        exclude = await self._recent_question_ids(user_id) if not summary.empty else set()
+        return [_to_item(pick) for pick in rank_questions(pools, summary, exclude, limit)]
+
+    async def recommend(self, user_id: int, summary: RollupSummary, limit: int) -> List[RecommendationItem]:
+        """summary 为用户的学情汇总（learning_rollups.load_summary）"""
+        self.requests += 1
+        cached = self._cache.get(user_id)
+        if cached is not None and cached[0] is summary and len(cached[1]) >= limit:
+            return cached[1][:limit]
+
+        started = time.perf_counter()
+        try:
+            items = await asyncio.wait_for(
+                self._compute(user_id, summary, max(limit, CACHED_ITEMS)), timeout=self.budget
+            )
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            return FALLBACK_RECOMMENDATIONS[:limit]
+        finally:
+            self.last_ms = round((time.perf_counter() - started) * 1000, 2)
+
+        self.computed += 1
+        if not items:
+            return FALLBACK_RECOMMENDATIONS[:limit]
+        self._cache.set(user_id, (summary, items))
+        return items[:limit]
+
+    def stats(self) -> Dict:
+        return {
+            "requests": self.requests,
+            "computed": self.computed,
+            "timeouts": self.timeouts,
+            "last_ms": self.last_ms,
+            "cache": self._cache.stats(),
+        }
+
+
+recommender = Recommender(
+    budget_ms=settings.recommend_budget_ms,
+    exclude_days=settings.recommend_exclude_days,
+    exclude_limit=settings.recommend_exclude_limit,
+)
+
+
+# ========== 离线评估 ==========
+
+async def evaluate(days: int, k: int, max_users: int, seed: int = 0) -> Dict:
+    """以 N 天前为界：用之前的答题生成推荐，统计推荐题目的题型在之后出现错题的比例"""
+    rng = random.Random(seed)
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    pools = await question_catalog.pools()
+    everything = [(pool, item) for pool, items in pools.items() for item in items]
+    if not everything:
+        return {"users": 0}
+
+    is_correct = func.coalesce(PracticeAnswer.is_correct, False)
+    error_type = case(
+        (is_correct, ERROR_NONE),
+        else_=func.coalesce(PracticeAnswer.error_type, ERROR_PENDING),
+    ).label("bucket_error_type")
+
+    users = hits = baseline_hits = total = 0
+    async with AsyncSessionLocal() as db:
+        user_ids = list(await db.scalars(
+            select(PracticeAnswer.user_id).where(PracticeAnswer.created_at >= cutoff)
+            .distinct().order_by(PracticeAnswer.user_id).limit(max_users)
+        ))
+        for user_id in user_ids:
+            history = (await db.execute(
+                select(
+                    Question.category,
+                    Question.question_type,
+                    error_type,
+                    func.count(),
+                    func.sum(cast(case((is_correct, 1), else_=0), Integer)),
+                ).join(Question, PracticeAnswer.question_id == Question.id).where(
+                    PracticeAnswer.user_id == user_id,
+                    PracticeAnswer.created_at < cutoff,
+                ).group_by(Question.category, Question.question_type, literal_column(error_type.name))
+            )).all()
+            if not history:
+                continue
+            summary = RollupSummary(tuple(Bucket(*row) for row in history))
+
+            future_errors = set((await db.execute(
+                select(Question.category, Question.question_type).select_from(PracticeAnswer).join(
+                    Question, PracticeAnswer.question_id == Question.id
+                ).where(
+                    PracticeAnswer.user_id == user_id,
+                    PracticeAnswer.created_at >= cutoff,
+                    is_correct == False,
+                ).distinct()
+            )).all())
+            exclude = set(await db.scalars(
+                select(PracticeAnswer.question_id).where(
+                    PracticeAnswer.user_id == user_id,
+                    PracticeAnswer.created_at >= cutoff - timedelta(days=settings.recommend_exclude_days),
+                    PracticeAnswer.created_at < cutoff,
+                )
+            ))
+
+            picks = rank_questions(pools, summary, exclude, k, rng)
+            baseline = rng.sample(everything, len(picks))
+            users += 1
+            total += len(picks)
+            hits += sum(1 for pick in picks if pick.pool[:2] in future_errors)
+            baseline_hits += sum(1 for pool, _ in baseline if pool[:2] in future_errors)
+
+    return {
+        "users": users,
+        "recommended": total,
+        "precision": round(hits / total, 3) if total else 0.0,
+        "random_precision": round(baseline_hits / total, 3) if total else 0.0,
+    }
+
+
+def main(argv: list[str]) -> int:
+    from app.database import engine, init_db
+    from app.migrations import run_migrations
+
+    parser = argparse.ArgumentParser(prog="python -m app.services.recommender", description="推荐离线评估")
+    parser.add_argument("--evaluate", action="store_true", help="用历史答题评估推荐效果")
+    parser.add_argument("--days", type=int, default=7, help="留出最近 N 天作为评估数据")
+    parser.add_argument("--k", type=int, default=5, help="每个用户推荐的题目数")
+    parser.add_argument("--users", type=int, default=1000, help="最多评估的用户数")
+    args = parser.parse_args(argv)
+    if not args.evaluate:
+        parser.print_help()
+        return 1
+
+    init_db()
+    run_migrations(engine)
+    result = asyncio.run(evaluate(args.days, args.k, args.users))
+    if not result["users"]:
+        print("没有可评估的用户（需要评估期前后都有答题记录）")
+        return 1
+    print(
+        f"评估 {result['users']} 个用户，推荐 {result['recommended']} 道题：\n"
+        f"  命中之后出错题型的比例 {result['precision']:.1%}（随机推荐 {result['random_precision']:.1%}）"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,434 @@
+"""
+LumiAI - 学情报告定时生成
+
+进程内调度器在低峰时段（report_window_*，UTC）为有练习记录的用户生成日报/周报/月报：
+- 按用户 id 游标分批扫描周期内有练习的用户，每批两次聚合查询（练习会话 + 学情汇总），内存占用与批大小有关
+- 报告先以 ON CONFLICT DO NOTHING 插入（每个用户每个周期唯一），插入成功的才去生成 AI 建议，
+  多个进程同时运行也不会重复生成
+- AI 建议按 report_ai_concurrency 限制并发；失败不影响报告本身，报告保持 ai_status=pending，
+  之后每次检查时重试补齐范围内仍为 pending 的报告（距上次尝试至少 report_poll_interval 秒），
+  以条件 UPDATE 抢占，多个进程不会同时为同一份报告生成建议
+- 补齐模式：每次检查最近 report_catchup_periods 个已结束的周期，停机期间错过的报告会被补上
+
+也可以手动立即执行（忽略低峰时段）：
+
+    python -m app.services.reports [--type weekly] [--periods 8]
+"""
+import argparse
+import asyncio
+import json
+import sys
+import time
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import func, or_, select, update
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.practice import LearningRollup, PracticeSession
+from app.models.report import LearningReport
+from app.services.ai_service import request_report_suggestions
+from app.services.learning_rollups import Bucket, RollupSummary
+
+settings = get_settings()
+
+REPORT_TYPES = ("daily", "weekly", "monthly")
+
+CATEGORIES = ("listening", "reading", "writing", "speaking")
+
+AI_PENDING = "pending"
+AI_DONE = "done"
+
+Period = Tuple[datetime, datetime]
+
+
+# ========== 周期 ==========
+
+def period_containing(report_type: str, moment: datetime) -> Period:
+    """moment 所在周期的 [开始, 结束)；周从周一开始"""
+    day = moment.replace(hour=0, minute=0, second=0, microsecond=0)
+    if report_type == "daily":
+        return day, day + timedelta(days=1)
+    if report_type == "weekly":
+        start = day - timedelta(days=day.weekday())
+        return start, start + timedelta(days=7)
+    if report_type == "monthly":
+        start = day.replace(day=1)
+        return start, (start + timedelta(days=32)).replace(day=1)
+    raise ValueError(f"未知报告类型: {report_type}")
+
+
+def completed_periods(report_type: str, now: datetime, count: int) -> List[Period]:
+    """最近 count 个已结束的周期（从早到晚）"""
+    periods = []
+    start, _ = period_containing(report_type, now)
+    for _ in range(count):
+        start, end = period_containing(report_type, start - timedelta(microseconds=1))
+        periods.append((start, end))
+    return periods[::-1]
+
+
+def in_window(hour: int, start_hour: int, end_hour: int) -> bool:
+    """hour 是否在 [start_hour, end_hour) 内，支持跨零点（如 22-4）"""
+    if start_hour <= end_hour:
+        return start_hour <= hour < end_hour
+    return hour >= start_hour or hour < end_hour
+
+
+# ========== 报告内容 ==========
+
+def _percent(part: int, whole: int) -> int:
+    return int(part * 100 / whole) if whole else 0
+
+
+def build_report_data(period: Period, sessions: Dict[str, Tuple[int, int, Optional[float]]],
+                      summary: RollupSummary) -> Dict:
+    """报告 JSON：sessions 为 {类别: (会话数, 用时秒数, 平均预估分数)}，答题统计来自学情汇总"""
+    by_category = summary.totals_by("category")
+    answers = sum(total for total, _ in by_category.values())
+    correct = sum(right for _, right in by_category.values())
+    return {
+        "period": {"start": period[0].isoformat(), "end": period[1].isoformat()},
+        "sessions": sum(count for count, _, _ in sessions.values()),
+        "minutes": {category: sessions.get(category, (0, 0, None))[1] // 60 for category in CATEGORIES},
+        # 只统计有评分的会话，没有评分的类别不出现
+        "scores": {
+            category: round(score, 1) for category, (_, _, score) in sessions.items() if score is not None
+        },
+        "answers": answers,
+        "correct": correct,
+        "accuracy": {
+            category: _percent(right, total) for category, (total, right) in by_category.items()
+        },
+        "question_types": {
+            category: {
+                question_type: {"answers": total, "correct": right, "accuracy": _percent(right, total)}
+                for question_type, (total, right) in summary.totals_by("question_type", category=category).items()
+            }
+            for category in by_category
+        },
+        "error_types": summary.error_counts(),
+        "pending_count": summary.pending_count,
+    }
+
+
+def _report_row(user_id: int, report_type: str, period: Period, data: Dict,
+                now: datetime, with_ai: bool) -> Dict:
+    minutes = data["minutes"]
+    accuracy = data["accuracy"]
+    # 没有答题记录的报告不生成建议
+    wants_ai = with_ai and bool(data["answers"])
+    return {
+        "user_id": user_id,
+        "report_type": report_type,
+        "period_start": period[0],
+        "period_end": period[1],
+        "report_data": json.dumps(data, ensure_ascii=False),
+        "listening_minutes": minutes["listening"],
+        "reading_minutes": minutes["reading"],
+        "writing_minutes": minutes["writing"],
+        "speaking_minutes": minutes["speaking"],
+        "listening_accuracy": accuracy.get("listening", 0),
+        "reading_accuracy": accuracy.get("reading", 0),
+        "writing_score": data["scores"].get("writing"),
+        "speaking_score": data["scores"].get("speaking"),
+        "ai_suggestions": None,
+        # 插入成功的一方立即生成建议，记为已开始尝试
+        "ai_status": AI_PENDING if wants_ai else None,
+        "ai_attempted_at": now if wants_ai else None,
+        "generated_at": now,
+    }
+
+
+def _insert_statement(dialect: str):
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        raise RuntimeError(f"不支持的数据库: {dialect}")
+    table = LearningReport.__table__
+    return (
+        insert(table)
+        .on_conflict_do_nothing(index_elements=["user_id", "report_type", "period_start"])
+        .returning(table.c.id, table.c.user_id, table.c.report_data)
+    )
+
+
+# ========== 调度器 ==========
+
+class ReportScheduler:
+    """进程内的报告调度器，报告是否已生成以数据库为准"""
+
+    def __init__(self, enabled: bool, report_types: Iterable[str], window: Tuple[int, int],
+                 poll_interval: float, batch_size: int, catchup_periods: int,
+                 ai_types: Iterable[str], ai_concurrency: int):
+        self.enabled = enabled
+        self.report_types = [t for t in report_types if t in REPORT_TYPES]
+        self.window = window
+        self.poll_interval = poll_interval
+        self.batch_size = batch_size
+        self.catchup_periods = catchup_periods
+        self.ai_types = set(ai_types)
+        self.ai_concurrency = ai_concurrency
+
+        self._task: Optional[asyncio.Task] = None
+        self._lock = asyncio.Lock()
+        # 本进程已确认完成的 (类型, 周期开始)，避免每次轮询重复扫描
+        self._completed: Set[Tuple[str, datetime]] = set()
+
+        self.reports_generated = 0
+        self.users_scanned = 0
+        self.batches = 0
+        self.ai_calls = 0
+        self.ai_failures = 0
+        self.last_run_at: Optional[datetime] = None
+        self.last_run_seconds = 0.0
+        self.last_run_reports = 0
+
+    async def start(self) -> None:
+        """启动定时检查（应用启动时调用）"""
+        if self.enabled and self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            try:
+                if in_window(datetime.utcnow().hour, *self.window):
+                    await self.run_due()
+            except Exception as e:
+                print(f"生成学情报告失败: {e}")
+            await asyncio.sleep(self.poll_interval)
+
+    async def run_due(self, now: Optional[datetime] = None,
+                      periods: Optional[int] = None,
+                      report_types: Optional[Iterable[str]] = None) -> int:
+        """补齐最近 periods 个已结束周期的报告，返回本次生成的报告数"""
+        now = now or datetime.utcnow()
+        periods = self.catchup_periods if periods is None else periods
+        async with self._lock:
+            started = time.perf_counter()
+            generated = 0
+            for report_type in report_types or self.report_types:
+                for period in completed_periods(report_type, now, periods):
+                    if (report_type, period[0]) in self._completed:
+                        continue
+                    generated += await self.generate_period(report_type, period)
+                    self._completed.add((report_type, period[0]))
+                if report_type in self.ai_types:
+                    for period in completed_periods(report_type, now, periods):
+                        await self.retry_suggestions(report_type, period, now)
+
+            self.last_run_at = now
+            self.last_run_seconds = round(time.perf_counter() - started, 3)
+            self.last_run_reports = generated
+            if generated:
+                print(f"已生成 {generated} 份学情报告（{self.last_run_seconds} 秒）")
+            return generated
+
+    async def generate_period(self, report_type: str, period: Period) -> int:
+        """按用户 id 游标分批为一个周期生成报告"""
+        generated = 0
+        last_user_id = 0
+        while True:
+            async with AsyncSessionLocal() as db:
+                user_ids = list(await db.scalars(
+                    select(PracticeSession.user_id).where(
+                        PracticeSession.user_id > last_user_id,
+                        PracticeSession.started_at >= period[0],
+                        PracticeSession.started_at < period[1],
+                    ).distinct().order_by(PracticeSession.user_id).limit(self.batch_size)
+                ))
+            if not user_ids:
+                return generated
+            last_user_id = user_ids[-1]
+            self.users_scanned += len(user_ids)
+            self.batches += 1
+            generated += await self._generate_batch(report_type, period, user_ids)
+
+    async def _generate_batch(self, report_type: str, period: Period, user_ids: List[int]) -> int:
+        async with AsyncSessionLocal() as db:
+            existing = set(await db.scalars(
+                select(LearningReport.user_id).where(
+                    LearningReport.report_type == report_type,
+                    LearningReport.period_start == period[0],
+                    LearningReport.user_id.in_(user_ids),
+                )
+            ))
+            user_ids = [user_id for user_id in user_ids if user_id not in existing]
+            if not user_ids:
+                return 0
+
+            sessions: Dict[int, Dict[str, Tuple[int, int, Optional[float]]]] = {user_id: {} for user_id in user_ids}
+            for user_id, category, count, seconds, score in (await db.execute(
+                select(
+                    PracticeSession.user_id,
+                    PracticeSession.category,
+                    func.count(),
+                    func.coalesce(func.sum(PracticeSession.time_spent_seconds), 0),
+                    func.avg(PracticeSession.score),
+                ).where(
+                    PracticeSession.user_id.in_(user_ids),
+                    PracticeSession.started_at >= period[0],
+                    PracticeSession.started_at < period[1],
+                ).group_by(PracticeSession.user_id, PracticeSession.category)
+            )).all():
+                sessions[user_id][category] = (count, seconds, score)
+
+            buckets: Dict[int, List[Bucket]] = {user_id: [] for user_id in user_ids}
+            rollup = LearningRollup.__table__
+            for user_id, *bucket in (await db.execute(
+                select(
+                    rollup.c.user_id,
+                    rollup.c.category,
+                    rollup.c.question_type,
+                    rollup.c.error_type,
+                    func.sum(rollup.c.answer_count),
+                    func.sum(rollup.c.correct_count),
+                ).where(
+                    rollup.c.user_id.in_(user_ids),
+                    rollup.c.day >= period[0].date(),
+                    rollup.c.day < period[1].date(),
+                ).group_by(rollup.c.user_id, rollup.c.category, rollup.c.question_type, rollup.c.error_type)
+            )).all():
+                buckets[user_id].append(Bucket(*bucket))
+
+            now = datetime.utcnow()
+            rows = [
+                _report_row(
+                    user_id, report_type, period,
+                    build_report_data(period, sessions[user_id], RollupSummary(tuple(buckets[user_id]))),
+                    now, report_type in self.ai_types,
+                )
+                for user_id in user_ids
+            ]
+            # 只有本次插入成功的报告才由本进程生成 AI 建议
+            inserted = (await db.execute(_insert_statement(db.bind.dialect.name), rows)).all()
+            await db.commit()
+
+        self.reports_generated += len(inserted)
+        if report_type in self.ai_types:
+            await self._add_suggestions(report_type, inserted)
+        return len(inserted)
+
+    async def retry_suggestions(self, report_type: str, period: Period, now: datetime) -> None:
+        """为一个周期内生成 AI 建议失败（仍为 pending）的报告重新生成建议"""
+        retry_before = now - timedelta(seconds=self.poll_interval)
+        pending = (
+            LearningReport.report_type == report_type,
+            LearningReport.period_start == period[0],
+            LearningReport.ai_status == AI_PENDING,
+            or_(LearningReport.ai_attempted_at.is_(None), LearningReport.ai_attempted_at < retry_before),
+        )
+        while True:
+            async with AsyncSessionLocal() as db:
+                report_ids = list(await db.scalars(
+                    select(LearningReport.id).where(*pending)
+                    .order_by(LearningReport.id).limit(self.batch_size)
+                ))
+                if not report_ids:
+                    return
+                # 抢占：只处理本进程把 ai_attempted_at 改掉的报告，抢到的报告本轮不会再被选中
+                claimed = (await db.execute(
+                    update(LearningReport)
+                    .where(LearningReport.id.in_(report_ids), *pending)
+                    .values(ai_attempted_at=now)
+                    .returning(LearningReport.id, LearningReport.user_id, LearningReport.report_data)
+                )).all()
+                await db.commit()
+            await self._add_suggestions(report_type, claimed)
+
+    async def _add_suggestions(self, report_type: str, reports) -> None:
+        semaphore = asyncio.Semaphore(self.ai_concurrency)
+
+        async def suggest(report_id: int, report_data: str) -> Optional[Dict]:
+            data = json.loads(report_data)
+            if not data["answers"]:
+                return None
+            async with semaphore:
+                self.ai_calls += 1
+                try:
+                    text = await request_report_suggestions(report_type, data)
+                except Exception as e:
+                    self.ai_failures += 1
+                    print(f"学情报告 {report_id} 生成建议失败: {e}")
+                    return None
+            return {"id": report_id, "ai_suggestions": text, "ai_status": AI_DONE}
+
+        results = await asyncio.gather(*(suggest(report_id, data) for report_id, _, data in reports))
+        changed = [result for result in results if result]
+        if changed:
+            async with AsyncSessionLocal() as db:
+                await db.execute(update(LearningReport), changed)
+                await db.commit()
+
+    def stats(self) -> Dict:
+        rate = self.last_run_reports / self.last_run_seconds if self.last_run_seconds else 0.0
+        return {
+            "enabled": self.enabled,
+            "running": self._lock.locked(),
+            "reports_generated": self.reports_generated,
+            "users_scanned": self.users_scanned,
+            "batches": self.batches,
+            "ai_calls": self.ai_calls,
+            "ai_failures": self.ai_failures,
+            "last_run_at": self.last_run_at.isoformat() if self.last_run_at else None,
+            "last_run_seconds": self.last_run_seconds,
+            "last_run_reports": self.last_run_reports,
+            "last_run_reports_per_second": round(rate, 1),
+        }
+
+
+report_scheduler = ReportScheduler(
+    enabled=settings.report_scheduler_enabled,
+    report_types=settings.report_types,
+    window=(settings.report_window_start_hour, settings.report_window_end_hour),
+    poll_interval=settings.report_poll_interval,
+    batch_size=settings.report_batch_size,
+    catchup_periods=settings.report_catchup_periods,
+    ai_types=settings.report_ai_types,
+    ai_concurrency=settings.report_ai_concurrency,
+)
+
+
+async def _run_cli(report_types: List[str], periods: int) -> int:
+    from app.services.ai_service import close_http_client, init_http_client
+
+    await init_http_client()
+    try:
+        return await report_scheduler.run_due(periods=periods, report_types=report_types)
+    finally:
+        await close_http_client()
+
+
+def main(argv: list[str]) -> int:
+    from app.database import engine, init_db
+    from app.migrations import run_migrations
+
+    parser = argparse.ArgumentParser(prog="python -m app.services.reports", description="立即生成（补齐）学情报告")
+    parser.add_argument("--type", choices=REPORT_TYPES, action="append", help="报告类型，可重复（默认按配置）")
+    parser.add_argument("--periods", type=int, default=settings.report_catchup_periods,
+                        help="补齐最近 N 个已结束的周期")
+    args = parser.parse_args(argv)
+
+    init_db()
+    run_migrations(engine)
+    generated = asyncio.run(_run_cli(args.type or report_scheduler.report_types, max(args.periods, 1)))
+    stats = report_scheduler.stats()
+    print(
+        f"生成完成：{generated} 份报告，扫描 {stats['users_scanned']} 个用户，"
+        f"AI 建议 {stats['ai_calls'] - stats['ai_failures']}/{stats['ai_calls']}，"
+        f"用时 {stats['last_run_seconds']} 秒"
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
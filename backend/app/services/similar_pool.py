@@ -0,0 +1,173 @@
+"""
+LumiAI - 相似题池
+
+"生成相似题"不再每次都调用 AI：生成的题目按 (原题, 错误类型) 存入 similar_questions，
+同一道题、同一类错误的用户共用一个池：
+- 池中有当前用户没看过的题时直接返回（一次查询），并记入 similar_question_seen，同一用户不会重复看到
+- 用户在池中剩余未看过的题少于 similar_pool_watermark 时，在后台补充生成（同一个池同时只补充一次）
+- 池中没有未看过的题时才同步调用 AI，生成结果同样进入池中
+
+AI 生成失败的结果不会进入池中。
+"""
+import asyncio
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+from sqlalchemy import func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.config import get_settings
+from app.database import AsyncSessionLocal
+from app.models.practice import SimilarQuestion, SimilarQuestionSeen
+from app.models.question import Question
+from app.services.ai_service import request_similar_question
+
+settings = get_settings()
+
+PoolKey = Tuple[int, str]               # (原题 id, 错误类型)
+
+
+def _mark_seen_statement(dialect: str):
+    if dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    elif dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        raise RuntimeError(f"不支持的数据库: {dialect}")
+    # 同一用户并发请求可能取到同一道题，重复记录直接忽略
+    return dialect_insert(SimilarQuestionSeen.__table__).on_conflict_do_nothing(
+        index_elements=["user_id", "similar_question_id"]
+    )
+
+
+class SimilarQuestionPool:
+    """相似题池及其后台补充"""
+
+    def __init__(self, watermark: int, refill_size: int, max_size: int, concurrency: int):
+        self.watermark = watermark
+        self.refill_size = refill_size
+        self.max_size = max_size
+        self._semaphore = asyncio.Semaphore(concurrency)
+        self._refilling: Set[PoolKey] = set()
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.misses = 0
+        self.generated = 0
+        self.refilled = 0
+        self.failures = 0
+
+    async def take(self, db: AsyncSession, user_id: int, question: Question,
+                   error_type: str) -> Tuple[int, str, bool]:
+        """
+        为用户取一道没看过的相似题，返回 (相似题 id, 内容, 是否来自池)
+        池中没有可用的题时同步生成，生成失败时抛出异常
+        """
+        seen = select(SimilarQuestionSeen.id).where(
+            SimilarQuestionSeen.user_id == user_id,
+            SimilarQuestionSeen.similar_question_id == SimilarQuestion.id,
+        )
+        # 多取 watermark 道，顺便判断取走一道后是否低于水位
+        unseen = list(await db.execute(
+            select(SimilarQuestion.id, SimilarQuestion.content).where(
+                SimilarQuestion.question_id == question.id,
+                SimilarQuestion.error_type == error_type,
+                ~seen.exists(),
+            ).order_by(SimilarQuestion.id).limit(self.watermark + 1)
+        ))
+
+        if unseen:
+            self.hits += 1
+            similar_id, content = unseen[0]
+        else:
+            self.misses += 1
+            content = await request_similar_question(question.content, error_type)
+            similar = SimilarQuestion(question_id=question.id, error_type=error_type, content=content)
+            db.add(similar)
+            await db.flush()
+            similar_id = similar.id
+            self.generated += 1
+
+        await db.execute(_mark_seen_statement(db.bind.dialect.name).values(
+            user_id=user_id, similar_question_id=similar_id, seen_at=datetime.utcnow()
+        ))
+        await db.commit()
+
+        if len(unseen) - 1 < self.watermark:
+            self._schedule_refill((question.id, error_type), question.content)
+        return similar_id, content, bool(unseen)
+
+    def _schedule_refill(self, key: PoolKey, original_question: str) -> None:
+        if key in self._refilling:
+            return
+        self._refilling.add(key)
+        task = asyncio.create_task(self._refill(key, original_question))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _generate(self, original_question: str, error_type: str) -> Optional[str]:
+        async with self._semaphore:
+            try:
+                return await request_similar_question(original_question, error_type)
+            except Exception as e:
+                self.failures += 1
+                print(f"补充相似题失败: {e}")
+                return None
+
+    async def _refill(self, key: PoolKey, original_question: str) -> None:
+        question_id, error_type = key
+        try:
+            async with AsyncSessionLocal() as db:
+                size = await db.scalar(
+                    select(func.count()).select_from(SimilarQuestion).where(
+                        SimilarQuestion.question_id == question_id,
+                        SimilarQuestion.error_type == error_type,
+                    )
+                )
+            count = min(self.refill_size, self.max_size - size)
+            if count <= 0:
+                return
+
+            results = await asyncio.gather(*(
+                self._generate(original_question, error_type) for _ in range(count)
+            ))
+            now = datetime.utcnow()
+            rows = [
+                {"question_id": question_id, "error_type": error_type, "content": content, "created_at": now}
+                for content in results if content
+            ]
+            if rows:
+                async with AsyncSessionLocal() as db:
+                    await db.execute(insert(SimilarQuestion), rows)
+                    await db.commit()
+                self.refilled += len(rows)
+        except Exception as e:
+            print(f"补充相似题池失败 {key}: {e}")
+        finally:
+            self._refilling.discard(key)
+
+    async def stop(self) -> None:
+        """取消进行中的补充（应用关闭时调用，下次取题时会重新触发）"""
+        for task in list(self._tasks):
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+
+    def stats(self) -> Dict:
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / requests, 3) if requests else 0.0,
+            "generated": self.generated,
+            "refilled": self.refilled,
+            "failures": self.failures,
+            "refilling": len(self._refilling),
+        }
+
+
+similar_pool = SimilarQuestionPool(
+    watermark=settings.similar_pool_watermark,
+    refill_size=settings.similar_pool_refill_size,
+    max_size=settings.similar_pool_max_size,
+    concurrency=settings.similar_pool_concurrency,
+)
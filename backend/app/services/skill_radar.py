@@ -0,0 +1,189 @@
+"""
+LumiAI - 技能雷达图
+
+六项技能由用户的实际练习数据计算，越近的数据权重越高（按 skill_half_life_days 指数衰减）：
+- 词汇 / 语法 / 逻辑：对应错误类型的错题占已分析答题的比例（读取学情汇总表的按日桶）
+- 发音：口语题正确率
+- 流利度 / 连贯性：口语 / 写作练习会话的预估分数（0-9）
+
+数据较少时向默认值收缩（默认值即原先的示例数据），没有数据的技能直接展示默认值。
+读取的行数只与统计天数有关，与答题总数无关；结果按用户缓存，答题或练习会话写入的事务提交后清除。
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy import event, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import object_session
+
+from app.config import get_settings
+from app.models.practice import LearningRollup, PracticeAnswer, PracticeSession
+from app.schemas.analysis import SkillRadarData, SkillScore
+from app.services.cache import TTLCache, invalidate_after_commit
+from app.services.learning_rollups import ERROR_NONE, ERROR_PENDING
+from app.services.learning_stats import EPOCH, epoch_day
+
+settings = get_settings()
+
+FULL_MARK = 150
+BAND_MAX = 9.0                  # 练习会话预估分数的满分
+
+# 先验权重：相当于多少道题（或多少次会话）的默认水平
+PRIOR_ANSWERS = 10.0
+PRIOR_SESSIONS = 2.0
+
+
+@dataclass(frozen=True)
+class Skill:
+    name: str
+    name_cn: str
+    default: int                # 没有数据时的得分
+
+
+VOCABULARY = Skill("Vocabulary", "词汇", 120)
+GRAMMAR = Skill("Grammar", "语法", 98)
+LOGIC = Skill("Logic", "逻辑", 86)
+PRONUNCIATION = Skill("Pronunciation", "发音", 99)
+FLUENCY = Skill("Fluency", "流利度", 85)
+COHERENCE = Skill("Coherence", "连贯性", 65)
+
+SKILLS = [VOCABULARY, GRAMMAR, LOGIC, PRONUNCIATION, FLUENCY, COHERENCE]
+
+# 错误类型 -> 技能
+ERROR_SKILLS = {"vocabulary": VOCABULARY, "grammar": GRAMMAR, "logic": LOGIC}
+
+# 每个用户一条缓存，值为 (今天, SkillRadarData)：衰减权重随日期变化，跨天后重新计算
+_skill_cache = TTLCache(maxsize=settings.stats_cache_size, ttl=settings.stats_cache_ttl)
+
+
+def invalidate_skills(user_id: int) -> None:
+    _skill_cache.pop(user_id)
+
+
+def skill_cache_stats() -> dict:
+    return _skill_cache.stats()
+
+
+@event.listens_for(PracticeAnswer, "after_insert")
+@event.listens_for(PracticeAnswer, "after_update")
+@event.listens_for(PracticeSession, "after_insert")
+@event.listens_for(PracticeSession, "after_update")
+@event.listens_for(PracticeSession, "after_delete")
+def _invalidate_on_change(mapper, connection, target) -> None:
+    # 与学习统计相同，提交后才清除；回滚的写入不影响缓存
+    user_id = target.user_id
+    invalidate_after_commit(object_session(target), ("skill_radar", user_id),
+                            lambda: invalidate_skills(user_id))
+
+
+def decay_weight(age_days: int, half_life: float) -> float:
+    """age_days 天前的数据的权重（今天为 1）"""
+    return 0.5 ** (max(age_days, 0) / half_life)
+
+
+def _shrink(skill: Skill, ratio: float, evidence: float, prior: float) -> int:
+    """ratio 为 0-1 的表现，evidence 为衰减后的数据量；数据越少越接近默认值"""
+    score = (prior * skill.default + evidence * ratio * FULL_MARK) / (prior + evidence)
+    return int(round(min(max(score, 0), FULL_MARK)))
+
+
+async def _answer_totals(db: AsyncSession, user_id: int, today: date, since: date,
+                         half_life: float) -> Tuple[float, Dict[str, float], float, float]:
+    """衰减加权的 (已分析答题数, {错误类型: 错题数}, 口语答题数, 口语答对数)"""
+    rollup = LearningRollup.__table__
+    rows = (await db.execute(
+        select(
+            rollup.c.category,
+            rollup.c.error_type,
+            rollup.c.day,
+            func.sum(rollup.c.answer_count),
+            func.sum(rollup.c.correct_count),
+        ).where(
+            rollup.c.user_id == user_id,
+            rollup.c.day >= since,
+            rollup.c.error_type != ERROR_PENDING,
+        ).group_by(rollup.c.category, rollup.c.error_type, rollup.c.day)
+    )).all()
+
+    answers = 0.0
+    errors: Dict[str, float] = {}
+    speaking_answers = 0.0
+    speaking_correct = 0.0
+    for category, error_type, day, count, correct in rows:
+        weight = decay_weight((today - day).days, half_life)
+        answers += weight * count
+        if error_type != ERROR_NONE:
+            errors[error_type] = errors.get(error_type, 0.0) + weight * count
+        if category == "speaking":
+            speaking_answers += weight * count
+            speaking_correct += weight * correct
+    return answers, errors, speaking_answers, speaking_correct
+
+
+async def _session_bands(db: AsyncSession, user_id: int, today: date, since: date,
+                         half_life: float) -> Dict[str, Tuple[float, float]]:
+    """写作、口语会话的衰减加权 {类别: (会话数, 预估分数之和)}"""
+    day = epoch_day(PracticeSession.started_at, db.bind.dialect.name).label("session_day")
+    rows = (await db.execute(
+        select(
+            PracticeSession.category,
+            day,
+            func.count(),
+            func.sum(PracticeSession.score),
+        ).where(
+            PracticeSession.user_id == user_id,
+            PracticeSession.category.in_(["writing", "speaking"]),
+            PracticeSession.score.is_not(None),
+            PracticeSession.started_at >= datetime.combine(since, time.min),
+        ).group_by(PracticeSession.category, literal_column(day.name))
+    )).all()
+
+    today_number = (today - EPOCH).days
+    bands: Dict[str, List[float]] = {}
+    for category, day_number, count, total in rows:
+        weight = decay_weight(today_number - day_number, half_life)
+        band = bands.setdefault(category, [0.0, 0.0])
+        band[0] += weight * count
+        band[1] += weight * total
+    return {category: (count, total) for category, (count, total) in bands.items()}
+
+
+async def compute_skills(db: AsyncSession, user_id: int, today: date) -> SkillRadarData:
+    half_life = settings.skill_half_life_days
+    since = today - timedelta(days=settings.skill_window_days - 1)
+    answers, errors, speaking_answers, speaking_correct = await _answer_totals(
+        db, user_id, today, since, half_life
+    )
+    bands = await _session_bands(db, user_id, today, since, half_life)
+
+    scores: Dict[str, int] = {}
+    for error_type, skill in ERROR_SKILLS.items():
+        ratio = 1 - errors.get(error_type, 0.0) / answers if answers else 0.0
+        scores[skill.name] = _shrink(skill, ratio, answers, PRIOR_ANSWERS)
+
+    ratio = speaking_correct / speaking_answers if speaking_answers else 0.0
+    scores[PRONUNCIATION.name] = _shrink(PRONUNCIATION, ratio, speaking_answers, PRIOR_ANSWERS)
+
+    for skill, category in ((FLUENCY, "speaking"), (COHERENCE, "writing")):
+        count, total = bands.get(category, (0.0, 0.0))
+        ratio = total / count / BAND_MAX if count else 0.0
+        scores[skill.name] = _shrink(skill, ratio, count, PRIOR_SESSIONS)
+
+    return SkillRadarData(skills=[
+        SkillScore(name=skill.name, name_cn=skill.name_cn, score=scores[skill.name], full_mark=FULL_MARK)
+        for skill in SKILLS
+    ])
+
+
+async def get_skill_radar(db: AsyncSession, user_id: int, today: Optional[date] = None) -> SkillRadarData:
+    """获取技能雷达图（按用户缓存）"""
+    today = today or datetime.utcnow().date()
+    generation = _skill_cache.generation
+    cached = _skill_cache.get(user_id)
+    if cached is not None and cached[0] == today:
+        return cached[1]
+
+    radar = await compute_skills(db, user_id, today)
+    _skill_cache.set(user_id, (today, radar), generation=generation)
+    return radar
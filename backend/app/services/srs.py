@@ -0,0 +1,90 @@
+"""
+LumiAI - 生词间隔重复调度（SM-2）
+
+每个生词保存 ease_factor（难度系数）、interval_days（当前间隔）、repetitions（连续答对次数）
+和 due_at（下次复习时间）。复习时按四档评分更新：
+- again：忘记了，连续次数清零，10 分钟后重新出现，难度系数 -0.20
+- hard： 勉强想起，间隔 ×1.2，难度系数 -0.15
+- good： 正常想起，间隔按 1 天 -> 6 天 -> 间隔 × 难度系数 递增
+- easy： 很轻松，在 good 的基础上再 ×1.3，难度系数 +0.15
+"""
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+
+GRADES = ("again", "hard", "good", "easy")
+
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+MAX_INTERVAL_DAYS = 365.0
+
+RELEARN_DELAY = timedelta(minutes=10)
+HARD_MULTIPLIER = 1.2
+EASY_BONUS = 1.3
+
+# 前两次答对的固定间隔（天）
+FIRST_INTERVALS = (1.0, 6.0)
+
+EASE_DELTA = {
+    "again": -0.20,
+    "hard": -0.15,
+    "good": 0.0,
+    "easy": 0.15,
+}
+
+
+@dataclass(frozen=True)
+class CardState:
+    ease_factor: float
+    interval_days: float
+    repetitions: int
+    mastery_level: int
+
+
+@dataclass(frozen=True)
+class ReviewResult:
+    ease_factor: float
+    interval_days: float
+    repetitions: int
+    mastery_level: int
+    due_at: datetime
+
+
+def schedule(state: CardState, grade: str, now: datetime) -> ReviewResult:
+    """根据评分计算新的调度状态"""
+    if grade not in EASE_DELTA:
+        raise ValueError(f"未知评分: {grade}")
+
+    ease = max(MIN_EASE, (state.ease_factor or DEFAULT_EASE) + EASE_DELTA[grade])
+    interval = state.interval_days or 0.0
+    repetitions = state.repetitions or 0
+    mastery = state.mastery_level or 0
+
+    if grade == "again":
+        return ReviewResult(
+            ease_factor=ease,
+            interval_days=0.0,
+            repetitions=0,
+            mastery_level=max(mastery - 1, 0),
+            due_at=now + RELEARN_DELAY,
+        )
+
+    if grade == "hard":
+        interval = max(FIRST_INTERVALS[0], interval * HARD_MULTIPLIER)
+    elif repetitions < len(FIRST_INTERVALS):
+        interval = FIRST_INTERVALS[repetitions]
+    else:
+        interval = interval * ease
+    if grade == "easy":
+        interval *= EASY_BONUS
+        mastery += 1
+    elif grade == "good":
+        mastery += 1
+
+    interval = min(interval, MAX_INTERVAL_DAYS)
+    return ReviewResult(
+        ease_factor=ease,
+        interval_days=round(interval, 2),
+        repetitions=repetitions + 1,
+        mastery_level=min(mastery, 5),
+        due_at=now + timedelta(days=interval),
+    )
@@ -0,0 +1,48 @@
+"""
+基准脚本的公共部分：临时数据库、分位数统计与结果输出
+"""
+import atexit
+import os
+import shutil
+import statistics
+import tempfile
+from typing import Dict, List
+
+
+def use_temp_database(name: str) -> str:
+    """把 DATABASE_URL 指向临时目录中的 SQLite 文件（退出时删除），必须在导入 app 之前调用
+
+    环境变量优先于 .env，基准测试不会写到开发或生产数据库。
+    """
+    directory = tempfile.mkdtemp(prefix="lumiai-bench-")
+    atexit.register(shutil.rmtree, directory, ignore_errors=True)
+    path = os.path.join(directory, f"{name}.db")
+    os.environ["DATABASE_URL"] = f"sqlite:///{path}"
+    return path
+
+
+def percentile(samples: List[float], q: float) -> float:
+    """最近秩法分位数，q 取 0-100"""
+    ordered = sorted(samples)
+    index = max(0, min(len(ordered) - 1, int(round(q / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples: List[float]) -> Dict[str, float]:
+    """秒 -> 毫秒的 p50 / p99 / 平均值"""
+    return {
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples) * 1000, 3),
+    }
+
+
+def print_table(title: str, rows: List[Dict]) -> None:
+    """按列对齐打印结果，rows 的键作为表头"""
+    print(f"\n{title}")
+    if not rows:
+        return
+    headers = list(rows[0])
+    widths = [max(len(str(header)), *(len(str(row[header])) for row in rows)) for header in headers]
+    for values in [headers, *([row[header] for header in headers] for row in rows)]:
+        print("  ".join(str(value).ljust(width) for value, width in zip(values, widths)).rstrip())
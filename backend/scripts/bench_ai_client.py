@@ -0,0 +1,132 @@
+"""
+DeepSeek 客户端：每次调用新建 AsyncClient 与进程共享连接池的单次调用开销对比
+
+在本机启动一个返回固定结果的 OpenAI 兼容桩服务（uvicorn），分别测量：
+- per-call：旧实现，每次调用新建 httpx.AsyncClient（新建 TCP 连接）后关闭
+- pooled：ai_service._chat_completion，复用共享客户端的 keep-alive 连接
+
+per-call 的开销大部分来自构造客户端：httpx 每次新建 AsyncClient 都会创建 SSL 上下文并加载 CA 证书，
+即使请求的是明文 HTTP。桩服务在本机，不含网络往返；真实的 api.deepseek.com 是 HTTPS，
+每个新连接还要多一次 TCP 握手和 TLS 握手（共 2-3 个往返），差距只会更大。
+
+    python -m scripts.bench_ai_client [--calls 500] [--concurrency 1] [--server-latency 0]
+"""
+import argparse
+import asyncio
+import os
+import socket
+import sys
+import threading
+import time
+from typing import Awaitable, Callable, List
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "bench")
+
+import httpx
+import uvicorn
+
+from app.services import ai_service
+from scripts._bench import latency_summary, print_table
+
+RESPONSE_BODY = (
+    b'{"id":"bench","object":"chat.completion","model":"deepseek-chat",'
+    b'"choices":[{"index":0,"message":{"role":"assistant","content":"ok"},"finish_reason":"stop"}]}'
+)
+
+MESSAGES = [{"role": "user", "content": "hello"}]
+
+
+def _stub_app(server_latency: float):
+    async def app(scope, receive, send):
+        if scope["type"] != "http":
+            return
+        while (await receive()).get("more_body"):
+            pass
+        if server_latency:
+            await asyncio.sleep(server_latency)
+        await send({
+            "type": "http.response.start",
+            "status": 200,
+            "headers": [(b"content-type", b"application/json")],
+        })
+        await send({"type": "http.response.body", "body": RESPONSE_BODY})
+
+    return app
+
+
+def start_stub_server(server_latency: float) -> str:
+    """在后台线程中启动桩服务，返回其地址"""
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+    config = uvicorn.Config(_stub_app(server_latency), host="127.0.0.1", port=port,
+                            log_level="warning", access_log=False, lifespan="off")
+    server = uvicorn.Server(config)
+    threading.Thread(target=server.run, daemon=True).start()
+    while not server.started:
+        time.sleep(0.01)
+    return f"http://127.0.0.1:{port}"
+
+
+async def per_call_completion(base_url: str) -> str:
+    """旧实现：每次调用新建客户端"""
+    payload = {"model": ai_service.DEEPSEEK_MODEL, "messages": MESSAGES,
+               "temperature": 0.7, "max_tokens": 100}
+    headers = {"Authorization": "Bearer bench", "Content-Type": "application/json"}
+    async with httpx.AsyncClient(base_url=base_url, timeout=ai_service.REQUEST_TIMEOUT) as client:
+        response = await client.post("/chat/completions", json=payload, headers=headers)
+        response.raise_for_status()
+        return response.json()["choices"][0]["message"]["content"]
+
+
+async def pooled_completion(base_url: str) -> str:
+    return await ai_service._chat_completion(MESSAGES, temperature=0.7, max_tokens=100)
+
+
+async def measure(call: Callable[[str], Awaitable[str]], base_url: str,
+                  calls: int, concurrency: int) -> List[float]:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+
+    async def one() -> None:
+        async with semaphore:
+            started = time.perf_counter()
+            await call(base_url)
+            samples.append(time.perf_counter() - started)
+
+    # 预热：建立连接池、导入 JSON 编解码等一次性开销不计入
+    await asyncio.gather(*(call(base_url) for _ in range(min(concurrency, 10))))
+    await asyncio.gather(*(one() for _ in range(calls)))
+    return samples
+
+
+async def run(calls: int, concurrency: int, server_latency: float) -> None:
+    base_url = start_stub_server(server_latency)
+    ai_service.DEEPSEEK_BASE_URL = base_url
+    await ai_service.init_http_client()
+    try:
+        rows = []
+        for name, call in (("per-call", per_call_completion), ("pooled", pooled_completion)):
+            started = time.perf_counter()
+            samples = await measure(call, base_url, calls, concurrency)
+            elapsed = time.perf_counter() - started
+            rows.append({"mode": name, **latency_summary(samples),
+                         "calls_per_s": round(calls / elapsed, 1)})
+    finally:
+        await ai_service.close_http_client()
+    print_table(f"{calls} 次调用，并发 {concurrency}，桩服务延迟 {server_latency * 1000:.0f} ms", rows)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m scripts.bench_ai_client",
+                                     description="DeepSeek 客户端单次调用开销对比")
+    parser.add_argument("--calls", type=int, default=500, help="每种模式的调用次数")
+    parser.add_argument("--concurrency", type=int, default=1, help="并发调用数")
+    parser.add_argument("--server-latency", type=float, default=0.0, help="桩服务每次响应的延迟（秒）")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args.calls, args.concurrency, args.server_latency))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
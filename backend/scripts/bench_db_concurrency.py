@@ -0,0 +1,174 @@
+"""
+同步与异步数据库会话在 AI + 数据库混合流量下的吞吐对比
+
+临时 SQLite 库中写入一个用户的大量答题记录，构造两个最小应用，路由都是 async def：
+- sync：旧实现，在 async 路由里直接用同步 Session 查询，查询期间整个事件循环被阻塞
+- async：get_db 提供的 AsyncSession（aiosqlite 在线程中执行查询）
+每个应用有两个接口：/db 按题型聚合该用户的答题记录，/ai 模拟一次 DeepSeek 调用（await sleep）。
+通过 ASGI 传输并发请求，按 --ai-ratio 混合两类请求，报告总吞吐和各类请求的延迟。
+
+主要看 AI 请求的延迟：sync 模式下它们排在阻塞的查询后面。总吞吐受 CPU 核数限制，
+单核机器上查询无法并行，两种模式的吞吐接近，async 模式的查询因与其他请求交替执行而延迟更高。
+
+    python -m scripts.bench_db_concurrency [--answers 20000] [--requests 400] [--concurrency 50]
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from collections import defaultdict
+from typing import Dict, List
+
+from scripts._bench import latency_summary, print_table, use_temp_database
+
+use_temp_database("db_concurrency")
+
+import httpx
+from fastapi import Depends, FastAPI
+from sqlalchemy import case, func, insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import SessionLocal, async_engine, engine, get_db, init_db
+from app.models.practice import PracticeAnswer, PracticeSession
+from app.models.question import Question
+from app.models.user import User
+
+USER_ID = 1
+CATEGORIES = ("listening", "reading", "writing", "speaking")
+QUESTION_TYPES = ("multiple_choice", "true_false_not_given", "matching", "fill_blank", "essay")
+
+
+def seed(answers: int, questions: int = 500) -> None:
+    init_db()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{"id": USER_ID, "username": "bench"}])
+        conn.execute(insert(Question.__table__), [
+            {
+                "id": question_id,
+                "category": CATEGORIES[question_id % len(CATEGORIES)],
+                "question_type": QUESTION_TYPES[question_id % len(QUESTION_TYPES)],
+                "difficulty": "medium",
+                "title": f"Question {question_id}",
+                "content": f"Question {question_id} content",
+                "answer": "A",
+            }
+            for question_id in range(1, questions + 1)
+        ])
+        conn.execute(insert(PracticeSession.__table__), [
+            {"id": 1, "user_id": USER_ID, "category": "reading"}
+        ])
+        rng = random.Random(0)
+        batch = []
+        for _ in range(answers):
+            batch.append({
+                "session_id": 1,
+                "question_id": rng.randint(1, questions),
+                "user_id": USER_ID,
+                "user_answer": rng.choice("ABCD"),
+                "is_correct": rng.random() < 0.6,
+            })
+            if len(batch) == 10000:
+                conn.execute(insert(PracticeAnswer.__table__), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(PracticeAnswer.__table__), batch)
+
+
+def _stats_query():
+    return (
+        select(
+            Question.question_type,
+            func.count(),
+            func.sum(case((PracticeAnswer.is_correct, 1), else_=0)),
+        )
+        .join(Question, PracticeAnswer.question_id == Question.id)
+        .where(PracticeAnswer.user_id == USER_ID)
+        .group_by(Question.question_type)
+    )
+
+
+def build_app(mode: str, ai_latency: float) -> FastAPI:
+    app = FastAPI()
+
+    @app.get("/ai")
+    async def ai():
+        await asyncio.sleep(ai_latency)
+        return {"ok": True}
+
+    if mode == "sync":
+        @app.get("/db")
+        async def db_sync():
+            with SessionLocal() as db:
+                rows = db.execute(_stats_query()).all()
+            return {"types": len(rows)}
+    else:
+        @app.get("/db")
+        async def db_async(db: AsyncSession = Depends(get_db)):
+            rows = (await db.execute(_stats_query())).all()
+            return {"types": len(rows)}
+
+    return app
+
+
+async def drive(app: FastAPI, paths: List[str], concurrency: int) -> Dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: Dict[str, List[float]] = defaultdict(list)
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one(path: str) -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                samples[path].append(time.perf_counter() - started)
+
+        # 预热：建立连接、编译语句
+        await asyncio.gather(one("/db"), one("/ai"))
+        samples.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(one(path) for path in paths))
+        elapsed = time.perf_counter() - started
+    return {"elapsed": elapsed, "samples": samples}
+
+
+async def run(requests: int, concurrency: int, ai_ratio: float, ai_latency: float) -> None:
+    rng = random.Random(1)
+    paths = ["/ai" if rng.random() < ai_ratio else "/db" for _ in range(requests)]
+    rows = []
+    for mode in ("sync", "async"):
+        result = await drive(build_app(mode, ai_latency), paths, concurrency)
+        row = {"mode": mode, "req_per_s": round(requests / result["elapsed"], 1)}
+        for path in ("/ai", "/db"):
+            summary = latency_summary(result["samples"][path])
+            row[f"{path[1:]}_p50_ms"] = summary["p50_ms"]
+            row[f"{path[1:]}_p99_ms"] = summary["p99_ms"]
+        rows.append(row)
+    await async_engine.dispose()
+    print_table(
+        f"{requests} 个请求（AI 占 {ai_ratio:.0%}，AI 延迟 {ai_latency * 1000:.0f} ms），"
+        f"并发 {concurrency}，CPU {os.cpu_count()} 核", rows
+    )
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m scripts.bench_db_concurrency",
+                                     description="同步 / 异步数据库会话混合流量吞吐对比")
+    parser.add_argument("--answers", type=int, default=20000, help="写入的答题记录数")
+    parser.add_argument("--requests", type=int, default=400, help="每种模式的请求数")
+    parser.add_argument("--concurrency", type=int, default=50, help="并发请求数")
+    parser.add_argument("--ai-ratio", type=float, default=0.5, help="AI 请求所占比例")
+    parser.add_argument("--ai-latency", type=float, default=0.2, help="模拟的 DeepSeek 响应时间（秒）")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    seed(args.answers)
+    print(f"已写入 {args.answers} 条答题记录（{time.perf_counter() - started:.1f} 秒）")
+    asyncio.run(run(args.requests, args.concurrency, args.ai_ratio, args.ai_latency))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,129 @@
+"""
+题库全文搜索（GET /api/questions/search）在合成语料上的延迟
+
+临时 SQLite 库中写入 --passages 篇 --passage-words 词的阅读文章，词频按 Zipf 分布
+（少数高频词出现在几乎每篇文章里，低频词只出现在少数文章里），部分题目带中文技能标签，
+然后执行迁移建立 FTS5 索引，逐个测量 search_questions 的延迟（按类别过滤，每页 20 条）。
+作为对照，另测一次不走索引的 passage LIKE '%词%' 扫描。
+
+    python -m scripts.bench_question_search [--passages 50000] [--passage-words 400] [--samples 20]
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import sys
+import time
+from typing import Dict, List
+
+from scripts._bench import latency_summary, print_table, use_temp_database
+
+use_temp_database("question_search")
+
+from sqlalchemy import insert, text
+
+from app.database import AsyncSessionLocal, async_engine, engine, init_db
+from app.migrations import run_migrations
+from app.models.question import Question
+from app.services.question_search import search_questions
+
+SYLLABLES = ("ka", "lo", "mi", "ne", "ru", "sa", "ti", "vo", "ze", "pa", "qu", "di", "fo", "ge", "hy")
+SKILL_TAGS = (["阅读理解", "细节题"], ["阅读理解", "主旨题"], ["段落匹配"], ["判断题", "同义替换"])
+
+
+def vocabulary(size: int) -> List[str]:
+    """size 个互不相同的合成词，按频率从高到低排列"""
+    words = []
+    for length in itertools.count(2):
+        for combo in itertools.product(SYLLABLES, repeat=length):
+            words.append("".join(combo))
+            if len(words) == size:
+                return words
+
+
+def seed(passages: int, passage_words: int, vocab: List[str]) -> None:
+    init_db()
+    rng = random.Random(0)
+    weights = [1 / rank for rank in range(1, len(vocab) + 1)]
+    categories = ("reading", "listening")
+    with engine.begin() as conn:
+        batch = []
+        for question_id in range(1, passages + 1):
+            batch.append({
+                "id": question_id,
+                "category": categories[question_id % len(categories)],
+                "question_type": "multiple_choice",
+                "difficulty": "medium",
+                "title": f"Passage {question_id} {' '.join(rng.choices(vocab, weights=weights, k=3))}",
+                "passage": " ".join(rng.choices(vocab, weights=weights, k=passage_words)),
+                "content": " ".join(rng.choices(vocab, weights=weights, k=15)),
+                "answer": "A",
+                "skill_tags": json.dumps(SKILL_TAGS[question_id // 2 % len(SKILL_TAGS)], ensure_ascii=False),
+            })
+            if len(batch) == 2000:
+                conn.execute(insert(Question.__table__), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Question.__table__), batch)
+    # 迁移 0002 / 0007 建立 FTS5 表并 rebuild 索引
+    run_migrations(engine)
+
+
+async def timed(call, samples: int) -> Dict:
+    hits = len(await call())
+    latencies = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - started)
+    return {"hits": hits, **latency_summary(latencies)}
+
+
+async def run(samples: int, vocab: List[str]) -> List[Dict]:
+    queries = {
+        "rare word": vocab[-1],
+        "two terms": f"{vocab[50]} {vocab[500]}",
+        "most frequent word": vocab[0],
+        "prefix": vocab[-1][:5],
+        "cjk 4 chars (trigram)": "阅读理解",
+        "cjk 2 chars (LIKE)": "主旨",
+    }
+    rows = []
+    async with AsyncSessionLocal() as db:
+        for label, query in queries.items():
+            result = await timed(lambda: search_questions(db, query, category="reading"), samples)
+            rows.append({"query": label, "q": query, **result})
+        for label, word in (("LIKE scan, rare", vocab[-1]), ("LIKE scan, frequent", vocab[0])):
+            statement = text(
+                "SELECT id, title FROM questions WHERE category = 'reading' AND passage LIKE :pattern LIMIT 20"
+            )
+
+            async def scan(word=word):
+                return (await db.execute(statement, {"pattern": f"%{word}%"})).all()
+
+            rows.append({"query": label, "q": word, **await timed(scan, samples)})
+    await async_engine.dispose()
+    return rows
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m scripts.bench_question_search",
+                                     description="题库全文搜索延迟")
+    parser.add_argument("--passages", type=int, default=50000, help="文章数")
+    parser.add_argument("--passage-words", type=int, default=400, help="每篇文章的词数")
+    parser.add_argument("--vocabulary", type=int, default=20000, help="合成词表大小")
+    parser.add_argument("--samples", type=int, default=20, help="每个查询的测量次数")
+    args = parser.parse_args(argv)
+
+    vocab = vocabulary(args.vocabulary)
+    started = time.perf_counter()
+    seed(args.passages, args.passage_words, vocab)
+    print(f"已写入并索引 {args.passages} 篇文章（{time.perf_counter() - started:.1f} 秒）")
+    rows = asyncio.run(run(args.samples, vocab))
+    print_table(f"{args.passages} 篇 {args.passage_words} 词的文章，category=reading，limit 20", rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,147 @@
+"""
+随机抽题：全表加载 vs 只取 id vs 进程内 id 索引（question_catalog）
+
+临时 SQLite 库中写入 --questions 道题（默认 10 万，阅读题带 --passage-words 词的文章），
+对几种筛选条件分别测量一次抽题（不含 HTTP）的延迟和 Python 内存峰值：
+- load-all：最初的实现，加载全部符合条件的 Question 对象（含文章全文），random.choice 后再取一次
+- ids：只查询 id 列表，random.choice 后再取一次
+- catalog：当前实现，question_catalog.sample 从内存索引抽取，再用一条 IN 查询取出被选中的题目
+另外测量 catalog 在排除 --answered 道已答题目时一次抽 10 道的延迟。
+
+    python -m scripts.bench_random_question [--questions 100000] [--passage-words 300] [--samples 20]
+"""
+import argparse
+import asyncio
+import random
+import sys
+import time
+import tracemalloc
+from typing import Awaitable, Callable, List, Optional
+
+from scripts._bench import latency_summary, print_table, use_temp_database
+
+use_temp_database("random_question")
+
+from sqlalchemy import insert, select
+
+from app.database import AsyncSessionLocal, async_engine, engine, init_db
+from app.models.question import Question
+from app.services.question_catalog import question_catalog
+
+CATEGORIES = ("listening", "reading", "writing", "speaking")
+DIFFICULTIES = ("easy", "medium", "hard")
+WORDS = ("the", "climate", "research", "students", "city", "history", "energy", "ocean",
+         "technology", "language", "museum", "survey", "evidence", "economic", "ancient")
+
+FILTERS = [
+    (None, None),
+    ("reading", None),
+    ("reading", "medium"),
+]
+
+
+def seed(questions: int, passage_words: int) -> None:
+    init_db()
+    rng = random.Random(0)
+    with engine.begin() as conn:
+        batch = []
+        for question_id in range(1, questions + 1):
+            category = CATEGORIES[question_id % len(CATEGORIES)]
+            batch.append({
+                "id": question_id,
+                "category": category,
+                "question_type": "multiple_choice",
+                "difficulty": rng.choice(DIFFICULTIES),
+                "title": f"Question {question_id}",
+                "passage": " ".join(rng.choices(WORDS, k=passage_words)) if category == "reading" else None,
+                "content": f"Question {question_id} content",
+                "answer": "A",
+            })
+            if len(batch) == 5000:
+                conn.execute(insert(Question.__table__), batch)
+                batch = []
+        if batch:
+            conn.execute(insert(Question.__table__), batch)
+
+
+def _filtered(query, category: Optional[str], difficulty: Optional[str]):
+    if category:
+        query = query.where(Question.category == category)
+    if difficulty:
+        query = query.where(Question.difficulty == difficulty)
+    return query
+
+
+async def load_all(category: Optional[str], difficulty: Optional[str]) -> List[int]:
+    async with AsyncSessionLocal() as db:
+        questions = (await db.scalars(_filtered(select(Question), category, difficulty))).all()
+        chosen = random.choice(questions)
+        question = await db.get(Question, chosen.id)
+        return [question.id]
+
+
+async def ids_only(category: Optional[str], difficulty: Optional[str]) -> List[int]:
+    async with AsyncSessionLocal() as db:
+        question_ids = (await db.scalars(_filtered(select(Question.id), category, difficulty))).all()
+        question = await db.get(Question, random.choice(question_ids))
+        return [question.id]
+
+
+async def catalog(category: Optional[str], difficulty: Optional[str], n: int = 1,
+                  exclude: Optional[set] = None) -> List[int]:
+    question_ids = await question_catalog.sample(n, category=category, difficulty=difficulty, exclude=exclude)
+    async with AsyncSessionLocal() as db:
+        questions = (await db.scalars(select(Question).where(Question.id.in_(question_ids)))).all()
+        return [question.id for question in questions]
+
+
+async def measure(call: Callable[[], Awaitable[List[int]]], samples: int) -> dict:
+    await call()
+    tracemalloc.start()
+    await call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    latencies = []
+    for _ in range(samples):
+        started = time.perf_counter()
+        await call()
+        latencies.append(time.perf_counter() - started)
+    return {**latency_summary(latencies), "peak_mb": round(peak / 1024 / 1024, 2)}
+
+
+async def run(samples: int, answered: int, questions: int) -> None:
+    rows = []
+    for category, difficulty in FILTERS:
+        label = "/".join(value for value in (category, difficulty) if value) or "all"
+        for mode, call in (("load-all", load_all), ("ids", ids_only), ("catalog", catalog)):
+            # 全表加载很慢，少测几次
+            count = max(samples // 4, 3) if mode == "load-all" else samples * 10
+            result = await measure(lambda: call(category, difficulty), count)
+            rows.append({"filter": label, "mode": mode, "samples": count, **result})
+
+    exclude = set(random.Random(1).sample(range(1, questions + 1), min(answered, questions)))
+    result = await measure(lambda: catalog("reading", None, n=10, exclude=exclude), samples * 10)
+    rows.append({"filter": f"reading n=10 exclude={len(exclude)}", "mode": "catalog",
+                 "samples": samples * 10, **result})
+    await async_engine.dispose()
+    print_table(f"{questions} 道题，单次抽题（不含 HTTP）", rows)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m scripts.bench_random_question",
+                                     description="随机抽题实现对比")
+    parser.add_argument("--questions", type=int, default=100000, help="题目数")
+    parser.add_argument("--passage-words", type=int, default=300, help="阅读题文章的词数")
+    parser.add_argument("--samples", type=int, default=20, help="每组测量次数基数")
+    parser.add_argument("--answered", type=int, default=1000, help="排除的已答题目数")
+    args = parser.parse_args(argv)
+
+    started = time.perf_counter()
+    seed(args.questions, args.passage_words)
+    print(f"已写入 {args.questions} 道题（{time.perf_counter() - started:.1f} 秒）")
+    asyncio.run(run(args.samples, args.answered, args.questions))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,163 @@
+"""
+SQLite 存储配置（SQLITE_PROFILE）在多进程并发读写下的对比
+
+模拟 gunicorn 多 worker：每种配置使用一个新的临时库，启动 --writers 个写进程和 --readers 个读进程，
+各自通过 app.database 的同步会话访问同一个库，持续 --seconds 秒：
+- 写进程模拟提交答案：读取题目、插入答题记录、更新会话计数，一次提交一个事务
+- 读进程模拟统计页：按题型聚合答题记录
+报告成功提交数、"database is locked" 失败数，以及读写事务的延迟。
+
+default 配置（回滚日志）下读事务持有的共享锁会挡住写事务提交，pysqlite 默认最多等待 5 秒，
+超过才报 database is locked，所以主要体现为写入延迟和吞吐；production 配置使用 WAL，读写互不阻塞。
+库中预先写入 --answers 条答题记录，让读事务有实际的执行时间。
+
+    python -m scripts.bench_sqlite_contention [--writers 4] [--readers 4] [--seconds 5] [--answers 50000]
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import sys
+import time
+from typing import Dict, List
+
+from scripts._bench import latency_summary, print_table, use_temp_database
+
+QUESTIONS = 200
+
+
+def _configure(db_path: str, profile: str) -> None:
+    """子进程在导入 app 之前指定数据库和存储配置"""
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ["SQLITE_PROFILE"] = profile
+
+
+def seed(db_path: str, profile: str, answers: int) -> None:
+    _configure(db_path, profile)
+    from sqlalchemy import insert
+
+    from app.database import engine, init_db
+    from app.models.practice import PracticeAnswer, PracticeSession
+    from app.models.question import Question
+    from app.models.user import User
+
+    init_db()
+    with engine.begin() as conn:
+        conn.execute(insert(User.__table__), [{"id": 1, "username": "bench"}])
+        conn.execute(insert(Question.__table__), [
+            {"id": question_id, "category": "reading", "question_type": "multiple_choice",
+             "title": f"Question {question_id}", "content": "content", "answer": "A"}
+            for question_id in range(1, QUESTIONS + 1)
+        ])
+        conn.execute(insert(PracticeSession.__table__), [
+            {"id": 1, "user_id": 1, "category": "reading", "total_questions": 0, "correct_count": 0}
+        ])
+        rng = random.Random(0)
+        if answers:
+            conn.execute(insert(PracticeAnswer.__table__), [
+                {"session_id": 1, "question_id": rng.randint(1, QUESTIONS), "user_id": 1,
+                 "user_answer": "A", "is_correct": rng.random() < 0.6}
+                for _ in range(answers)
+            ])
+
+
+def worker(db_path: str, profile: str, role: str, seconds: float, seed_value: int) -> Dict:
+    _configure(db_path, profile)
+    from sqlalchemy import case, func, select, update
+    from sqlalchemy.exc import OperationalError
+
+    from app.database import SessionLocal
+    from app.models import user  # noqa: F401  外键引用 users 表，需先注册模型
+    from app.models.practice import PracticeAnswer, PracticeSession
+    from app.models.question import Question
+
+    rng = random.Random(seed_value)
+    latencies: List[float] = []
+    locked = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        with SessionLocal() as db:
+            try:
+                if role == "writer":
+                    question = db.get(Question, rng.randint(1, QUESTIONS))
+                    is_correct = rng.random() < 0.6
+                    db.add(PracticeAnswer(session_id=1, question_id=question.id, user_id=1,
+                                          user_answer=rng.choice("ABCD"), is_correct=is_correct))
+                    db.execute(
+                        update(PracticeSession).where(PracticeSession.id == 1).values(
+                            total_questions=PracticeSession.total_questions + 1,
+                            correct_count=PracticeSession.correct_count + int(is_correct),
+                        )
+                    )
+                    db.commit()
+                else:
+                    db.execute(
+                        select(
+                            Question.question_type,
+                            func.count(),
+                            func.sum(case((PracticeAnswer.is_correct, 1), else_=0)),
+                        )
+                        .join(Question, PracticeAnswer.question_id == Question.id)
+                        .where(PracticeAnswer.user_id == 1)
+                        .group_by(Question.question_type)
+                    ).all()
+            except OperationalError as e:
+                if "locked" not in str(e):
+                    raise
+                locked += 1
+                db.rollback()
+                continue
+        latencies.append(time.perf_counter() - started)
+    return {"role": role, "latencies": latencies, "locked": locked}
+
+
+def run_profile(profile: str, writers: int, readers: int, seconds: float, answers: int) -> List[Dict]:
+    db_path = use_temp_database(f"contention_{profile}")
+    context = multiprocessing.get_context("spawn")
+    with context.Pool(1) as pool:
+        pool.apply(seed, (db_path, profile, answers))
+    roles = ["writer"] * writers + ["reader"] * readers
+    with context.Pool(len(roles)) as pool:
+        results = pool.starmap(worker, [
+            (db_path, profile, role, seconds, index) for index, role in enumerate(roles)
+        ])
+
+    rows = []
+    for role in ("writer", "reader"):
+        latencies = [value for result in results if result["role"] == role for value in result["latencies"]]
+        locked = sum(result["locked"] for result in results if result["role"] == role)
+        rows.append({
+            "profile": profile,
+            "role": role,
+            "ok_per_s": round(len(latencies) / seconds, 1),
+            "locked": locked,
+            **(latency_summary(latencies) if latencies else {"p50_ms": "-", "p99_ms": "-", "mean_ms": "-"}),
+        })
+    return rows
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m scripts.bench_sqlite_contention",
+                                     description="SQLite 存储配置多进程读写对比")
+    parser.add_argument("--writers", type=int, default=4, help="写进程数")
+    parser.add_argument("--readers", type=int, default=4, help="读进程数")
+    parser.add_argument("--seconds", type=float, default=5.0, help="每种配置的运行时间（秒）")
+    parser.add_argument("--answers", type=int, default=50000, help="预先写入的答题记录数")
+    parser.add_argument("--profile", choices=["default", "production"], action="append",
+                        help="只测指定配置，可重复（默认两种都测）")
+    args = parser.parse_args(argv)
+
+    rows = []
+    for profile in args.profile or ["default", "production"]:
+        rows.extend(run_profile(profile, args.writers, args.readers, args.seconds, args.answers))
+    print_table(
+        f"{args.writers} 个写进程 + {args.readers} 个读进程，预置 {args.answers} 条答题记录，"
+        f"每种配置 {args.seconds:g} 秒，CPU {os.cpu_count()} 核",
+        rows,
+    )
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,121 @@
+"""
+/api/ui/* 预序列化响应体的单次请求 CPU 开销
+
+临时 SQLite 库中创建 Demo 用户（没有答题记录，五个页面都返回示例数据），通过 ASGI 传输请求，
+用 time.process_time 统计每个请求消耗的 CPU 时间（含 httpx 客户端和 ASGI 的固定开销，各模式相同，
+每种模式交替测 --rounds 轮取最小值以减少噪声）：
+- rebuild：旧实现，每次请求构造 Pydantic 模型，由 FastAPI 按 response_model 校验并序列化
+  （用同一组构造函数和响应模型另建一个应用还原）
+- bytes：当前实现，直接返回启动时序列化好的响应体
+- 304：请求带上 If-None-Match，命中 ETag 不返回响应体
+另外单独测量不经过 HTTP 的部分：构造模型并序列化 vs 取出缓存的响应体。
+
+    python -m scripts.bench_ui_payloads [--requests 1000] [--rounds 3]
+"""
+import argparse
+import asyncio
+import sys
+import time
+
+from scripts._bench import print_table, use_temp_database
+
+use_temp_database("ui_payloads")
+
+import httpx
+from fastapi import APIRouter, Depends, FastAPI
+
+from app.database import async_engine, engine, init_db
+from app.main import app
+from app.migrations import run_migrations
+from app.routers import ui
+from app.routers.auth import CurrentUser, get_current_user
+from app.seed_data import ensure_demo_user
+
+PAGES = ("dashboard", "analysis", "foundation", "weakness", "practice")
+
+
+def build_rebuild_app() -> FastAPI:
+    """旧实现：路由返回模型对象，由 FastAPI 校验和序列化"""
+    response_models = {route.path.rsplit("/", 1)[-1]: route.response_model for route in ui.router.routes}
+    router = APIRouter()
+    for page in PAGES:
+        def endpoint(current_user: CurrentUser = Depends(get_current_user), build=ui._BUILDERS[page]):
+            _ = current_user
+            return build()
+
+        router.add_api_route(f"/{page}", endpoint, methods=["GET"], response_model=response_models[page])
+    rebuild_app = FastAPI()
+    rebuild_app.include_router(router, prefix="/api/ui")
+    return rebuild_app
+
+
+async def cpu_per_request(target: FastAPI, page: str, requests: int, etag: bool) -> float:
+    transport = httpx.ASGITransport(app=target)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        path = f"/api/ui/{page}"
+        first = await client.get(path)
+        headers = {"If-None-Match": first.headers["etag"]} if etag else {}
+        for _ in range(20):
+            await client.get(path, headers=headers)
+        started = time.process_time()
+        for _ in range(requests):
+            response = await client.get(path, headers=headers)
+        elapsed = time.process_time() - started
+        assert response.status_code == (304 if etag else 200)
+    return elapsed / requests * 1000
+
+
+def serialize_cost(page: str, iterations: int) -> dict:
+    """不经过 HTTP：每次构造并序列化 vs 取缓存（微秒）"""
+    build = ui._BUILDERS[page]
+    started = time.process_time()
+    for _ in range(iterations):
+        build().model_dump_json()
+    rebuild = time.process_time() - started
+    started = time.process_time()
+    for _ in range(iterations):
+        ui._shared_payload(page)
+    cached = time.process_time() - started
+    return {
+        "build_dump_us": round(rebuild / iterations * 1e6, 1),
+        "cached_lookup_us": round(cached / iterations * 1e6, 2),
+    }
+
+
+async def run(requests: int, rounds: int) -> None:
+    rebuild_app = build_rebuild_app()
+    request_rows, serialize_rows = [], []
+    for page in PAGES:
+        timings = {"rebuild": [], "bytes": [], "304": []}
+        for _ in range(rounds):
+            timings["rebuild"].append(await cpu_per_request(rebuild_app, page, requests, etag=False))
+            timings["bytes"].append(await cpu_per_request(app, page, requests, etag=False))
+            timings["304"].append(await cpu_per_request(app, page, requests, etag=True))
+        request_rows.append({
+            "page": page,
+            "body_bytes": len(ui._shared_payload(page).body),
+            **{f"{mode}_cpu_ms": round(min(values), 3) for mode, values in timings.items()},
+        })
+        serialize_rows.append({"page": page, **serialize_cost(page, requests * 5)})
+    await async_engine.dispose()
+    print_table(f"每个请求的 CPU 时间（{requests} 次取平均，{rounds} 轮取最小）", request_rows)
+    print_table("不经过 HTTP 的构造和序列化开销", serialize_rows)
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m scripts.bench_ui_payloads",
+                                     description="/api/ui/* 预序列化响应体的单次请求 CPU 开销")
+    parser.add_argument("--requests", type=int, default=1000, help="每个页面每种模式每轮的请求数")
+    parser.add_argument("--rounds", type=int, default=3, help="交替测量的轮数")
+    args = parser.parse_args(argv)
+
+    init_db()
+    run_migrations(engine)
+    ensure_demo_user()
+    ui.build_ui_payloads()
+    asyncio.run(run(args.requests, max(args.rounds, 1)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
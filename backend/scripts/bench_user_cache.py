@@ -0,0 +1,93 @@
+"""
+get_current_user 用户快照缓存对 /api/ui/* 吞吐的影响
+
+临时 SQLite 库中创建 Demo 用户，通过 ASGI 传输请求完整应用（含中间件和全部依赖），对比：
+- uncached：旧实现，每个请求打开会话并 SELECT 一次 users（以依赖覆盖的方式还原）
+- cached：当前的 get_current_user，命中进程内缓存时不访问数据库
+/api/ui/practice 是静态数据，用户查询是它唯一的数据库操作；/api/ui/dashboard 还会读取学情汇总（有缓存）。
+
+    python -m scripts.bench_user_cache [--requests 2000] [--concurrency 10]
+"""
+import argparse
+import asyncio
+import sys
+import time
+from typing import List
+
+from scripts._bench import latency_summary, print_table, use_temp_database
+
+use_temp_database("user_cache")
+
+import httpx
+from fastapi import Depends
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.database import async_engine, engine, get_db, init_db
+from app.main import app
+from app.migrations import run_migrations
+from app.models.user import User
+from app.routers.auth import DEMO_USER_ID, CurrentUser, get_current_user, user_cache_stats
+from app.routers.ui import build_ui_payloads
+from app.seed_data import ensure_demo_user
+
+PATHS = ("/api/ui/practice", "/api/ui/dashboard")
+
+
+async def uncached_current_user(db: AsyncSession = Depends(get_db)) -> CurrentUser:
+    """旧实现：每个请求查询一次用户"""
+    return CurrentUser.from_orm_user(await db.get(User, DEMO_USER_ID))
+
+
+async def drive(path: str, requests: int, concurrency: int) -> dict:
+    semaphore = asyncio.Semaphore(concurrency)
+    samples: List[float] = []
+    transport = httpx.ASGITransport(app=app)
+
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        async def one() -> None:
+            async with semaphore:
+                started = time.perf_counter()
+                response = await client.get(path)
+                response.raise_for_status()
+                samples.append(time.perf_counter() - started)
+
+        for _ in range(20):
+            await one()
+        samples.clear()
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        elapsed = time.perf_counter() - started
+    return {"req_per_s": round(requests / elapsed, 1), **latency_summary(samples)}
+
+
+async def run(requests: int, concurrency: int) -> None:
+    rows = []
+    for path in PATHS:
+        for mode in ("uncached", "cached"):
+            if mode == "uncached":
+                app.dependency_overrides[get_current_user] = uncached_current_user
+            else:
+                app.dependency_overrides.pop(get_current_user, None)
+            rows.append({"path": path, "mode": mode, **await drive(path, requests, concurrency)})
+    await async_engine.dispose()
+    print_table(f"每组 {requests} 个请求，并发 {concurrency}", rows)
+    print(f"\n用户缓存：{user_cache_stats()}")
+
+
+def main(argv: list[str]) -> int:
+    parser = argparse.ArgumentParser(prog="python -m scripts.bench_user_cache",
+                                     description="用户快照缓存对 /api/ui/* 吞吐的影响")
+    parser.add_argument("--requests", type=int, default=2000, help="每组请求数")
+    parser.add_argument("--concurrency", type=int, default=10, help="并发请求数")
+    args = parser.parse_args(argv)
+
+    init_db()
+    run_migrations(engine)
+    ensure_demo_user()
+    build_ui_payloads()
+    asyncio.run(run(args.requests, args.concurrency))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
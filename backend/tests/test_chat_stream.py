@@ -0,0 +1,96 @@
+"""
+流式对话：客户端中途断开时保存已生成的部分回复
+"""
+import asyncio
+import json
+from datetime import datetime
+
+from fastapi import FastAPI
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+
+from app.database import get_db
+from app.models.report import ChatHistory
+from app.routers import chat
+from app.routers.auth import CurrentUser, get_current_user
+
+
+def _stalling_stream(stalled: asyncio.Event):
+    async def stream(message, history=None):
+        yield "Hel"
+        yield "lo"
+        # 上游还在生成，客户端在此期间断开
+        stalled.set()
+        await asyncio.Event().wait()
+
+    return stream
+
+
+async def _disconnect_mid_stream(app: FastAPI, stalled: asyncio.Event) -> list:
+    """调用 /stream，上游停顿时模拟客户端断开，返回发出的消息"""
+    body = json.dumps({"message": "hi"}).encode()
+    request_sent = False
+    sent = []
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await stalled.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.3"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/chat/stream",
+        "raw_path": b"/api/chat/stream",
+        "root_path": "",
+        "query_string": b"",
+        "headers": [(b"content-type", b"application/json")],
+        "client": ("127.0.0.1", 1234),
+        "server": ("testserver", 80),
+    }
+    await asyncio.wait_for(app(scope, receive, send), timeout=5)
+    return sent
+
+
+def test_stream_saves_partial_reply_when_client_disconnects(tmp_path, monkeypatch):
+    engine = create_async_engine(f"sqlite+aiosqlite:///{tmp_path / 'chat.db'}")
+    session_factory = async_sessionmaker(engine, expire_on_commit=False)
+
+    async def override_db():
+        async with session_factory() as db:
+            yield db
+
+    app = FastAPI()
+    app.include_router(chat.router, prefix="/api/chat")
+    app.dependency_overrides[get_db] = override_db
+    app.dependency_overrides[get_current_user] = lambda: CurrentUser(
+        id=1, username="demo", email=None, target_score=None, created_at=datetime.utcnow()
+    )
+    monkeypatch.setattr(chat, "AsyncSessionLocal", session_factory)
+
+    async def run():
+        stalled = asyncio.Event()
+        monkeypatch.setattr(chat, "stream_chat_with_ai", _stalling_stream(stalled))
+        async with engine.begin() as conn:
+            await conn.run_sync(ChatHistory.__table__.create)
+        sent = await _disconnect_mid_stream(app, stalled)
+        async with session_factory() as db:
+            rows = (await db.execute(
+                select(ChatHistory.role, ChatHistory.content).order_by(ChatHistory.id)
+            )).all()
+        await engine.dispose()
+        return sent, rows
+
+    sent, rows = asyncio.run(run())
+
+    assert any(b"Hel" in message.get("body", b"") for message in sent)
+    assert [tuple(row) for row in rows] == [("user", "hi"), ("model", "Hello")]
@@ -0,0 +1,40 @@
+"""
+个性化推荐打分与取题
+"""
+import random
+
+from app.services.learning_rollups import RollupSummary
+from app.services.recommender import rank_questions
+
+
+def _pools(count: int, size: int):
+    """count 个池，每个池 size 道题，id 连续"""
+    pools = {}
+    next_id = 1
+    for index in range(count):
+        pools[("reading", f"type_{index}", "medium")] = [
+            (next_id + offset, f"Q{next_id + offset}") for offset in range(size)
+        ]
+        next_id += size
+    return pools
+
+
+def test_rank_questions_fills_limit_from_lower_ranked_pools():
+    pools = _pools(count=8, size=2)
+    # 前 5 个池的题全部做过，只剩后 3 个池有题
+    exclude = set(range(1, 11))
+
+    picks = rank_questions(pools, RollupSummary(buckets=()), exclude, limit=5, rng=random.Random(0))
+
+    assert len(picks) == 5
+    assert len({pick.question_id for pick in picks}) == 5
+    assert not exclude & {pick.question_id for pick in picks}
+
+
+def test_rank_questions_returns_all_unseen_when_fewer_than_limit():
+    pools = _pools(count=6, size=3)
+    exclude = set(range(1, 17))
+
+    picks = rank_questions(pools, RollupSummary(buckets=()), exclude, limit=5, rng=random.Random(0))
+
+    assert sorted(pick.question_id for pick in picks) == [17, 18]